@@ -2,6 +2,7 @@
 CallShield - AI 실시간 보이스피싱 탐지 서비스 (MVP 데모)
 Streamlit 기반 인터랙티브 데모
 """
+import os
 import streamlit as st
 import time
 from detector import CallShieldDetector, DEMO_SCENARIOS, SPAM_DB
@@ -17,254 +18,21 @@ st.set_page_config(
 )
 
 # ============================================================
-# 커스텀 CSS
+# 커스텀 CSS (static/callshield.css, 폰트는 static/fonts/에서 로컬 제공)
 # ============================================================
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Noto+Sans+KR:wght@300;400;500;700;900&display=swap');
-
-/* 전체 앱 */
-.stApp {
-    font-family: 'Noto Sans KR', sans-serif;
-}
-
-/* 헤더 영역 */
-.main-header {
-    background: linear-gradient(135deg, #0F172A 0%, #1E293B 50%, #0F172A 100%);
-    border-radius: 16px;
-    padding: 2rem 2.5rem;
-    margin-bottom: 1.5rem;
-    border: 1px solid #334155;
-    position: relative;
-    overflow: hidden;
-}
-.main-header::before {
-    content: '';
-    position: absolute;
-    top: -50%;
-    right: -20%;
-    width: 400px;
-    height: 400px;
-    background: radial-gradient(circle, rgba(59,130,246,0.15) 0%, transparent 70%);
-    pointer-events: none;
-}
-.main-header h1 {
-    color: #F8FAFC;
-    font-size: 2rem;
-    font-weight: 900;
-    margin: 0 0 0.3rem 0;
-    letter-spacing: -0.5px;
-}
-.main-header p {
-    color: #94A3B8;
-    font-size: 1rem;
-    margin: 0;
-    font-weight: 300;
-}
-.shield-icon {
-    font-size: 2.5rem;
-    margin-right: 0.8rem;
-}
-
-/* 위험도 미터 */
-.risk-meter {
-    background: #0F172A;
-    border-radius: 16px;
-    padding: 1.5rem;
-    border: 1px solid #334155;
-    text-align: center;
-    margin-bottom: 1rem;
-}
-.risk-score {
-    font-size: 4rem;
-    font-weight: 900;
-    line-height: 1;
-    margin: 0.5rem 0;
-}
-.risk-label {
-    font-size: 1.1rem;
-    font-weight: 700;
-    margin: 0.5rem 0;
-}
-.risk-action {
-    font-size: 0.85rem;
-    color: #94A3B8;
-    margin-top: 0.3rem;
-}
-
-/* 프로그레스 바 */
-.risk-bar-container {
-    background: #1E293B;
-    border-radius: 99px;
-    height: 12px;
-    margin: 1rem 0;
-    overflow: hidden;
-}
-.risk-bar {
-    height: 100%;
-    border-radius: 99px;
-    transition: width 0.5s ease;
-}
-
-/* 대화 메시지 */
-.chat-message {
-    padding: 1rem 1.2rem;
-    border-radius: 12px;
-    margin-bottom: 0.8rem;
-    font-size: 0.95rem;
-    line-height: 1.6;
-}
-.chat-caller {
-    background: #1E293B;
-    border: 1px solid #334155;
-    color: #E2E8F0;
-    border-left: 4px solid #64748B;
-}
-.chat-caller .chat-label {
-    color: #94A3B8;
-    font-size: 0.75rem;
-    font-weight: 700;
-    text-transform: uppercase;
-    letter-spacing: 1px;
-    margin-bottom: 0.3rem;
-}
-
-/* 경고 카드 */
-.alert-card {
-    border-radius: 12px;
-    padding: 1rem 1.2rem;
-    margin-bottom: 0.6rem;
-    font-size: 0.9rem;
-    line-height: 1.5;
-}
-.alert-critical {
-    background: rgba(239, 68, 68, 0.1);
-    border: 1px solid rgba(239, 68, 68, 0.3);
-    color: #FCA5A5;
-}
-.alert-warning {
-    background: rgba(245, 158, 11, 0.1);
-    border: 1px solid rgba(245, 158, 11, 0.3);
-    color: #FCD34D;
-}
-.alert-info {
-    background: rgba(59, 130, 246, 0.1);
-    border: 1px solid rgba(59, 130, 246, 0.3);
-    color: #93C5FD;
-}
-.alert-safe {
-    background: rgba(34, 197, 94, 0.1);
-    border: 1px solid rgba(34, 197, 94, 0.3);
-    color: #86EFAC;
-}
-
-/* 공식 절차 근거 */
-.procedure-card {
-    background: rgba(59, 130, 246, 0.08);
-    border: 1px solid rgba(59, 130, 246, 0.2);
-    border-radius: 10px;
-    padding: 0.8rem 1rem;
-    margin-bottom: 0.5rem;
-    font-size: 0.85rem;
-    color: #93C5FD;
-    line-height: 1.5;
-}
-.procedure-card::before {
-    content: '📋 ';
-}
-
-/* 패턴 태그 */
-.pattern-tag {
-    display: inline-block;
-    padding: 0.3rem 0.8rem;
-    border-radius: 99px;
-    font-size: 0.8rem;
-    font-weight: 600;
-    margin: 0.2rem;
-}
-.tag-institution { background: rgba(139, 92, 246, 0.2); color: #C4B5FD; border: 1px solid rgba(139, 92, 246, 0.3); }
-.tag-fear { background: rgba(239, 68, 68, 0.2); color: #FCA5A5; border: 1px solid rgba(239, 68, 68, 0.3); }
-.tag-money { background: rgba(245, 158, 11, 0.2); color: #FCD34D; border: 1px solid rgba(245, 158, 11, 0.3); }
-.tag-privacy { background: rgba(236, 72, 153, 0.2); color: #F9A8D4; border: 1px solid rgba(236, 72, 153, 0.3); }
-.tag-app { background: rgba(20, 184, 166, 0.2); color: #5EEAD4; border: 1px solid rgba(20, 184, 166, 0.3); }
-
-/* 번호 조회 결과 */
-.number-result {
-    border-radius: 12px;
-    padding: 1.2rem;
-    margin: 1rem 0;
-}
-.number-safe {
-    background: rgba(34, 197, 94, 0.1);
-    border: 1px solid rgba(34, 197, 94, 0.3);
-}
-.number-danger {
-    background: rgba(239, 68, 68, 0.1);
-    border: 1px solid rgba(239, 68, 68, 0.3);
-}
-
-/* 사이드바 스타일 */
-section[data-testid="stSidebar"] {
-    background: #0F172A;
-}
-section[data-testid="stSidebar"] * {
-    color: #E2E8F0 !important;
-}
-section[data-testid="stSidebar"] .stRadio label span {
-    color: #E2E8F0 !important;
-    font-weight: 500;
-}
-section[data-testid="stSidebar"] .stRadio div[role="radiogroup"] label:hover span {
-    color: #FFFFFF !important;
-}
-section[data-testid="stSidebar"] .stSelectbox label,
-section[data-testid="stSidebar"] .stSelectbox div[data-baseweb="select"] {
-    color: #E2E8F0 !important;
-}
-section[data-testid="stSidebar"] .stMarkdown p,
-section[data-testid="stSidebar"] .stMarkdown span,
-section[data-testid="stSidebar"] .stMarkdown h3,
-section[data-testid="stSidebar"] .stMarkdown h4 {
-    color: #E2E8F0 !important;
-}
-section[data-testid="stSidebar"] .stCaption p {
-    color: #94A3B8 !important;
-}
-section[data-testid="stSidebar"] button {
-    background: #1E293B !important;
-    border: 1px solid #475569 !important;
-    color: #E2E8F0 !important;
-}
-section[data-testid="stSidebar"] button:hover {
-    background: #334155 !important;
-    border-color: #64748B !important;
-    color: #FFFFFF !important;
-}
-
-/* 버튼 */
-.stButton > button {
-    border-radius: 10px;
-    font-weight: 600;
-    font-family: 'Noto Sans KR', sans-serif;
-}
-
-/* 탭 */
-.stTabs [data-baseweb="tab-list"] {
-    gap: 0.5rem;
-}
-.stTabs [data-baseweb="tab"] {
-    border-radius: 10px;
-    font-family: 'Noto Sans KR', sans-serif;
-}
-
-/* 구분선 */
-.divider {
-    border: none;
-    border-top: 1px solid #334155;
-    margin: 1.5rem 0;
-}
-</style>
-""", unsafe_allow_html=True)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+
+@st.cache_resource
+def load_stylesheet() -> str:
+    """스타일시트를 프로세스당 한 번만 읽어 <style> 블록으로 반환"""
+    with open(os.path.join(STATIC_DIR, "callshield.css"), encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
+
+
+# 전체 재실행(버튼 클릭 등)마다 다시 보냄: Streamlit은 재실행에서 다시 그리지 않은 요소를 지우므로
+# 한 번만 보내면 다음 재실행에서 스타일이 사라짐 (파일은 캐시에서 읽으므로 디스크 I/O는 없음)
+st.markdown(load_stylesheet(), unsafe_allow_html=True)
 
 
 # ============================================================
@@ -274,12 +42,45 @@ if "detector" not in st.session_state:
     st.session_state.detector = CallShieldDetector()
 if "analysis_history" not in st.session_state:
     st.session_state.analysis_history = []
+if "turn_html" not in st.session_state:
+    st.session_state.turn_html = []  # analysis_history와 같은 순서의 발화별 렌더링 결과 캐시
 if "demo_step" not in st.session_state:
     st.session_state.demo_step = 0
 if "current_scenario" not in st.session_state:
     st.session_state.current_scenario = None
 
 
+# ============================================================
+# 대화 렌더링
+# ============================================================
+def render_turn_html(index: int, result: dict) -> str:
+    """발화 한 턴(발화·감지 알림·공식 절차 근거)의 HTML
+
+    턴의 내용은 분석 이후 바뀌지 않으므로 한 번만 만들어 session_state.turn_html에 보관합니다.
+    """
+    alert_class = "alert-critical" if result["risk_score"] >= 80 else \
+                  "alert-warning" if result["risk_score"] >= 50 else "alert-info"
+    # 상대방 발화
+    parts = [
+        f"<div class='chat-message chat-caller'>"
+        f"<div class='chat-label'>상대방 ({index+1}번째 발화)</div>"
+        f"{result['message']}"
+        f"</div>"
+    ]
+    # 새로 감지된 패턴 알림
+    for det in result["new_detections"]:
+        parts.append(
+            f"<div class='alert-card {alert_class}'>"
+            f"{det['label']} 감지 — <b>\"{det['keyword']}\"</b><br>"
+            f"<span style='font-size:0.8rem;'>{det['description']}</span>"
+            f"</div>"
+        )
+    # 새로 제시된 공식 절차 근거
+    for proc in result["new_procedures"]:
+        parts.append(f"<div class='procedure-card'>{proc}</div>")
+    return "".join(parts)
+
+
 # ============================================================
 # 헤더
 # ============================================================
@@ -299,6 +100,11 @@ st.markdown("""
 # ============================================================
 # 사이드바
 # ============================================================
+def _caller_number() -> str | None:
+    """사이드바에 입력한 발신 번호 (없으면 None)"""
+    return st.session_state.get("caller_input", "").strip() or None
+
+
 with st.sidebar:
     st.markdown("### 🎯 기능 선택")
     mode = st.radio(
@@ -310,6 +116,15 @@ with st.sidebar:
     st.markdown("<hr class='divider'>", unsafe_allow_html=True)
 
     if mode == "📞 실시간 통화 분석":
+        st.markdown("### 📱 발신 번호")
+        st.caption("입력하면 번호 평판을 위험도 시작값에 반영합니다. (시나리오 시작·대화 초기화 시 적용)")
+        st.text_input(
+            "발신 번호",
+            key="caller_input",
+            placeholder="예: 010-9876-5432",
+            label_visibility="collapsed",
+        )
+
         st.markdown("### 🎭 데모 시나리오")
         st.caption("프리셋 시나리오를 선택하면 한 문장씩 자동 입력됩니다.")
 
@@ -321,29 +136,18 @@ with st.sidebar:
 
         if scenario_choice != "직접 입력":
             if st.button("▶️ 시나리오 시작", use_container_width=True):
-                st.session_state.detector = CallShieldDetector()
+                st.session_state.detector = CallShieldDetector(caller=_caller_number())
                 st.session_state.analysis_history = []
+                st.session_state.turn_html = []
                 st.session_state.demo_step = 0
                 st.session_state.current_scenario = scenario_choice
 
-            if st.session_state.current_scenario == scenario_choice:
-                scenario_msgs = DEMO_SCENARIOS[scenario_choice]
-                step = st.session_state.demo_step
-                if step < len(scenario_msgs):
-                    if st.button(f"📨 다음 발화 ({step+1}/{len(scenario_msgs)})", use_container_width=True):
-                        msg = scenario_msgs[step]
-                        result = st.session_state.detector.analyze_message(msg)
-                        st.session_state.analysis_history.append(result)
-                        st.session_state.demo_step += 1
-                        st.rerun()
-                else:
-                    st.success("✅ 시나리오 완료!")
-
         st.markdown("<hr class='divider'>", unsafe_allow_html=True)
 
         if st.button("🔄 대화 초기화", use_container_width=True):
-            st.session_state.detector = CallShieldDetector()
+            st.session_state.detector = CallShieldDetector(caller=_caller_number())
             st.session_state.analysis_history = []
+            st.session_state.turn_html = []
             st.session_state.demo_step = 0
             st.session_state.current_scenario = None
             st.rerun()
@@ -361,179 +165,207 @@ with st.sidebar:
 # ============================================================
 # 메인: 실시간 통화 분석
 # ============================================================
-if mode == "📞 실시간 통화 분석":
-    col_chat, col_analysis = st.columns([3, 2])
+# 입력·대화·대시보드는 하나의 fragment로 묶어, 발화 입력 시 이 부분만 다시 실행합니다.
+# (헤더·사이드바·스타일시트는 다시 실행·전송하지 않음)
+def analyze_utterance(message: str):
+    result = st.session_state.detector.analyze_message(message, delta_only=True)
+    st.session_state.analysis_history.append(result)
+
+
+def _submit_input():
+    message = st.session_state.utterance_input.strip()
+    if message:
+        analyze_utterance(message)
+
+
+def _next_scenario_step():
+    scenario_msgs = DEMO_SCENARIOS[st.session_state.current_scenario]
+    analyze_utterance(scenario_msgs[st.session_state.demo_step])
+    st.session_state.demo_step += 1
+
+
+def input_pane():
+    """직접 입력 폼, 또는 시나리오 진행 중이면 다음 발화 버튼"""
+    scenario = st.session_state.current_scenario
+    if scenario is None or scenario not in DEMO_SCENARIOS:
+        with st.form("input_form", clear_on_submit=True):
+            st.text_input(
+                "상대방 발화를 입력하세요",
+                key="utterance_input",
+                placeholder="예: 서울중앙지검 수사관입니다...",
+                label_visibility="collapsed",
+            )
+            st.form_submit_button("분석 📡", on_click=_submit_input, use_container_width=True)
+        return
+
+    scenario_msgs = DEMO_SCENARIOS[scenario]
+    step = st.session_state.demo_step
+    if step < len(scenario_msgs):
+        st.button(
+            f"📨 다음 발화 ({step+1}/{len(scenario_msgs)})",
+            on_click=_next_scenario_step,
+            use_container_width=True,
+        )
+    else:
+        st.success("✅ 시나리오 완료!")
 
-    # --- 왼쪽: 대화 영역 ---
-    with col_chat:
-        st.markdown("#### 💬 통화 내용")
 
-        # 직접 입력 모드
-        if (st.session_state.current_scenario is None or
-                st.session_state.current_scenario not in DEMO_SCENARIOS):
-            with st.form("input_form", clear_on_submit=True):
-                user_input = st.text_input(
-                    "상대방 발화를 입력하세요",
-                    placeholder="예: 서울중앙지검 수사관입니다...",
-                    label_visibility="collapsed",
-                )
-                submitted = st.form_submit_button("분석 📡", use_container_width=True)
-                if submitted and user_input.strip():
-                    result = st.session_state.detector.analyze_message(user_input.strip())
-                    st.session_state.analysis_history.append(result)
-                    st.rerun()
-
-        # 대화 기록 표시
-        if not st.session_state.analysis_history:
-            st.markdown(
-                "<div style='text-align:center; padding:3rem; color:#64748B;'>"
-                "📱 통화가 시작되지 않았습니다.<br>"
-                "<span style='font-size:0.85rem;'>왼쪽 사이드바에서 시나리오를 선택하거나, 직접 상대방 발화를 입력하세요.</span>"
-                "</div>",
-                unsafe_allow_html=True,
-            )
-        else:
-            for i, result in enumerate(st.session_state.analysis_history):
-                # 상대방 발화
-                st.markdown(
-                    f"<div class='chat-message chat-caller'>"
-                    f"<div class='chat-label'>상대방 ({i+1}번째 발화)</div>"
-                    f"{result['message']}"
-                    f"</div>",
-                    unsafe_allow_html=True,
-                )
-
-                # 새로 감지된 패턴 알림
-                for det in result["new_detections"]:
-                    risk = result["risk_level"]
-                    alert_class = "alert-critical" if result["risk_score"] >= 80 else \
-                                  "alert-warning" if result["risk_score"] >= 50 else "alert-info"
-                    st.markdown(
-                        f"<div class='alert-card {alert_class}'>"
-                        f"{det['label']} 감지 — <b>\"{det['keyword']}\"</b><br>"
-                        f"<span style='font-size:0.8rem;'>{det['description']}</span>"
-                        f"</div>",
-                        unsafe_allow_html=True,
-                    )
-
-                # 새로 제시된 공식 절차 근거
-                for proc in result["new_procedures"]:
-                    st.markdown(
-                        f"<div class='procedure-card'>{proc}</div>",
-                        unsafe_allow_html=True,
-                    )
-
-            # 위험도 80% 이상이면 최종 경고
-            summary = st.session_state.detector.get_summary()
-            if summary["risk_score"] >= 80:
-                st.markdown(
-                    "<div class='alert-card alert-critical' style='margin-top:1rem; padding:1.5rem; text-align:center;'>"
-                    "<div style='font-size:2rem; margin-bottom:0.5rem;'>🚨</div>"
-                    "<div style='font-size:1.2rem; font-weight:900;'>보이스피싱 확정 — 즉시 통화를 종료하세요!</div>"
-                    "<div style='font-size:0.85rem; margin-top:0.5rem;'>절대 개인정보를 알려주지 마시고, "
-                    "경찰(112) 또는 금감원(1332)에 즉시 신고하세요.</div>"
-                    "</div>",
-                    unsafe_allow_html=True,
-                )
+def conversation_pane(summary: dict):
+    """대화 기록 (지난 발화는 캐시된 HTML을 재사용하고, 새 발화만 렌더링)"""
+    history = st.session_state.analysis_history
+    if not history:
+        st.markdown(
+            "<div style='text-align:center; padding:3rem; color:#64748B;'>"
+            "📱 통화가 시작되지 않았습니다.<br>"
+            "<span style='font-size:0.85rem;'>왼쪽 사이드바에서 시나리오를 선택하거나, 직접 상대방 발화를 입력하세요.</span>"
+            "</div>",
+            unsafe_allow_html=True,
+        )
+        return
 
-    # --- 오른쪽: 분석 대시보드 ---
-    with col_analysis:
-        summary = st.session_state.detector.get_summary()
-        risk = summary["risk_level"]
-
-        # 위험도 미터
-        color_map = {
-            "critical": "#EF4444",
-            "high": "#F59E0B",
-            "caution": "#EAB308",
-            "safe": "#22C55E",
-        }
-        bar_color = color_map.get(risk["level"], "#22C55E")
+    turn_html = st.session_state.turn_html
+    for i in range(len(turn_html), len(history)):
+        turn_html.append(render_turn_html(i, history[i]))
+    st.markdown("".join(turn_html), unsafe_allow_html=True)
 
+    # 위험도 80% 이상이면 최종 경고
+    if summary["risk_score"] >= 80:
         st.markdown(
-            f"<div class='risk-meter'>"
-            f"<div style='font-size:0.8rem; color:#64748B; font-weight:600; letter-spacing:1px;'>실시간 위험도</div>"
-            f"<div class='risk-score' style='color:{bar_color};'>{summary['risk_score']}%</div>"
-            f"<div class='risk-bar-container'>"
-            f"<div class='risk-bar' style='width:{summary['risk_score']}%; background:{bar_color};'></div>"
-            f"</div>"
-            f"<div class='risk-label' style='color:{bar_color};'>{risk['emoji']} {risk['label']}</div>"
-            f"<div class='risk-action'>{risk['action']}</div>"
-            f"</div>",
+            "<div class='alert-card alert-critical' style='margin-top:1rem; padding:1.5rem; text-align:center;'>"
+            "<div style='font-size:2rem; margin-bottom:0.5rem;'>🚨</div>"
+            "<div style='font-size:1.2rem; font-weight:900;'>보이스피싱 확정 — 즉시 통화를 종료하세요!</div>"
+            "<div style='font-size:0.85rem; margin-top:0.5rem;'>절대 개인정보를 알려주지 마시고, "
+            "경찰(112) 또는 금감원(1332)에 즉시 신고하세요.</div>"
+            "</div>",
             unsafe_allow_html=True,
         )
 
-        # 감지된 패턴 태그
-        st.markdown("#### 🔎 감지된 패턴")
-        if summary["detected_categories"]:
-            tag_class_map = {
-                "기관사칭": "tag-institution",
-                "공포유발": "tag-fear",
-                "금전요구": "tag-money",
-                "개인정보탈취": "tag-privacy",
-                "앱설치유도": "tag-app",
-            }
-            from detector import PHISHING_PATTERNS
-            tags_html = ""
-            for cat in summary["detected_categories"]:
-                tag_cls = tag_class_map.get(cat, "tag-institution")
-                label = PHISHING_PATTERNS[cat]["label"]
-                count = len(summary["detected_keywords"].get(cat, []))
-                tags_html += f"<span class='pattern-tag {tag_cls}'>{label} ({count}건)</span> "
-            st.markdown(tags_html, unsafe_allow_html=True)
-
-            # 감지 키워드 상세
-            with st.expander("감지된 키워드 상세"):
-                for cat, keywords in summary["detected_keywords"].items():
-                    label = PHISHING_PATTERNS[cat]["label"]
-                    st.markdown(f"**{label}**: {', '.join(keywords)}")
-        else:
+
+def risk_dashboard(summary: dict):
+    """위험도 미터·감지 패턴·공식 절차 근거·긴급 신고"""
+    risk = summary["risk_level"]
+
+    # 위험도 미터
+    color_map = {
+        "critical": "#EF4444",
+        "high": "#F59E0B",
+        "caution": "#EAB308",
+        "safe": "#22C55E",
+    }
+    bar_color = color_map.get(risk["level"], "#22C55E")
+
+    st.markdown(
+        f"<div class='risk-meter'>"
+        f"<div style='font-size:0.8rem; color:#64748B; font-weight:600; letter-spacing:1px;'>실시간 위험도</div>"
+        f"<div class='risk-score' style='color:{bar_color};'>{summary['risk_score']}%</div>"
+        f"<div class='risk-bar-container'>"
+        f"<div class='risk-bar' style='width:{summary['risk_score']}%; background:{bar_color};'></div>"
+        f"</div>"
+        f"<div class='risk-label' style='color:{bar_color};'>{risk['emoji']} {risk['label']}</div>"
+        f"<div class='risk-action'>{risk['action']}</div>"
+        f"</div>",
+        unsafe_allow_html=True,
+    )
+    if summary["caller_prior"]:
+        caller_info = summary["caller_info"]
+        st.caption(
+            f"📱 발신 번호 {summary['caller']} ({caller_info['category']}) "
+            f"평판 반영: 시작 위험도 {summary['caller_prior']}%"
+        )
+
+    # 감지된 패턴 태그
+    st.markdown("#### 🔎 감지된 패턴")
+    if summary["detected_categories"]:
+        tag_class_map = {
+            "기관사칭": "tag-institution",
+            "공포유발": "tag-fear",
+            "금전요구": "tag-money",
+            "개인정보탈취": "tag-privacy",
+            "앱설치유도": "tag-app",
+        }
+        # 세션이 사용 중인 패턴 세트 기준 (패턴 팩 교체 후에도 일관된 라벨)
+        phishing_patterns = st.session_state.detector.patterns.phishing_patterns
+        tags_html = ""
+        for cat in summary["detected_categories"]:
+            tag_cls = tag_class_map.get(cat, "tag-institution")
+            label = phishing_patterns[cat]["label"]
+            count = len(summary["detected_keywords"].get(cat, []))
+            tags_html += f"<span class='pattern-tag {tag_cls}'>{label} ({count}건)</span> "
+        st.markdown(tags_html, unsafe_allow_html=True)
+
+        # 감지 키워드 상세
+        with st.expander("감지된 키워드 상세"):
+            for cat, keywords in summary["detected_keywords"].items():
+                label = phishing_patterns[cat]["label"]
+                st.markdown(f"**{label}**: {', '.join(keywords)}")
+    else:
+        st.markdown(
+            "<div style='color:#64748B; font-size:0.9rem; padding:1rem 0;'>"
+            "감지된 패턴이 없습니다.</div>",
+            unsafe_allow_html=True,
+        )
+
+    # 공식 절차 근거 목록
+    st.markdown("#### 📋 공식 절차 근거")
+    if summary["official_procedures"]:
+        for proc in summary["official_procedures"]:
             st.markdown(
-                "<div style='color:#64748B; font-size:0.9rem; padding:1rem 0;'>"
-                "감지된 패턴이 없습니다.</div>",
+                f"<div class='procedure-card'>{proc}</div>",
                 unsafe_allow_html=True,
             )
+    else:
+        st.markdown(
+            "<div style='color:#64748B; font-size:0.9rem; padding:1rem 0;'>"
+            "해당되는 공식 절차 근거가 없습니다.</div>",
+            unsafe_allow_html=True,
+        )
 
-        # 공식 절차 근거 목록
-        st.markdown("#### 📋 공식 절차 근거")
-        if summary["official_procedures"]:
-            for proc in summary["official_procedures"]:
-                st.markdown(
-                    f"<div class='procedure-card'>{proc}</div>",
-                    unsafe_allow_html=True,
-                )
-        else:
+    # 신고 버튼
+    if summary["risk_score"] >= 50:
+        st.markdown("<hr class='divider'>", unsafe_allow_html=True)
+        st.markdown("#### 🚔 긴급 신고")
+        c1, c2 = st.columns(2)
+        with c1:
             st.markdown(
-                "<div style='color:#64748B; font-size:0.9rem; padding:1rem 0;'>"
-                "해당되는 공식 절차 근거가 없습니다.</div>",
+                "<div style='background:rgba(239,68,68,0.15); border:1px solid rgba(239,68,68,0.3); "
+                "border-radius:10px; padding:1rem; text-align:center;'>"
+                "<div style='font-size:1.5rem;'>🚨</div>"
+                "<div style='color:#FCA5A5; font-weight:700;'>경찰 112</div>"
+                "<div style='color:#94A3B8; font-size:0.75rem;'>보이스피싱 신고</div>"
+                "</div>",
+                unsafe_allow_html=True,
+            )
+        with c2:
+            st.markdown(
+                "<div style='background:rgba(59,130,246,0.15); border:1px solid rgba(59,130,246,0.3); "
+                "border-radius:10px; padding:1rem; text-align:center;'>"
+                "<div style='font-size:1.5rem;'>📞</div>"
+                "<div style='color:#93C5FD; font-weight:700;'>금감원 1332</div>"
+                "<div style='color:#94A3B8; font-size:0.75rem;'>피해 상담·신고</div>"
+                "</div>",
                 unsafe_allow_html=True,
             )
 
-        # 신고 버튼
-        if summary["risk_score"] >= 50:
-            st.markdown("<hr class='divider'>", unsafe_allow_html=True)
-            st.markdown("#### 🚔 긴급 신고")
-            c1, c2 = st.columns(2)
-            with c1:
-                st.markdown(
-                    "<div style='background:rgba(239,68,68,0.15); border:1px solid rgba(239,68,68,0.3); "
-                    "border-radius:10px; padding:1rem; text-align:center;'>"
-                    "<div style='font-size:1.5rem;'>🚨</div>"
-                    "<div style='color:#FCA5A5; font-weight:700;'>경찰 112</div>"
-                    "<div style='color:#94A3B8; font-size:0.75rem;'>보이스피싱 신고</div>"
-                    "</div>",
-                    unsafe_allow_html=True,
-                )
-            with c2:
-                st.markdown(
-                    "<div style='background:rgba(59,130,246,0.15); border:1px solid rgba(59,130,246,0.3); "
-                    "border-radius:10px; padding:1rem; text-align:center;'>"
-                    "<div style='font-size:1.5rem;'>📞</div>"
-                    "<div style='color:#93C5FD; font-weight:700;'>금감원 1332</div>"
-                    "<div style='color:#94A3B8; font-size:0.75rem;'>피해 상담·신고</div>"
-                    "</div>",
-                    unsafe_allow_html=True,
-                )
+
+@st.fragment
+def live_call():
+    col_chat, col_analysis = st.columns([3, 2])
+
+    # --- 왼쪽: 대화 영역 ---
+    with col_chat:
+        st.markdown("#### 💬 통화 내용")
+        input_pane()
+        # 입력 콜백이 먼저 실행되므로 여기서 조회한 요약에는 방금 분석한 발화가 반영됨
+        summary = st.session_state.detector.get_summary()
+        conversation_pane(summary)
+
+    # --- 오른쪽: 분석 대시보드 ---
+    with col_analysis:
+        risk_dashboard(summary)
+
+
+if mode == "📞 실시간 통화 분석":
+    live_call()
 
 
 # ============================================================
@@ -556,14 +388,21 @@ elif mode == "🔍 번호 조회":
     if search_btn and phone_input.strip():
         result = st.session_state.detector.check_number(phone_input.strip())
         if result:
+            # 개별 번호가 아닌 번호 대역으로 신고된 경우 대역 표시
+            block_html = (
+                f"<b>신고 대역:</b> {result['range']}<br>"
+                if result.get("match") == "block" else ""
+            )
             st.markdown(
                 f"<div class='number-result number-danger'>"
                 f"<div style='font-size:1.5rem; margin-bottom:0.5rem;'>⚠️ 위험 번호</div>"
                 f"<div style='color:#FCA5A5; font-size:1.1rem; font-weight:700;'>{phone_input}</div>"
                 f"<div style='margin-top:0.8rem; color:#E2E8F0;'>"
+                f"{block_html}"
                 f"<b>분류:</b> {result['category']}<br>"
                 f"<b>신고 건수:</b> {result['reports']}건<br>"
-                f"<b>최근 신고:</b> {result['last_report']}"
+                f"<b>최근 신고:</b> {result['last_report']}<br>"
+                f"<b>평판 점수:</b> {result['reputation']}/100 (최근 신고일수록 높음)"
                 f"</div>"
                 f"<div style='margin-top:1rem; color:#FCA5A5; font-weight:600;'>"
                 f"💡 이 번호의 전화를 받지 않는 것을 권장합니다.</div>"
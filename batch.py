@@ -0,0 +1,130 @@
+"""
+CallShield 배치 채점
+- 통화 녹취 JSONL({"call_id": ..., "utterances": [...]})을 스트림으로 읽어 채점
+- 프로세스 풀 + 청크 단위 파이프라인 (진행 중인 청크 수 제한으로 메모리 상한 유지)
+- 턴별·통화별 결과를 JSONL 스트림으로 출력
+
+사용법:
+    python batch.py calls.jsonl -o scores.jsonl --workers 8
+    cat calls.jsonl | python batch.py - --no-turns
+"""
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from detector import CallShieldDetector
+
+
+def score_call(call_id, utterances, include_turns: bool = True, fuzzy: bool = False) -> list[dict]:
+    """통화 하나를 처음부터 재생하여 턴별 결과와 통화 요약을 반환
+
+    근사 매칭(fuzzy)으로 감지된 키워드는 new_keywords 항목에 신뢰도가 세 번째 값으로 붙습니다.
+    """
+    detector = CallShieldDetector(keep_conversation=False, fuzzy=fuzzy)
+    records = []
+    for turn, message in enumerate(utterances):
+        result = detector.analyze_message(message, delta_only=True)
+        if include_turns:
+            records.append({
+                "type": "turn",
+                "call_id": call_id,
+                "turn": turn,
+                "risk_score": result["risk_score"],
+                "risk_level": result["risk_level"]["level"],
+                "new_keywords": [
+                    [det["category"], det["keyword"]]
+                    + ([det["confidence"]] if "confidence" in det else [])
+                    for det in result["new_detections"]
+                ],
+                "new_procedures": result["new_procedures"],
+            })
+    summary = detector.get_summary()
+    records.append({
+        "type": "call",
+        "call_id": call_id,
+        "turns": summary["conversation_length"],
+        "risk_score": summary["risk_score"],
+        "risk_level": summary["risk_level"]["level"],
+        "detected_keywords": summary["detected_keywords"],
+        "official_procedures": summary["official_procedures"],
+    })
+    return records
+
+
+def _score_chunk(chunk: list[tuple[int, str]], include_turns: bool, fuzzy: bool = False) -> str:
+    """워커 프로세스: (줄 번호, 원본 줄) 묶음을 채점하여 출력 JSONL 문자열로 반환"""
+    out = []
+    for line_no, line in chunk:
+        try:
+            call = json.loads(line)
+            records = score_call(call["call_id"], call["utterances"], include_turns, fuzzy)
+        except (ValueError, KeyError, TypeError) as e:
+            records = [{"type": "error", "line": line_no, "error": f"{type(e).__name__}: {e}"}]
+        for record in records:
+            out.append(json.dumps(record, ensure_ascii=False))
+    return "\n".join(out) + "\n" if out else ""
+
+
+def _chunks(lines, chunk_size: int):
+    """빈 줄을 건너뛰며 (줄 번호, 줄) 묶음을 chunk_size개씩 생성"""
+    numbered = ((no, line) for no, line in enumerate(lines, 1) if line.strip())
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def score_lines(lines, workers: int | None = None, chunk_size: int = 256,
+                include_turns: bool = True, fuzzy: bool = False):
+    """JSONL 줄 iterable을 병렬 채점하여 출력 문자열 조각을 입력 순서대로 생성
+
+    동시에 처리 중인 청크는 workers * 2개로 제한되므로 입력 전체를 메모리에 올리지 않습니다.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * 2
+    chunks = _chunks(lines, chunk_size)
+
+    if workers == 1:
+        for chunk in chunks:
+            yield _score_chunk(chunk, include_turns, fuzzy)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_score_chunk, chunk, include_turns, fuzzy))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        for future in pending:
+            yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CallShield 통화 녹취 배치 채점")
+    parser.add_argument("input", help="입력 JSONL 경로 ('-'이면 표준 입력)")
+    parser.add_argument("-o", "--output", default="-", help="출력 JSONL 경로 (기본: 표준 출력)")
+    parser.add_argument("--workers", type=int, default=None, help="워커 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="워커에 한 번에 넘기는 통화 수")
+    parser.add_argument("--no-turns", action="store_true", help="턴별 결과를 생략하고 통화 요약만 출력")
+    parser.add_argument("--fuzzy", action="store_true", help="음성 인식 오류 근사 매칭 사용")
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for block in score_lines(src, args.workers, args.chunk_size, not args.no_turns, args.fuzzy):
+            dst.write(block)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+CallShield 탐지 엔진 마이크로 벤치마크
+- analyze_message 처리량 (짧은·긴·키워드 밀집 발화, 근사 매칭 사용 시)
+- 통화 단위 지연 (10/100/1000턴 대화)
+- replay 처리량 (저장된 통화의 턴별 위험도 궤적, 통화당)
+- check_number 조회 (1천/100만/1000만 번호 mmap 인덱스)
+- 세션당 메모리
+- 합성 대화는 DEMO_SCENARIOS와 패턴 테이블에서 항목별 고정 시드로 생성
+  (항목이 추가·재배치되어도 기존 항목의 데이터는 그대로이므로 버전 간 비교 가능)
+
+사용법:
+    python bench.py run -o bench.json                 # 전체 실행 (1000만 인덱스 생성 포함)
+    python bench.py run -o bench.json --quick         # 빠른 실행 (작은 인덱스, 적은 반복)
+    python bench.py compare base.json bench.json --threshold 0.10   # 10% 이상 느려지면 실패
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from detector import DEMO_SCENARIOS, OFFICIAL_PROCEDURES, PHISHING_PATTERNS, CallShieldDetector
+from patterns import MATCH_CACHE_SIZE, configure_match_cache
+from replay import replay_calls
+from spam_index import SpamIndex, build_index
+
+SEED = 20250208
+DEFAULT_CACHE_DIR = ".bench_cache"
+_FILLER = [
+    "네", "잠시만요", "그게 무슨 말씀이신가요", "확인해 보겠습니다",
+    "지금 회사라서요", "다시 한 번 말씀해 주시겠어요", "알겠습니다",
+]
+
+
+# ============================================================
+# 1. 합성 데이터
+# ============================================================
+def _scenario_lines() -> list[str]:
+    return [line for lines in DEMO_SCENARIOS.values() for line in lines]
+
+
+def make_messages(kind: str, count: int, rng: random.Random) -> list[str]:
+    """short: 시나리오 한 문장 / long: 시나리오·일상 문장 10여 개 / dense: 키워드만 나열"""
+    lines = _scenario_lines()
+    keywords = [k for info in PHISHING_PATTERNS.values() for k in info["keywords"]]
+    keywords += list(OFFICIAL_PROCEDURES)
+    messages = []
+    for _ in range(count):
+        if kind == "short":
+            messages.append(rng.choice(lines))
+        elif kind == "long":
+            parts = [rng.choice(lines if rng.random() < 0.5 else _FILLER) for _ in range(12)]
+            messages.append(" ".join(parts))
+        elif kind == "dense":
+            messages.append(" ".join(rng.sample(keywords, 20)))
+        else:
+            raise ValueError(kind)
+    return messages
+
+
+def make_call(turns: int, rng: random.Random) -> list[str]:
+    """시나리오 하나를 골라 일상 발화를 섞어 turns턴 대화로 늘림"""
+    scenario = rng.choice(list(DEMO_SCENARIOS.values()))
+    call = []
+    while len(call) < turns:
+        call.append(scenario[len(call) % len(scenario)] if rng.random() < 0.3 else rng.choice(_FILLER))
+    return call
+
+
+def _random_number(rng: random.Random) -> str:
+    prefix = rng.choice(["010", "02", "031", "070"])
+    return f"{prefix}-{rng.randrange(1000, 10000)}-{rng.randrange(10000):04d}"
+
+
+def make_spam_index(size: int, cache_dir: str) -> str:
+    """size개 번호의 인덱스 파일 생성 (같은 크기·시드면 캐시 재사용)"""
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, f"spam_{size}_{SEED}.idx")
+    if os.path.exists(index_path):
+        return index_path
+    rng = random.Random(SEED + size)
+    csv_path = index_path + ".csv"
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["number", "category", "reports", "last_report"])
+        for _ in range(size):
+            writer.writerow([
+                _random_number(rng), rng.choice(["대출 광고", "피싱 신고", "스팸 광고"]),
+                rng.randrange(1, 500), f"2025-0{rng.randint(1, 9)}-{rng.randint(1, 28):02d}",
+            ])
+    build_index(csv_path, index_path)
+    os.remove(csv_path)
+    return index_path
+
+
+# ============================================================
+# 2. 측정
+# ============================================================
+def _time_per_op(fn, ops: int, repeat: int) -> float:
+    """fn()을 repeat번 실행해 가장 빠른 회차의 연산당 나노초"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        fn()
+        best = min(best, time.perf_counter_ns() - start)
+    return best / ops
+
+
+def bench_analyze(kind: str, count: int, repeat: int, rng: random.Random,
+                  fuzzy: bool = False) -> float:
+    messages = make_messages(kind, count, rng)
+
+    def run():
+        d = CallShieldDetector(keep_conversation=False, fuzzy=fuzzy)
+        for message in messages:
+            d.analyze_message(message, delta_only=True)
+
+    return _time_per_op(run, count, repeat)
+
+
+def bench_call(turns: int, calls: int, repeat: int, rng: random.Random) -> float:
+    transcripts = [make_call(turns, rng) for _ in range(calls)]
+
+    def run():
+        for transcript in transcripts:
+            d = CallShieldDetector(keep_conversation=False)
+            for message in transcript:
+                d.analyze_message(message, delta_only=True)
+            d.get_summary()
+
+    return _time_per_op(run, calls, repeat)
+
+
+def bench_replay(turns: int, calls: int, repeat: int, rng: random.Random) -> float:
+    transcripts = [(call_id, make_call(turns, rng)) for call_id in range(calls)]
+    return _time_per_op(lambda: list(replay_calls(transcripts)), calls, repeat)
+
+
+def bench_check_number(size: int, lookups: int, repeat: int, cache_dir: str,
+                       rng: random.Random) -> float:
+    index = SpamIndex(make_spam_index(size, cache_dir))
+    numbers = [_random_number(rng) for _ in range(lookups)]
+    try:
+        return _time_per_op(lambda: [index.lookup(n) for n in numbers], lookups, repeat)
+    finally:
+        index.close()
+
+
+def bench_session_memory(sessions: int, rng: random.Random) -> float:
+    """수신 중인 세션 하나당 바이트 (사기 통화 10턴 분석 후)"""
+    transcript = make_call(10, rng)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    live = []
+    for _ in range(sessions):
+        d = CallShieldDetector(keep_conversation=False)
+        for message in transcript:
+            d.analyze_message(message, delta_only=True)
+        live.append(d)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename")) / sessions
+
+
+def _rng(name: str) -> random.Random:
+    """항목별 난수 생성기 (항목 이름으로 시드를 나눠 다른 항목의 추가·순서와 무관)"""
+    return random.Random(f"{SEED}:{name}")
+
+
+def run_suite(quick: bool = False, spam_sizes=None, cache_dir: str = DEFAULT_CACHE_DIR) -> dict:
+    repeat = 3 if quick else 7
+    scale = 10 if quick else 1
+    if spam_sizes is None:
+        spam_sizes = [1000, 100_000] if quick else [1000, 1_000_000, 10_000_000]
+
+    results = {}
+
+    def record(name, value, unit):
+        results[name] = {"value": round(value, 2), "unit": unit, "better": "lower"}
+        print(f"  {name:<32} {value:>14,.1f} {unit}", file=sys.stderr)
+
+    # 합성 문장은 반복 측정 중 계속 재사용되므로 매칭 캐시는 끄고 엔진 자체를 측정
+    configure_match_cache(0)
+    for kind in ("short", "long", "dense"):
+        name = f"analyze_message.{kind}"
+        record(name, bench_analyze(kind, 20000 // scale, repeat, _rng(name)), "ns/op")
+    name = "analyze_message.long_fuzzy"
+    record(name, bench_analyze("long", 20000 // scale, repeat, _rng(name), fuzzy=True), "ns/op")
+    # 대본 문장 반복 (매칭 캐시 적중)
+    configure_match_cache(MATCH_CACHE_SIZE)
+    name = "analyze_message.short_cached"
+    record(name, bench_analyze("short", 20000 // scale, repeat, _rng(name)), "ns/op")
+    configure_match_cache(0)
+    for turns, calls in ((10, 2000), (100, 200), (1000, 20)):
+        name = f"call_latency.{turns}_turns"
+        record(name, bench_call(turns, max(calls // scale, 2), repeat, _rng(name)), "ns/call")
+    name = "replay.20_turns"
+    record(name, bench_replay(20, 2000 // scale, repeat, _rng(name)), "ns/call")
+    for size in spam_sizes:
+        name = f"check_number.{size}"
+        record(name, bench_check_number(size, 20000 // scale, repeat, cache_dir, _rng(name)), "ns/op")
+    record("session_memory", bench_session_memory(2000 // scale, _rng("session_memory")), "bytes/session")
+    configure_match_cache(MATCH_CACHE_SIZE)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": SEED,
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+# ============================================================
+# 3. 비교 (회귀 판정)
+# ============================================================
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """threshold(비율) 이상 나빠진 항목의 설명 목록을 반환"""
+    regressions = []
+    for name, base in baseline["results"].items():
+        cur = current["results"].get(name)
+        if cur is None or not base["value"]:
+            continue
+        change = (cur["value"] - base["value"]) / base["value"]
+        if base.get("better", "lower") == "higher":
+            change = -change
+        status = "REGRESSION" if change > threshold else "ok"
+        print(f"  {name:<32} {base['value']:>14,.1f} → {cur['value']:>14,.1f} "
+              f"{cur['unit']:<14} {change:+7.1%}  {status}", file=sys.stderr)
+        if change > threshold:
+            regressions.append(f"{name}: {change:+.1%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CallShield 엔진 벤치마크")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="벤치마크 실행")
+    run.add_argument("-o", "--output", default="-", help="결과 JSON 경로 (기본: 표준 출력)")
+    run.add_argument("--quick", action="store_true", help="작은 데이터·적은 반복으로 빠르게 실행")
+    run.add_argument("--spam-sizes", default=None, help="check_number 인덱스 크기 (쉼표 구분)")
+    run.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="생성한 인덱스 파일 캐시 경로")
+
+    cmp = sub.add_parser("compare", help="두 결과 비교 (회귀 시 종료 코드 1)")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=0.10, help="허용 악화 비율 (기본 0.10)")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        sizes = [int(s) for s in args.spam_sizes.split(",")] if args.spam_sizes else None
+        report = run_suite(args.quick, sizes, args.cache_dir)
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if args.output == "-":
+            print(text)
+        else:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"성능 회귀 {len(regressions)}건: " + ", ".join(regressions), file=sys.stderr)
+        return 1
+    print("성능 회귀 없음", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""
+CallShield 피싱 대본 캠페인 군집화 (MinHash + LSH, 스트리밍)
+- 같은 대본을 조금씩 고쳐 쓰는 통화들을 발화가 들어오는 대로 같은 캠페인으로 묶음
+- 통화 녹취(정규화 텍스트)의 글자 shingle을 one-permutation MinHash로 스케치
+  (shingle 하나당 해시 한 번, 빈 칸은 회전 채우기), 서명을 밴드로 나눠 LSH 버킷에 등록
+- 통화는 shingle이 충분히 쌓인 턴부터 버킷 조회 → 추정 유사도가 기준 이상인 캠페인에 배정,
+  없으면 새 캠페인을 만듦 (배정은 통화가 끝날 때까지 유지)
+- 소속 통화가 발화 내용만으로 critical에 도달한 캠페인은 피싱 캠페인으로 표시되고,
+  이후 그 캠페인에 배정되는 통화에는 위험도 가산점(boost)을 줌
+- 버킷·캠페인·진행 중 통화 표는 모두 항목 수 상한 LRU이므로 메모리가 일정 이하로 유지됨
+  (버킷 항목당 약 300바이트로 기본 상한이면 약 80MB, 조회는 밴드 수만큼의 딕셔너리 조회 + 후보 서명 비교)
+- 한 스레드(분석 서버의 스케줄러 등)에서 사용하세요. 샤드 배포에서는 워커별로 따로 학습됩니다.
+
+사용법:
+    python campaigns.py calls.jsonl -o campaigns.jsonl --threshold 0.4
+    (입력 형식은 batch.py와 같음: {"call_id": ..., "utterances": [...]})
+"""
+import argparse
+import json
+import sys
+from array import array
+from collections import Counter, OrderedDict
+from operator import eq
+from zlib import crc32
+
+from normalize import normalize_text
+
+SHINGLE = 3             # shingle 길이 (정규화 텍스트의 글자 수)
+BIN_BITS = 6
+NUM_BINS = 1 << BIN_BITS  # MinHash 서명 길이
+BANDS = 21              # LSH 밴드 수 (밴드당 3칸, 추정 유사도 0.4인 통화도 약 75% 확률로 후보가 됨)
+ROWS = 3
+_EMPTY = 1 << 32        # 아직 shingle이 들어오지 않은 칸
+_ROTATION = 1 << (32 - BIN_BITS)  # 회전 채우기에서 거리 1칸마다 더하는 값 (칸 값의 범위 밖)
+
+VARIANT_SIMILARITY = 0.8  # 배정된 통화의 유사도가 이보다 낮으면 대본 변형으로 보고 서명을 추가 등록
+PHISHING_SCORE = 80     # 소속 통화의 발화 내용 위험도가 이 이상이면 캠페인에 피싱 신고 1건
+CAMPAIGN_BOOST = 30     # 피싱 캠페인에 배정된 통화의 위험도 가산점
+
+
+# ============================================================
+# 1. 스케치 (one-permutation MinHash)
+# ============================================================
+def sketch_text(bins: array, text: str) -> int:
+    """정규화 텍스트의 shingle을 칸별 최솟값에 반영하고 shingle 수를 반환"""
+    mask = NUM_BINS - 1
+    count = len(text) - SHINGLE + 1
+    for i in range(count):
+        h = crc32(text[i:i + SHINGLE].encode("utf-8"))
+        value = h >> BIN_BITS
+        if value < bins[h & mask]:
+            bins[h & mask] = value
+    return max(count, 0)
+
+
+def signature(bins: array) -> array | None:
+    """빈 칸을 오른쪽(순환)의 가장 가까운 칸 값으로 채운 서명 (모두 비었으면 None)"""
+    if _EMPTY not in bins:
+        return array("Q", bins)
+    sig = array("Q", bins)
+    for i in range(NUM_BINS):
+        if bins[i] != _EMPTY:
+            continue
+        for distance in range(1, NUM_BINS):
+            value = bins[(i + distance) % NUM_BINS]
+            if value != _EMPTY:
+                sig[i] = value + distance * _ROTATION
+                break
+        else:
+            return None
+    return sig
+
+
+def similarity(a: array, b: array) -> float:
+    """두 서명의 추정 Jaccard 유사도 (같은 칸의 비율)"""
+    return sum(map(eq, a, b)) / NUM_BINS
+
+
+def band_keys(sig: array) -> list:
+    return [hash((band,) + tuple(sig[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+# ============================================================
+# 2. 캠페인 색인
+# ============================================================
+class _Call:
+    __slots__ = ("bins", "tail", "shingles", "turns", "campaign", "similarity", "founder", "critical")
+
+    def __init__(self):
+        self.bins = array("Q", [_EMPTY]) * NUM_BINS
+        self.tail = ""          # 직전 발화의 마지막 SHINGLE-1글자 (발화 경계를 넘는 shingle용)
+        self.shingles = 0
+        self.turns = 0
+        self.campaign = None    # 배정된 캠페인 ID
+        self.similarity = 0.0
+        self.founder = False    # 이 통화가 캠페인을 만들었는지
+        self.critical = False   # 발화 내용만으로 critical에 도달했는지
+
+
+class _Campaign:
+    __slots__ = ("id", "calls", "reports")
+
+    def __init__(self, campaign_id: int):
+        self.id = campaign_id
+        self.calls = 0          # 배정된 통화 수
+        self.reports = 0        # critical에 도달한 소속 통화 수
+
+
+class CampaignIndex:
+    """진행 중인 통화를 캠페인에 배정하는 스트리밍 색인
+
+    observe(call_id, text)를 발화마다 호출하면 배정된 캠페인 정보를 반환하고,
+    분석 후 report(call_id, content_score)로 발화 내용 위험도를 알려 주면 캠페인의
+    피싱 여부가 갱신됩니다. 통화가 끝나면 end(call_id)로 스케치를 정리하세요.
+    """
+
+    def __init__(self, threshold: float = 0.4, min_shingles: int = 24, index_turns: int = 4,
+                 max_buckets: int = 262144, max_campaigns: int = 65536, max_calls: int = 100000,
+                 phishing_reports: int = 1, boost: int = CAMPAIGN_BOOST):
+        self.threshold = threshold          # 같은 캠페인으로 볼 최소 추정 유사도
+        self.min_shingles = min_shingles    # 조회를 시작할 최소 shingle 수
+        self.index_turns = index_turns      # 새 캠페인의 서명을 버킷에 등록하는 턴 수
+        self.max_buckets = max_buckets
+        self.max_campaigns = max_campaigns
+        self.max_calls = max_calls
+        self.phishing_reports = phishing_reports  # 피싱 캠페인으로 표시할 신고 수
+        self.boost = boost
+        self.assigned = 0                   # 기존 캠페인에 배정된 통화 수
+        self._buckets = OrderedDict()       # 밴드 키 → (캠페인 ID, 등록한 서명)
+        self._campaigns = OrderedDict()     # 캠페인 ID → _Campaign
+        self._calls = OrderedDict()         # 통화 ID → _Call
+        self._next_id = 1
+
+    def observe(self, call_id: str, text: str) -> dict | None:
+        """발화 하나를 통화 스케치에 반영하고 배정된 캠페인 정보를 반환 (아직 없으면 None)"""
+        call = self._calls.get(call_id)
+        if call is None:
+            call = self._calls[call_id] = _Call()
+            if len(self._calls) > self.max_calls:
+                self._calls.popitem(last=False)
+        else:
+            self._calls.move_to_end(call_id)
+        text = call.tail + normalize_text(text)
+        call.shingles += sketch_text(call.bins, text)
+        call.tail = text[-(SHINGLE - 1):]
+        call.turns += 1
+        if call.shingles < self.min_shingles:
+            return None
+
+        if call.campaign is None:
+            sig = signature(call.bins)
+            campaign, score = self._query(sig)
+            if campaign is None:
+                campaign = self._new_campaign()
+                call.founder = True
+                score = 1.0
+            else:
+                self.assigned += 1
+            call.campaign = campaign.id
+            call.similarity = score
+            campaign.calls += 1
+            if call.critical:
+                campaign.reports += 1
+            if call.founder or score < VARIANT_SIMILARITY:
+                # 새 캠페인이거나 대본을 고친 변형이면 이 서명도 등록해 다음 통화가 찾을 수 있게 함
+                self._index(sig, campaign.id)
+        else:
+            campaign = self._campaigns.get(call.campaign)
+            if campaign is None:
+                return None  # 오래 쓰이지 않아 정리된 캠페인
+            self._campaigns.move_to_end(campaign.id)
+            if call.founder and call.turns <= self.index_turns:
+                # 캠페인을 만든 통화는 처음 몇 턴의 서명을 모두 등록 (진행 단계가 다른 통화도 찾도록)
+                self._index(signature(call.bins), campaign.id)
+        return self._info(campaign, call.similarity)
+
+    def report(self, call_id: str, content_score: int):
+        """분석 후 통화의 발화 내용 위험도(사전 점수 제외)를 알림"""
+        call = self._calls.get(call_id)
+        if call is None or call.critical or content_score < PHISHING_SCORE:
+            return
+        call.critical = True
+        if call.campaign is not None:
+            campaign = self._campaigns.get(call.campaign)
+            if campaign is not None:
+                campaign.reports += 1
+
+    def end(self, call_id: str):
+        """통화 종료: 스케치 정리 (캠페인과 등록된 서명은 유지)"""
+        self._calls.pop(call_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "calls": len(self._calls),
+            "campaigns": len(self._campaigns),
+            "phishing_campaigns": sum(
+                c.reports >= self.phishing_reports for c in self._campaigns.values()
+            ),
+            "buckets": len(self._buckets),
+            "assigned": self.assigned,
+        }
+
+    def _info(self, campaign: _Campaign, score: float) -> dict:
+        phishing = campaign.reports >= self.phishing_reports
+        return {
+            "campaign": campaign.id,
+            "calls": campaign.calls,
+            "phishing": phishing,
+            "boost": self.boost if phishing else 0,
+            "similarity": round(score, 3),
+        }
+
+    def _query(self, sig: array) -> tuple[_Campaign | None, float]:
+        """서명과 밴드가 하나 이상 같은 등록 서명 중 가장 비슷한 캠페인"""
+        votes = Counter()
+        candidates = {}
+        for key in band_keys(sig):
+            entry = self._buckets.get(key)
+            if entry is not None and entry[0] in self._campaigns:
+                self._buckets.move_to_end(key)
+                votes[id(entry[1])] += 1
+                candidates[id(entry[1])] = entry
+        best, best_score = None, self.threshold
+        for ref, _ in votes.most_common():
+            campaign_id, other = candidates[ref]
+            score = similarity(sig, other)
+            if score >= best_score:
+                best, best_score = campaign_id, score
+        if best is None:
+            return None, 0.0
+        self._campaigns.move_to_end(best)
+        return self._campaigns[best], best_score
+
+    def _index(self, sig: array, campaign_id: int):
+        entry = (campaign_id, sig)
+        for key in band_keys(sig):
+            self._buckets[key] = entry
+            self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+
+    def _new_campaign(self) -> _Campaign:
+        campaign = _Campaign(self._next_id)
+        self._next_id += 1
+        self._campaigns[campaign.id] = campaign
+        if len(self._campaigns) > self.max_campaigns:
+            self._campaigns.popitem(last=False)  # 버킷에 남은 항목은 조회할 때 건너뜀
+        return campaign
+
+
+# ============================================================
+# 3. CLI (저장된 통화를 도착 순서대로 재생)
+# ============================================================
+def _parse_call(line: str) -> tuple:
+    """입력 한 줄 → (call_id, 발화 목록) (인덱스에 반영하기 전에 형식을 모두 확인)"""
+    call = json.loads(line)
+    call_id, utterances = call["call_id"], call["utterances"]
+    if not isinstance(call_id, (str, int)):
+        raise TypeError("call_id는 문자열이나 정수여야 합니다")
+    if not isinstance(utterances, list) or not all(isinstance(message, str) for message in utterances):
+        raise TypeError("utterances는 문자열 목록이어야 합니다")
+    return call_id, utterances
+
+
+def main(argv=None):
+    from detector import CallShieldDetector
+
+    parser = argparse.ArgumentParser(description="CallShield 피싱 대본 캠페인 군집화")
+    parser.add_argument("input", help="입력 JSONL 경로 ('-'이면 표준 입력)")
+    parser.add_argument("-o", "--output", default="-", help="출력 JSONL 경로 (기본: 표준 출력)")
+    parser.add_argument("--threshold", type=float, default=0.4, help="같은 캠페인으로 볼 최소 유사도")
+    args = parser.parse_args(argv)
+
+    index = CampaignIndex(threshold=args.threshold)
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for line_no, line in enumerate(src, 1):
+            if not line.strip():
+                continue
+            try:
+                call_id, utterances = _parse_call(line)
+            except (ValueError, KeyError, TypeError) as e:
+                # batch.py와 같은 오류 레코드를 남기고 다음 통화로
+                error = {"type": "error", "line": line_no, "error": f"{type(e).__name__}: {e}"}
+                dst.write(json.dumps(error, ensure_ascii=False) + "\n")
+                continue
+            detector = CallShieldDetector(keep_conversation=False)
+            info, assigned_turn = None, None
+            for turn, message in enumerate(utterances):
+                info = index.observe(call_id, message)
+                if info is not None:
+                    if assigned_turn is None:
+                        assigned_turn = turn
+                    if info["boost"]:
+                        detector.set_campaign(info["campaign"], info["boost"])
+                detector.analyze_message(message, delta_only=True)
+                index.report(call_id, detector.content_score)
+            index.end(call_id)
+            record = {"call_id": call_id, "campaign": None, "risk_score": detector.risk_score}
+            if info is not None:
+                record.update(campaign=info["campaign"], assigned_turn=assigned_turn,
+                              similarity=info["similarity"], phishing=info["phishing"])
+            dst.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(json.dumps(index.stats()), file=sys.stderr)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,17 @@ CallShield 규칙 기반 보이스피싱 탐지 엔진
 - 기관별 공식 대응 절차 근거 제시
 - 대화 누적 기반 위험도 산출
 """
+import json
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from time import monotonic, perf_counter_ns
+
+import metrics
+from patterns import PatternOverlay, PatternSet, load_pack
+from spam_index import MemorySpamIndex, SpamIndex, lookup_key
+from spam_reports import ReportStore, add_reputation
 
 # ============================================================
 # 1. 피싱 패턴 정의 (5가지 카테고리)
@@ -144,92 +155,511 @@ SPAM_DB = {
     "010-9876-5432": {"category": "피싱 신고", "reports": 89, "last_report": "2025-02-08"},
     "02-555-1234": {"category": "투자 사기", "reports": 156, "last_report": "2025-02-05"},
     "070-1234-5678": {"category": "스팸 광고", "reports": 523, "last_report": "2025-02-07"},
+    "070-4567-XXXX": {"category": "불법 대출 대역", "reports": 1204, "last_report": "2025-02-08"},
 }
 
+# 번호 조회 인덱스: 기본은 SPAM_DB, mmap 인덱스 파일이 지정되면 그것으로 교체
+_spam_index = MemorySpamIndex(SPAM_DB)
+
+
+def load_spam_index(path: str) -> SpamIndex:
+    """spam_index.py로 생성한 인덱스 파일을 열어 check_number의 조회 대상으로 지정"""
+    global _spam_index
+    previous = _spam_index
+    _spam_index = SpamIndex(path)
+    previous.close()
+    _caller_cache.clear()
+    return _spam_index
+
+
+def load_report_store(directory: str) -> ReportStore:
+    """spam_reports.py 저장소(기본 인덱스 + 수집 중인 신고)를 check_number의 조회 대상으로 지정"""
+    global _spam_index
+    previous = _spam_index
+    _spam_index = ReportStore(directory)
+    previous.close()
+    _caller_cache.clear()
+    return _spam_index
+
+
+class CallerCache:
+    """발신 번호 조회 결과 캐시 (항목 수 상한 LRU + 유효 시간, 세션·스레드 공용)
+
+    같은 번호의 반복 수신은 저장소를 다시 조회하지 않습니다. 조회 결과가 없는 번호도
+    캐시하며, 유효 시간이 지나면 새 신고가 반영되도록 다시 조회합니다.
+    """
+
+    def __init__(self, maxsize: int = 65536, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # 번호 키 → (만료 시각, 평판이 붙은 조회 결과)
+        self._lock = threading.Lock()
+
+    def get(self, key: int, load):
+        """key의 조회 결과 (없거나 만료됐으면 load()로 조회해 저장)"""
+        now = monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        result = load()
+        if self.maxsize > 0:
+            with self._lock:
+                self._entries[key] = (now + self.ttl, result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> dict:
+        """캐시 통계: 적중·미스 횟수, 적중률, 현재·최대 항목 수, 유효 시간"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+        }
+
+
+# 발신 번호 평판이 세션 위험도의 시작값(사전 점수)으로 반영되는 비율(%): 평판 100이면 40점
+CALLER_PRIOR_WEIGHT = 40
+
+# 발신 번호 평판 캐시 (크기·유효 시간은 환경 변수 CALLSHIELD_CALLER_CACHE, CALLSHIELD_CALLER_TTL)
+_caller_cache = CallerCache(
+    int(os.environ.get("CALLSHIELD_CALLER_CACHE", "65536")),
+    float(os.environ.get("CALLSHIELD_CALLER_TTL", "300")),
+)
+
+
+def configure_caller_cache(maxsize: int, ttl: float):
+    """발신 번호 캐시 크기·유효 시간 변경 (기존 항목과 통계는 비워짐, 크기 0이면 캐시 사용 안 함)"""
+    global _caller_cache
+    _caller_cache = CallerCache(maxsize, ttl)
+
+
+def caller_cache_info() -> dict:
+    return _caller_cache.info()
+
+
+def lookup_caller(phone_number: str) -> dict | None:
+    """번호 DB 조회 + 평판 점수 (캐시 사용, 반환값은 캐시와 공유하므로 수정하지 마세요)"""
+    key = lookup_key(phone_number)
+    if key is None:
+        return None
+    return _caller_cache.get(key, lambda: add_reputation(_spam_index.lookup(phone_number)))
+
+
+def caller_reputation(result: dict | None) -> int:
+    """조회 결과의 평판 점수 (개별 번호와 번호 대역 중 높은 쪽, 결과가 없으면 0)"""
+    if result is None:
+        return 0
+    block = result.get("block")
+    return max(result["reputation"], block["reputation"] if block else 0)
+
+
+if os.environ.get("CALLSHIELD_SPAM_INDEX"):
+    load_spam_index(os.environ["CALLSHIELD_SPAM_INDEX"])
+elif os.environ.get("CALLSHIELD_SPAM_STORE"):
+    load_report_store(os.environ["CALLSHIELD_SPAM_STORE"])
+
+
+# ============================================================
+# 4. 컴파일된 패턴 (패턴 + 기관 키워드를 하나의 매칭기로)
+# ============================================================
+_BUILTIN_PATTERNS = PatternSet("builtin", PHISHING_PATTERNS, OFFICIAL_PROCEDURES)
+
+# 새 세션이 사용할 패턴 세트: 교체는 참조 한 번 대입이므로 원자적이며,
+# 이미 시작된 세션은 생성 시점의 세트를 끝까지 사용
+_active_patterns = _BUILTIN_PATTERNS
+
+
+def active_patterns() -> PatternSet:
+    return _active_patterns
+
+
+def activate_patterns(pattern_set: PatternSet) -> PatternSet:
+    """새 세션부터 pattern_set을 사용하도록 교체하고 이전 세트를 반환"""
+    global _active_patterns
+    previous, _active_patterns = _active_patterns, pattern_set
+    return previous
+
+
+def load_pattern_pack(path: str, cache_dir: str | None = None) -> PatternSet:
+    """patterns.py 형식의 패턴 팩을 로드(캐시 사용)해 새 세션부터 적용"""
+    pattern_set = load_pack(path, cache_dir)
+    activate_patterns(pattern_set)
+    return pattern_set
+
+
+if os.environ.get("CALLSHIELD_PATTERNS"):
+    load_pattern_pack(os.environ["CALLSHIELD_PATTERNS"])
+
+# 테넌트별 설정: 이름 → {"keywords": {...}, "weights": {...}, "disabled": [...]} (PatternOverlay 참고)
+_tenants = {}
+# 테넌트별 오버레이 (현재 활성 세트 기준으로 처음 쓸 때 만들고, 팩이 교체되면 다시 만듦)
+_tenant_overlays = {}
+
+
+def register_tenant(name: str, keywords: dict | None = None, weights: dict | None = None,
+                    disabled=()) -> PatternOverlay:
+    """테넌트 설정 등록 (잘못된 설정이면 ValueError). 이후 tenant=name 세션부터 적용"""
+    spec = {"keywords": keywords or {}, "weights": weights or {}, "disabled": list(disabled)}
+    overlay = PatternOverlay(_active_patterns, name, **spec)
+    _tenants[name] = spec
+    _tenant_overlays[name] = overlay
+    return overlay
+
+
+def tenant_patterns(name: str) -> PatternOverlay:
+    """테넌트의 패턴 세트 (등록되지 않은 테넌트면 KeyError)"""
+    overlay = _tenant_overlays.get(name)
+    if overlay is None or overlay.base is not _active_patterns:
+        overlay = PatternOverlay(_active_patterns, name, **_tenants[name])
+        _tenant_overlays[name] = overlay
+    return overlay
+
+
+def load_tenants(path: str) -> list:
+    """테넌트 설정 파일(JSON: {테넌트: {"keywords": ..., "weights": ..., "disabled": ...}}) 등록"""
+    with open(path, encoding="utf-8") as f:
+        tenants = json.load(f)
+    for name, spec in tenants.items():
+        register_tenant(name, spec.get("keywords"), spec.get("weights"), spec.get("disabled", ()))
+    return list(tenants)
+
+
+if os.environ.get("CALLSHIELD_TENANTS"):
+    load_tenants(os.environ["CALLSHIELD_TENANTS"])
+
+
+def _count_hits(pattern_set: PatternSet, keyword_ids):
+    """계측: 발화별 키워드·카테고리 매칭 횟수 (세션 내 중복 감지 포함)"""
+    for idx in keyword_ids:
+        category, keyword = pattern_set.keyword_table[idx]
+        metrics.KEYWORD_HITS.inc(category, keyword)
+        metrics.CATEGORY_HITS.inc(category)
+
+
+def scan_message(message: str) -> dict:
+    """현재 패턴 세트로 문장 내 모든 매칭을 위치와 함께 반환 (PatternSet.scan_message 참고)"""
+    return _active_patterns.scan_message(message)
+
 
 # ============================================================
-# 4. 탐지 엔진 클래스
+# 5. 탐지 엔진 클래스
 # ============================================================
 class CallShieldDetector:
-    def __init__(self):
-        self.conversation = []       # 전체 대화 기록
-        self.detected_patterns = {}  # 감지된 패턴: {카테고리: [매칭 키워드들]}
-        self.risk_score = 0          # 현재 위험도 (0~100)
+    """통화 한 건의 탐지 세션
+
+    감지 상태는 전역 ID 테이블의 정수 번호(비트셋 + 감지 순서 배열)로만 보관하고,
+    문자열 형태(detected_patterns, procedures, get_summary)는 필요할 때 만듭니다.
+    keep_conversation=False이면 발화 원문을 보관하지 않고 발화 수만 셉니다.
+    패턴 세트는 생성 시점에 활성화된 것을 세션이 끝날 때까지 사용합니다.
+    fuzzy=True이면 음성 인식 오류로 비슷한 음절이 된 키워드도 신뢰도와 함께 감지하며,
+    카테고리 기본 점수는 그 카테고리에서 감지된 가장 높은 신뢰도만큼 반영합니다.
+    tenant를 지정하면 활성 세트 위에 그 테넌트의 추가 키워드·가중치·꺼진 카테고리를 적용합니다.
+    caller(발신 번호)를 지정하면 번호 평판의 CALLER_PRIOR_WEIGHT%를 위험도 시작값으로 둡니다.
+    피싱 캠페인에 배정되면(campaigns.py, set_campaign) 캠페인 가산점도 위험도에 더합니다.
+    """
+
+    __slots__ = (
+        "conversation", "risk_score", "alerts", "version", "fuzzy", "tenant", "caller",
+        "caller_info", "campaign", "_caller_prior", "_campaign_boost", "_patterns", "_turns", "_raw_score", "_summary",
+        "_keyword_bits", "_keyword_order", "_category_counts", "_category_order",
+        "_category_confidence", "_procedure_bits", "_procedure_order",
+    )
+
+    def __init__(self, keep_conversation: bool = True, patterns: PatternSet | None = None,
+                 fuzzy: bool = False, tenant: str | None = None, caller: str | None = None):
+        if patterns is None:
+            patterns = tenant_patterns(tenant) if tenant is not None else _active_patterns
+        self._patterns = patterns
+        self.fuzzy = fuzzy           # 근사 매칭 사용 여부
+        self.tenant = tenant         # 테넌트 이름 (없으면 기본 설정)
+        self.caller = caller         # 발신 번호 (없으면 평판 반영 안 함)
+        self.caller_info = lookup_caller(caller) if caller else None  # 번호 조회 결과
+        self._caller_prior = caller_reputation(self.caller_info) * CALLER_PRIOR_WEIGHT // 100
+        self.campaign = None         # 배정된 피싱 캠페인 ID
+        self._campaign_boost = 0     # 캠페인 가산점
+        self.conversation = [] if keep_conversation else None  # 전체 대화 기록
+        self.risk_score = min(self._caller_prior, 100)  # 현재 위험도 (0~100)
         self.alerts = []             # 경고 메시지 기록
-        self.procedures = []         # 제시된 공식 절차 근거
+        self.version = 0             # 상태가 바뀔 때마다 증가 (요약 캐시 키)
+        self._turns = 0              # 발화 수
+        self._raw_score = self._caller_prior  # 상한(100) 적용 전 누적 점수 (발신 번호 사전 점수 포함)
+        self._summary = None         # (version, 요약) 메모
+        # 감지된 키워드·카테고리·절차 (비트셋은 중복 판정, 배열은 처음 감지된 순서)
+        self._keyword_bits = 0
+        self._keyword_order = array("H")
+        self._category_counts = array("H", bytes(2 * len(self._patterns.categories)))
+        self._category_order = array("H")
+        # 카테고리별 신뢰도(%): 정확 매칭이 하나라도 있으면 100
+        self._category_confidence = array("B", bytes(len(self._patterns.categories)))
+        self._procedure_bits = 0
+        self._procedure_order = array("H")
+        if metrics.ENABLED:
+            metrics.SESSIONS_CREATED.inc()
+
+    @property
+    def patterns(self) -> PatternSet:
+        """이 세션이 사용하는 패턴 세트"""
+        return self._patterns
+
+    @property
+    def detected_patterns(self) -> dict:
+        """감지된 패턴: {카테고리: [매칭 키워드들]} (감지 순서)"""
+        ps = self._patterns
+        patterns = {ps.categories[cid]: [] for cid in self._category_order}
+        for idx in self._keyword_order:
+            category, keyword = ps.keyword_table[idx]
+            patterns[category].append(keyword)
+        return patterns
+
+    @property
+    def procedures(self) -> list:
+        """제시된 공식 절차 근거 (제시 순서)"""
+        texts = self._patterns.procedure_texts
+        return [texts[pid] for pid in self._procedure_order]
+
+    @property
+    def procedure_keys(self) -> list:
+        """제시된 공식 절차의 고정 키 (제시 순서, patterns.procedure_key 참고)"""
+        keys = self._patterns.procedure_keys
+        return [keys[pid] for pid in self._procedure_order]
+
+    def localized_procedures(self, locale: str | None = None) -> list:
+        """제시된 공식 절차 근거를 locale 문장으로 (번역이 없는 문장은 원문)"""
+        ps = self._patterns
+        return [ps.procedure_text(pid, locale) for pid in self._procedure_order]
+
+    @property
+    def content_score(self) -> int:
+        """발화 내용만으로 계산한 위험도 (발신 번호 평판·캠페인 가산점 제외)"""
+        return min(self._raw_score - self._caller_prior - self._campaign_boost, 100)
+
+    def set_campaign(self, campaign_id: int, boost: int):
+        """피싱 캠페인 배정: 가산점이 지금보다 크면 그 차이만큼 위험도 갱신"""
+        self.campaign = campaign_id
+        if boost > self._campaign_boost:
+            self._raw_score += boost - self._campaign_boost
+            self._campaign_boost = boost
+            self.risk_score = min(self._raw_score, 100)
+            self.version += 1
 
     def check_number(self, phone_number: str) -> dict | None:
-        """1단계: 번호 DB 조회"""
-        return SPAM_DB.get(phone_number)
+        """1단계: 번호 DB 조회 (표기 정규화 후 개별 번호·번호 대역을 한 번에 조회)
+
+        결과에는 신고 건수와 최근 신고일로 계산한 시간 감쇠 평판 점수(reputation, 0~100)가 붙습니다.
+        """
+        result = lookup_caller(phone_number)
+        if result is None:
+            return None
+        result = dict(result)  # 캐시 항목과 분리
+        if "block" in result:
+            result["block"] = dict(result["block"])
+        return result
+
+    def analyze_message(self, message: str, delta_only: bool = False) -> dict:
+        """2단계: 대화 문장 분석 (핵심 기능)
+
+        delta_only=True이면 누적 합계(total_*)를 복사하지 않고 이번 발화의 변화분과
+        위험도만 반환합니다. 누적 상태는 get_summary()로 필요할 때만 조회하세요.
+        """
+        timed = metrics.ENABLED
+        if timed:
+            started = perf_counter_ns()
+        self._record_turn(message)
+
+        # 키워드·기관 키워드를 한 번에 매칭 (테이블 순서로 정렬됨)
+        keyword_ids, org_ids = self._patterns.match(message)
+        if timed:
+            metrics.STAGE_SECONDS.observe((perf_counter_ns() - started) / 1e9, "match")
+            metrics.MESSAGES.inc()
+            _count_hits(self._patterns, keyword_ids)
+        new_detections, new_procedures = self._apply_hits(keyword_ids, org_ids)
+        if self.fuzzy:
+            new_detections += self._apply_fuzzy(message)
 
-    def analyze_message(self, message: str) -> dict:
-        """2단계: 대화 문장 분석 (핵심 기능)"""
-        self.conversation.append(message)
-        msg_lower = message.lower()
+        # 결과 반환
+        if timed:
+            started = perf_counter_ns()
+        result = self._build_result(new_detections, new_procedures)
+        result["message"] = message
+        if not delta_only:
+            result["total_detected_patterns"] = self.detected_patterns
+            result["total_procedures"] = self.procedures
+        if timed:
+            metrics.STAGE_SECONDS.observe((perf_counter_ns() - started) / 1e9, "result")
+        return result
+
+    def _record_turn(self, message: str):
+        if self.conversation is not None:
+            self.conversation.append(message)
+        self._turns += 1
+        self.version += 1
 
+    def _apply_hits(self, keyword_ids, org_ids) -> tuple[list, list]:
+        """매칭된 인덱스를 세션 상태에 반영하고 (새 감지, 새 절차 근거)를 반환"""
+        ps = self._patterns
         new_detections = []
         new_procedures = []
+        timed = metrics.ENABLED
+        if timed:
+            started = perf_counter_ns()
 
-        # 각 패턴 카테고리별로 키워드 매칭
-        for category, pattern_info in PHISHING_PATTERNS.items():
-            for keyword in pattern_info["keywords"]:
-                if keyword in message:
-                    # 새로운 감지 기록
-                    if category not in self.detected_patterns:
-                        self.detected_patterns[category] = []
-                    if keyword not in self.detected_patterns[category]:
-                        self.detected_patterns[category].append(keyword)
-                        new_detections.append({
-                            "category": category,
-                            "keyword": keyword,
-                            "label": pattern_info["label"],
-                            "description": pattern_info["description"],
-                        })
-
-        # 공식 절차 근거 매칭
-        for org_keyword, procedures in OFFICIAL_PROCEDURES.items():
-            if org_keyword in message:
-                for proc in procedures:
-                    if proc not in self.procedures:
-                        self.procedures.append(proc)
-                        new_procedures.append(proc)
-
-        # 위험도 재계산
-        self._recalculate_risk()
-
-        # 위험 등급 판정
-        risk_level = self._get_risk_level()
+        for idx in keyword_ids:
+            bit = 1 << idx
+            if self._keyword_bits & bit:
+                # 근사 매칭으로 먼저 감지된 키워드가 정확히 나오면 신뢰도만 올림
+                cid = ps.keyword_category[idx]
+                if self._category_confidence[cid] < 100:
+                    self._raise_confidence(cid, 100)
+                continue
+            # 새로운 감지 기록
+            self._keyword_bits |= bit
+            self._add_keyword(idx)
+            new_detections.append(self._detection(idx))
 
-        # 결과 반환
+        if timed:
+            now = perf_counter_ns()
+            metrics.STAGE_SECONDS.observe((now - started) / 1e9, "score")
+            started = now
+
+        # 공식 절차 근거 매칭 (기관의 절차 ID 집합이 이미 모두 제시됐으면 건너뜀)
+        for idx in org_ids:
+            if not ps.org_procedure_masks[idx] & ~self._procedure_bits:
+                continue
+            for pid in ps.org_procedures[idx]:
+                bit = 1 << pid
+                if not self._procedure_bits & bit:
+                    self._procedure_bits |= bit
+                    self._procedure_order.append(pid)
+                    new_procedures.append(ps.procedure_texts[pid])
+
+        if timed:
+            metrics.STAGE_SECONDS.observe((perf_counter_ns() - started) / 1e9, "procedures")
+        if new_detections or new_procedures:
+            self.version += 1
+        return new_detections, new_procedures
+
+    def _preview_hits(self, keyword_ids, org_ids) -> tuple[list, list]:
+        """_apply_hits가 반환할 (새 감지, 새 절차 근거)를 세션 상태를 바꾸지 않고 계산"""
+        ps = self._patterns
+        new_detections = [
+            self._detection(idx) for idx in keyword_ids if not self._keyword_bits >> idx & 1
+        ]
+        new_procedures = []
+        seen = self._procedure_bits
+        for idx in org_ids:
+            for pid in ps.org_procedures[idx]:
+                if not seen >> pid & 1:
+                    seen |= 1 << pid
+                    new_procedures.append(ps.procedure_texts[pid])
+        return new_detections, new_procedures
+
+    def _detection(self, idx: int) -> dict:
+        """키워드 ID의 감지 결과 항목"""
+        category, keyword = self._patterns.keyword_table[idx]
+        pattern_info = self._patterns.phishing_patterns[category]
+        return {
+            "category": category,
+            "keyword": keyword,
+            "label": pattern_info["label"],
+            "description": pattern_info["description"],
+        }
+
+    def _apply_fuzzy(self, message: str) -> list:
+        """근사 매칭된 새 키워드를 신뢰도와 함께 반영하고 새 감지 목록을 반환"""
+        ps = self._patterns
+        new_detections = []
+        for idx, confidence in ps.fuzzy_match(message, self._keyword_bits):
+            self._keyword_bits |= 1 << idx
+            self._add_keyword(idx, confidence)
+            new_detections.append({**self._detection(idx), "confidence": confidence / 100})
+        if new_detections:
+            self.version += 1
+        return new_detections
+
+    def _build_result(self, new_detections: list, new_procedures: list) -> dict:
+        """변화분 + 현재 위험도로 결과 딕셔너리 구성"""
         return {
-            "message": message,
             "new_detections": new_detections,
             "new_procedures": new_procedures,
             "risk_score": self.risk_score,
-            "risk_level": risk_level,
-            "total_detected_patterns": dict(self.detected_patterns),
-            "total_procedures": list(self.procedures),
+            "risk_level": self._get_risk_level(),
+            "version": self.version,
         }
 
+    def _add_keyword(self, idx: int, confidence: int = 100):
+        """새 키워드를 기록하고 위험도를 변화분만큼 갱신 (_recalculate_risk와 같은 결과)
+
+        confidence: 매칭 신뢰도(%), 정확 매칭은 100
+        """
+        self._keyword_order.append(idx)
+        cid = self._patterns.keyword_category[idx]
+        count = self._category_counts[cid]
+        self._category_counts[cid] = count + 1
+        if count == 0:
+            # 새 카테고리: 기본 가중치(신뢰도 반영) + 복합 패턴 보너스 변화분
+            self._category_order.append(cid)
+            self._category_confidence[cid] = confidence
+            delta = self._patterns.category_weights[cid] * confidence // 100
+            num_categories = len(self._category_order)
+            if num_categories == 2:
+                delta += 10
+            elif num_categories == 3:
+                delta += 5
+        else:
+            # 같은 카테고리 추가 키워드: 3개까지 5점씩
+            delta = 5 if count <= 3 else 0
+            if confidence > self._category_confidence[cid]:
+                self._raise_confidence(cid, confidence)
+        self._raw_score += delta
+        self.risk_score = min(self._raw_score, 100)
+
+    def _raise_confidence(self, cid: int, confidence: int):
+        """카테고리 신뢰도를 올리고 기본 가중치 반영분의 차이만큼 위험도 갱신"""
+        weight = self._patterns.category_weights[cid]
+        previous = self._category_confidence[cid]
+        self._category_confidence[cid] = confidence
+        self._raw_score += weight * confidence // 100 - weight * previous // 100
+        self.risk_score = min(self._raw_score, 100)
+        self.version += 1
+
     def _recalculate_risk(self):
-        """감지된 패턴 기반 위험도 재계산"""
-        score = 0
-        for category, keywords in self.detected_patterns.items():
-            pattern_info = PHISHING_PATTERNS[category]
-            base_weight = pattern_info["weight"]
+        """감지된 패턴 기반 위험도 전체 재계산 (증분 갱신의 기준 구현)"""
+        # 발신 번호 평판 사전 점수·캠페인 가산점에서 시작
+        score = self._caller_prior + self._campaign_boost
+        for cid in self._category_order:
+            base_weight = self._patterns.category_weights[cid]
+            # 근사 매칭만 있는 카테고리는 기본 가중치를 신뢰도만큼만 반영
+            base_weight = base_weight * self._category_confidence[cid] // 100
             # 같은 카테고리에서 여러 키워드가 감지될수록 확신도 증가
-            keyword_count = len(keywords)
+            keyword_count = self._category_counts[cid]
             # 첫 키워드는 base_weight, 추가 키워드마다 5점씩 가산 (최대 base_weight)
             category_score = base_weight + min(keyword_count - 1, 3) * 5
             score += category_score
 
         # 복합 패턴 보너스 (2개 이상 카테고리 동시 감지)
-        num_categories = len(self.detected_patterns)
+        num_categories = len(self._category_order)
         if num_categories >= 3:
             score += 15
         elif num_categories >= 2:
             score += 10
 
+        self._raw_score = score
         self.risk_score = min(score, 100)
 
     def _get_risk_level(self) -> dict:
@@ -268,23 +698,100 @@ class CallShieldDetector:
             }
 
     def get_summary(self) -> dict:
-        """현재까지의 분석 요약"""
-        return {
-            "conversation_length": len(self.conversation),
+        """현재까지의 분석 요약 (같은 version이면 이전 결과를 재사용하므로 수정하지 마세요)"""
+        if self._summary is not None and self._summary[0] == self.version:
+            return self._summary[1]
+        detected_patterns = self.detected_patterns
+        summary = {
+            "version": self.version,
+            "pattern_version": self._patterns.version,
+            "conversation_length": self._turns,
+            "caller": self.caller,
+            "caller_info": self.caller_info,
+            "caller_prior": self._caller_prior,
+            "campaign": self.campaign,
+            "campaign_boost": self._campaign_boost,
             "risk_score": self.risk_score,
             "risk_level": self._get_risk_level(),
-            "detected_categories": list(self.detected_patterns.keys()),
-            "detected_keywords": dict(self.detected_patterns),
-            "official_procedures": list(self.procedures),
+            "detected_categories": list(detected_patterns.keys()),
+            "detected_keywords": detected_patterns,
+            "official_procedures": self.procedures,
         }
+        self._summary = (self.version, summary)
+        return summary
 
     def reset(self):
-        """대화 초기화"""
-        self.__init__()
+        """대화 초기화 (생성 시 정해진 패턴 세트는 그대로 유지)"""
+        self.__init__(keep_conversation=self.conversation is not None, patterns=self._patterns,
+                      fuzzy=self.fuzzy, tenant=self.tenant, caller=self.caller)
+
+
+# ============================================================
+# 6. 스트리밍 세션 (ASR 부분 인식 결과 입력)
+# ============================================================
+class StreamingSession:
+    """스트리밍 음성 인식의 조각 단위 입력을 받아 조각 경계를 넘는 키워드까지 감지하는 세션
+
+    - push_partial(text): 진행 중인 조각의 최신 부분 결과 (이전 부분 결과를 대체)
+    - push_final(text): 조각 확정. 다음 조각은 확정된 조각들 뒤에 이어 붙여 매칭
+    - end_utterance(): 발화 종료. 확정된 조각을 이어 붙여 대화 기록에 한 번만 추가
+
+    부분 결과에서 완성된 키워드는 즉시 final=False인 잠정 경보(new_detections)로 반환하지만
+    세션 상태(위험도·감지 목록)는 바꾸지 않으므로, 부분 결과가 고쳐지면 사라집니다.
+    상태는 확정된 조각(push_final·end_utterance)에서 매칭될 때만 반영되며, 그때 final=True로
+    다시 반환됩니다.
+    """
+
+    def __init__(self, detector: CallShieldDetector | None = None, separator: str = " "):
+        self.detector = detector or CallShieldDetector()
+        self.separator = separator   # 조각 사이에 끼워 넣을 구분자 (ASR 단어 경계)
+        self._segments = []          # 현재 발화의 확정 조각들
+        self._partial = ""           # 아직 확정되지 않은 최신 부분 결과
+
+    def _feed(self, text: str) -> list:
+        """확정된 조각들 뒤에 text를 이어 붙여 현재 발화 전체를 매칭 (조각 경계를 넘는 키워드 포함)"""
+        return self.detector.patterns.scan(self.separator.join(self._segments + [text]))
+
+    def push_partial(self, text: str) -> dict:
+        """부분 인식 결과의 잠정 경보 (세션 상태는 바꾸지 않음)"""
+        self._partial = text
+        keyword_ids, org_ids = PatternSet.split_hits(self._feed(text))
+        new_detections, new_procedures = self.detector._preview_hits(keyword_ids, org_ids)
+        result = self.detector._build_result(new_detections, new_procedures)
+        result["final"] = False
+        return result
+
+    def push_final(self, text: str) -> dict:
+        """조각 확정 결과 반영"""
+        self._partial = ""
+        keyword_ids, org_ids = PatternSet.split_hits(self._feed(text))
+        self._segments.append(text)
+        new_detections, new_procedures = self.detector._apply_hits(keyword_ids, org_ids)
+        result = self.detector._build_result(new_detections, new_procedures)
+        result["final"] = True
+        return result
+
+    def end_utterance(self) -> dict | None:
+        """발화 종료: 남은 부분 결과를 확정하고 대화 기록에 추가 (빈 발화면 None)"""
+        if self._partial:
+            self.push_final(self._partial)
+        if not self._segments:
+            return None
+        message = self.separator.join(self._segments)
+        self._segments = []
+        detector = self.detector
+        detector._record_turn(message)
+        if metrics.ENABLED:
+            _count_hits(detector.patterns, detector.patterns.match(message)[0])
+        # 근사 매칭은 조각이 아니라 완성된 발화 단위로 한 번만
+        new_detections = detector._apply_fuzzy(message) if detector.fuzzy else []
+        result = detector._build_result(new_detections, [])
+        result["message"] = message
+        return result
 
 
 # ============================================================
-# 5. 시나리오 프리셋 (데모용)
+# 7. 시나리오 프리셋 (데모용)
 # ============================================================
 DEMO_SCENARIOS = {
     "검찰 사칭형": [
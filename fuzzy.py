@@ -0,0 +1,98 @@
+"""
+CallShield 근사 키워드 매칭 (음성 인식 오류 대응)
+- "금감원"→"금간원", "안전계좌"→"안전개좌"처럼 비슷한 음절로 잘못 인식된 키워드를 매칭
+- 음절을 발음 묶음(초성 + 비슷한 모음, 받침 무시)으로 바꾼 "발음 키"로 키워드를 하나의
+  다중 패턴 매칭기(matcher.py)에 컴파일해, 발화도 발음 키로 바꿔 한 번만 훑음
+  (모든 키워드를 모든 위치와 비교하지 않음)
+- 후보마다 실제로 다른 음절 수를 세어 허용 횟수 이내인 것만 채택하며,
+  발화 하나당 후보 검증 횟수 상한(budget)이 있어 최악의 경우에도 비용이 일정
+
+편집 범위: 음성 인식은 음절 단위로 결과를 내므로 오류는 대부분 음절 치환으로 나타납니다.
+따라서 음절 수가 같은 치환만 허용하며, 치환된 음절은 원래 음절과 초성이 같고 모음이
+비슷해야 합니다 (감/간, 계/개, 번/변, 제/재). 발음이 다른 치환("수사관"/"수사국")이나
+한글이 아닌 글자의 치환은 다른 단어일 가능성이 높아 인정하지 않습니다.
+
+입력은 normalize.py로 정규화한 텍스트·키워드입니다.
+"""
+from matcher import KeywordMatcher
+
+MIN_LENGTH = 3       # 이보다 짧은 키워드는 근사 매칭하지 않음 (한 음절 차이가 너무 큰 비중)
+DEFAULT_BUDGET = 16  # 발화당 후보 검증 횟수 상한
+
+_HANGUL_BASE = 0xAC00
+_HANGUL_END = 0xAC00 + 11172
+# 중성 번호(ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ) → 비슷하게 들리는 모음 묶음
+_VOWEL_GROUP = (0, 1, 0, 1, 2, 1, 2, 1, 3, 4, 5, 5, 3, 6, 7, 5, 8, 6, 9, 10, 11)
+
+_sound_table = None
+
+
+def _get_sound_table() -> list:
+    """str.translate용 표: 한글 음절 → 같은 초성·모음 묶음의 대표 음절 (받침 없음)
+
+    약 2MB라서 근사 매칭을 처음 쓸 때 만듭니다. 표 범위 밖 글자는 그대로 남습니다.
+    """
+    global _sound_table
+    if _sound_table is None:
+        representative = [_VOWEL_GROUP.index(group) for group in range(max(_VOWEL_GROUP) + 1)]
+        table = list(range(_HANGUL_END))
+        for code in range(_HANGUL_END - _HANGUL_BASE):
+            initial, vowel = divmod(code // 28, 21)
+            table[_HANGUL_BASE + code] = (
+                _HANGUL_BASE + (initial * 21 + representative[_VOWEL_GROUP[vowel]]) * 28
+            )
+        _sound_table = table
+    return _sound_table
+
+
+def sound_key(text: str) -> str:
+    """발음 키: 비슷하게 들리는 음절을 같은 글자로 (길이는 그대로)"""
+    return text.translate(_get_sound_table())
+
+
+def max_edits(length: int) -> int:
+    """키워드 길이별 허용 치환 횟수"""
+    if length < MIN_LENGTH:
+        return 0
+    return 1 if length < 7 else 2
+
+
+class FuzzyMatcher:
+    """발음 키 매칭기
+
+    keywords: (정규화 키워드, 키워드 ID) 쌍들. MIN_LENGTH 이상인 키워드만 등록합니다.
+    """
+
+    def __init__(self, keywords):
+        entries = []
+        for keyword, keyword_id in keywords:
+            edits = max_edits(len(keyword))
+            if edits:
+                entries.append((sound_key(keyword), (keyword_id, keyword, edits)))
+        self._matcher = KeywordMatcher(entries)
+
+    def __len__(self):
+        return len(self._matcher)
+
+    def search(self, text: str, skip_ids: int = 0, budget: int = DEFAULT_BUDGET) -> list:
+        """정규화 텍스트에서 근사 매칭된 [(키워드 ID, 신뢰도), ...]를 반환
+
+        신뢰도는 일치한 음절 비율(%)입니다 ("금간원" → "금감원": 66).
+
+        skip_ids: 건너뛸 키워드 ID 비트셋 (정확히 매칭됐거나 이미 감지된 키워드)
+        치환 0회인 결과는 없습니다 (정확 매칭은 패턴 세트의 매칭기가 담당).
+        """
+        candidates = self._matcher.scan(sound_key(text))
+        hits = []
+        for start, _, (keyword_id, keyword, edits) in candidates:
+            if skip_ids >> keyword_id & 1:
+                continue
+            if budget <= 0:
+                break
+            budget -= 1
+            window = text[start:start + len(keyword)]
+            distance = sum(1 for expected, actual in zip(keyword, window) if expected != actual)
+            if 0 < distance <= edits:
+                skip_ids |= 1 << keyword_id
+                hits.append((keyword_id, 100 * (len(keyword) - distance) // len(keyword)))
+        return hits
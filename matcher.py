@@ -0,0 +1,194 @@
+"""
+CallShield 다중 패턴 매칭기
+- 전체 키워드를 접두사 트라이 모양의 정규식 하나로 컴파일해 C 수준(re)에서 한 번에 탐색
+- 정규식 매칭 하나마다 그 안에 들어 있는 다른 패턴은 컴파일 시 미리 계산한 표로 채움
+- 매칭 끝을 넘어가는 겹침("송금" + "금감원" → "송금감원")은 겹쳐 합친 문자열을 정규식에
+  미리 넣어 두어 정규식이 그대로 찾게 하고, 합친 길이·개수 상한을 넘는 경우만
+  그 위치에 같은 정규식을 다시 적용
+  (글자 단위 파이썬 반복 없이 매칭 수에 비례하는 작업만 파이썬에서 수행)
+- 패턴마다 임의의 값(value)을 붙여 매칭 결과로 돌려받음
+"""
+import re
+
+MERGE_BUDGET = 4  # 패턴 하나당 정규식에 미리 넣어 둘 수 있는 합친 문자열 수 (평균)
+
+
+class KeywordMatcher:
+    """키워드 집합을 한 번 컴파일해 두고 문장 하나에서 겹치는 것까지 모든 매칭을 찾는 매칭기"""
+
+    def __init__(self, patterns):
+        """patterns: (패턴 문자열, 값) 쌍의 iterable"""
+        self._goto = [{}]        # 트라이 노드별 전이: {문자: 다음 노드} (컴파일 중에만 사용)
+        self._ends = [()]        # 노드에서 끝나는 패턴의 값들
+        strings = []
+        for pattern, value in patterns:
+            if not pattern:
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._ends.append(())
+                node = nxt
+            self._ends[node] += (value,)
+            strings.append(pattern)
+        self._count = len(strings)
+
+        # 정규식이 돌려주는 문자열(그 위치에서 가장 긴 것) → 그 안의 모든 매칭 (상대 위치, 길이, 값)
+        self._inner = {}
+        self._values = {}        # 정규식 매칭 → 그 안의 모든 매칭의 값 (위치가 필요 없는 values()용)
+        self._prefixes = {}      # 정규식 매칭 → 그 접두사인 패턴들 (길이, 값)
+        # 정규식 매칭 → 합친 문자열을 넣지 못해 매칭 끝을 넘어가는 더 긴 패턴을 실행 중에 확인할
+        # (상대 위치, 매칭 끝 다음에 올 수 있는 글자들)
+        self._overlaps = {}
+        queue = list(dict.fromkeys(strings))
+        terminals = set(queue)
+        limit = 2 * max(map(len, queue), default=0)
+        budget = MERGE_BUDGET * len(queue)
+        for text in queue:
+            merged = self._index_string(text, terminals, limit, budget)
+            budget -= len(merged)
+            terminals.update(merged)
+            queue += merged
+        del self._goto, self._ends
+        self._source = _trie_regex(terminals)
+        self._regex = re.compile(self._source) if self._source else None
+
+    def _index_string(self, text: str, terminals: set, limit: int, budget: int) -> list:
+        """정규식이 text를 돌려줄 때 쓸 표를 만들고, 끝을 넘어가는 겹침을 합친 새 문자열들을 반환"""
+        goto, ends = self._goto, self._ends
+        inner = []
+        overlaps = []
+        merges = []
+        for offset in range(len(text)):
+            node = 0
+            for i in range(offset, len(text)):
+                node = goto[node].get(text[i])
+                if node is None:
+                    break
+                for value in ends[node]:
+                    inner.append((offset, i + 1 - offset, value))
+            else:
+                if not offset or not goto[node]:
+                    continue
+                # offset에서 시작해 text 끝을 넘어가는 패턴마다 text와 겹쳐 합친 문자열
+                tails = _tails(goto, ends, node, limit - len(text), budget - len(merges))
+                if tails is None:
+                    overlaps.append((offset, "".join(goto[node])))
+                else:
+                    merges += [
+                        text + tail for tail in tails
+                        if text + tail not in terminals and text + tail not in merges
+                    ]
+        self._inner[text] = tuple(inner)
+        self._values[text] = tuple(dict.fromkeys(value for _, _, value in inner))
+        self._prefixes[text] = tuple((length, value) for offset, length, value in inner if not offset)
+        if overlaps:
+            self._overlaps[text] = tuple(overlaps)
+        return merges
+
+    def __len__(self):
+        return self._count
+
+    def to_state(self) -> tuple:
+        """직렬화용 상태 (dict·list·tuple·기본형만 포함하므로 marshal로 저장 가능)"""
+        return (self._count, self._inner, self._values, self._prefixes, self._overlaps, self._source)
+
+    @classmethod
+    def from_state(cls, state: tuple) -> "KeywordMatcher":
+        """to_state() 결과에서 다시 컴파일 없이 복원 (정규식만 다시 컴파일)"""
+        matcher = cls.__new__(cls)
+        (matcher._count, matcher._inner, matcher._values, matcher._prefixes,
+         matcher._overlaps, matcher._source) = state
+        matcher._regex = re.compile(matcher._source) if matcher._source else None
+        return matcher
+
+    def scan(self, text: str) -> list:
+        """text의 모든 매칭 [(시작 위치, 끝 위치, 값), ...]을 시작 위치 순으로 반환"""
+        if self._regex is None:
+            return []
+        inner, overlaps = self._inner, self._overlaps
+        hits = []
+        extended = False
+        for m in self._regex.finditer(text):
+            start = m.start()
+            found = m.group()
+            for offset, length, value in inner[found]:
+                hits.append((start + offset, start + offset + length, value))
+            if found in overlaps:
+                end = m.end()
+                for offset, follow in overlaps[found]:
+                    if text[end:end + 1] in follow:
+                        for stop, value in self._overlap(text, start + offset, end):
+                            hits.append((start + offset, stop, value))
+                            extended = True
+        if extended:
+            hits.sort(key=lambda hit: hit[0])
+        return hits
+
+    def values(self, text: str) -> set:
+        """text에서 매칭된 패턴의 값 집합 (위치를 만들지 않아 scan보다 빠름)"""
+        if self._regex is None:
+            return set()
+        found = self._regex.findall(text)
+        if self._overlaps.keys().isdisjoint(found):
+            return set().union(*map(self._values.__getitem__, found))
+        return {value for _, _, value in self.scan(text)}
+
+    def _overlap(self, text: str, start: int, limit: int) -> list:
+        """start에서 시작해 limit을 넘어 끝나는 패턴 [(끝 위치, 값), ...]
+
+        한 위치에서 시작해 매칭되는 패턴들은 모두 그 위치의 가장 긴 매칭(정규식 결과)의
+        접두사이므로 그 접두사 표에서 골라내면 됨
+        """
+        m = self._regex.match(text, start)
+        if m is None or m.end() <= limit:
+            return []
+        return [(start + length, value) for length, value in self._prefixes[m.group()]
+                if start + length > limit]
+
+
+def _tails(goto: list, ends: list, node: int, max_length: int, max_count: int) -> list | None:
+    """node 아래에서 끝나는 패턴들의 node 이후 글자들 (길이·개수 상한을 넘으면 None)"""
+    found = []
+    stack = [(node, "")]
+    while stack:
+        node, tail = stack.pop()
+        for ch, child in goto[node].items():
+            if len(tail) >= max_length:
+                return None
+            if ends[child]:
+                if len(found) >= max_count:
+                    return None
+                found.append(tail + ch)
+            stack.append((child, tail + ch))
+    return found
+
+
+def _trie_regex(strings) -> str:
+    """문자열 집합을 접두사 트라이 모양의 정규식으로 (같은 위치에서는 가장 긴 문자열이 먼저 매칭됨)"""
+    root = {}
+    for text in strings:
+        node = root
+        for ch in text:
+            node = node.setdefault(ch, {})
+        node[""] = None
+
+    def build(node: dict) -> str:
+        branches = []
+        for ch, child in node.items():
+            if not ch:
+                continue
+            rest = build(child)
+            if not rest:
+                branches.append(re.escape(ch))
+            elif "" in child:
+                branches.append(f"{re.escape(ch)}(?:{rest})?")
+            else:
+                branches.append(f"{re.escape(ch)}(?:{rest})")
+        return "|".join(branches)
+
+    return build(root)
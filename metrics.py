@@ -0,0 +1,147 @@
+"""
+CallShield 계측
+- analyze_message 단계별 소요 시간 히스토그램 (매칭·키워드 반영·절차 근거·결과 구성)
+- 카테고리·키워드별 매칭 횟수, 처리 발화 수, 세션 수
+- Prometheus 텍스트 형식으로 내보내기 (render / dump, 분석 서버의 GET /metrics)
+
+기본은 꺼져 있으며, 꺼진 상태에서는 탐지 엔진이 ENABLED 플래그 하나만 확인합니다.
+enable() 또는 환경 변수 CALLSHIELD_METRICS=1로 켭니다.
+"""
+import os
+import sys
+from bisect import bisect_left
+
+ENABLED = os.environ.get("CALLSHIELD_METRICS", "") not in ("", "0")
+
+# 단계별 소요 시간 구간 (초): 마이크로초 단위 엔진 기준
+DEFAULT_BUCKETS = (
+    0.000005, 0.00001, 0.000025, 0.00005, 0.0001,
+    0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+)
+
+_REGISTRY = []
+
+
+def enable(enabled: bool = True):
+    global ENABLED
+    ENABLED = enabled
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """단조 증가 카운터 (레이블 값 튜플별)"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.values = {}
+        _REGISTRY.append(self)
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def _samples(self):
+        for labels, value in sorted(self.values.items()):
+            yield self.name + _format_labels(self.labelnames, labels), value
+
+
+class Gauge(Counter):
+    """현재 값 게이지"""
+
+    kind = "gauge"
+
+    def set(self, value: float, *labels):
+        self.values[labels] = value
+
+
+class Histogram:
+    """고정 구간 히스토그램 (레이블 값 튜플별 구간 카운트·합계)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.values = {}  # 레이블 → [구간별 카운트..., +Inf 카운트, 합계]
+        _REGISTRY.append(self)
+
+    def observe(self, value: float, *labels):
+        state = self.values.get(labels)
+        if state is None:
+            state = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def _samples(self):
+        for labels, state in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), state[:-1]):
+                cumulative += count
+                yield self.name + "_bucket" + _format_labels(self.labelnames, labels, f'le="{bound}"'), cumulative
+            yield self.name + "_sum" + _format_labels(self.labelnames, labels), state[-1]
+            yield self.name + "_count" + _format_labels(self.labelnames, labels), cumulative
+
+
+# ============================================================
+# 엔진 지표
+# ============================================================
+STAGE_SECONDS = Histogram(
+    "callshield_analyze_stage_seconds", "analyze_message 단계별 소요 시간", ("stage",),
+)
+MESSAGES = Counter("callshield_messages_total", "분석한 발화 수")
+CATEGORY_HITS = Counter("callshield_category_hits_total", "카테고리별 키워드 매칭 횟수", ("category",))
+KEYWORD_HITS = Counter(
+    "callshield_keyword_hits_total", "키워드별 매칭 횟수", ("category", "keyword"),
+)
+SESSIONS_CREATED = Counter("callshield_sessions_created_total", "생성된 탐지 세션 수")
+ACTIVE_SESSIONS = Gauge("callshield_active_sessions", "현재 열려 있는 세션 수 (분석 서버)")
+QUEUE_DEPTH = Gauge("callshield_queue_depth", "위험 등급별 분석 대기 발화 수 (분석 서버)", ("level",))
+QUEUE_WAIT_SECONDS = Histogram(
+    "callshield_queue_wait_seconds", "위험 등급별 발화 대기 시간 (분석 서버)", ("level",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+SHED_TURNS = Counter("callshield_shed_turns_total", "과부하로 거절한 발화 수", ("level",))
+COALESCED_TURNS = Counter("callshield_coalesced_turns_total", "과부하로 직전 발화와 합쳐 분석한 발화 수", ("level",))
+
+
+def render() -> str:
+    """등록된 전체 지표를 Prometheus 텍스트 형식으로"""
+    lines = []
+    for metric in _REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for sample, value in metric._samples():
+            lines.append(f"{sample} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def dump(path: str | None = None):
+    """render() 결과를 파일(없으면 표준 출력)로 기록"""
+    text = render()
+    if path is None:
+        sys.stdout.write(text)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def reset():
+    """수집된 값 초기화 (지표 정의는 유지)"""
+    for metric in _REGISTRY:
+        metric.values.clear()
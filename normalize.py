@@ -0,0 +1,159 @@
+"""
+CallShield 발화 텍스트 정규화
+- 문장부호·대소문자·전각/반각·자모 분리(NFD) 차이를 없앤 매칭용 텍스트로 변환
+  ("OTP!" / "otp" / "ｏｔｐ", 풀어 쓴 한글 자모 / 완성형 음절을 같은 문자열로)
+- 띄어쓰기는 지우지 않고 단어 사이 공백 한 칸으로 남기며, 문장부호도 단어 사이 공백으로 바꿈:
+  키워드가 단어 경계를 넘어 잡히지 않도록 ("수사 관련"·"수사,관련"이 "수사관"으로 잡히지 않음)
+- 띄어쓰기 변형은 키워드 쪽에서 처리 (keyword_variants: "체포 영장" → "체포 영장"·"체포영장",
+  "본인확인" → "본인확인"·"본인 확인", "otp" → "otp"·"o t p")
+- 여러 발화를 이어 붙여 한 번에 분석할 때는 TURN_SEPARATOR로 이어 붙임: 공백으로 바뀌지 않고
+  그대로 남으며 어떤 키워드에도 없으므로 매칭이 발화 경계를 넘지 않음
+- 정규화 텍스트의 각 글자가 원문 몇 번째 글자에서 왔는지 위치 표를 따로 계산
+  (매칭 위치를 원문 위치로 되돌릴 때만 필요하므로 필요할 때만 생성)
+
+정규화 규칙: 문자열 전체 NFKC → casefold → 결합 문자(남은 악센트 등)는 제거하고
+글자·숫자(str.isalnum)·TURN_SEPARATOR가 아닌 나머지 문자(공백·문장부호·기호)는 공백으로 →
+공백 연속은 한 칸으로(앞뒤 공백 제거)
+"""
+import itertools
+import unicodedata
+
+# 발화에 흔한 ASCII 문장부호: 글자 단위 표 없이 str.replace로 먼저 공백으로 바꿈
+_COMMON_PUNCTUATION = ".,?!~'\"-"
+
+TURN_SEPARATOR = "\x00"  # 발화 경계 (str.split의 공백류가 아니어서 공백 정리에도 그대로 남음)
+
+MAX_SPELLED_LENGTH = 6  # 이 길이 이하의 영문·숫자 단어는 한 글자씩 띄어 읽은 형태도 등록 ("o t p")
+MIN_SPLIT_LENGTH = 2    # 붙여 쓴 한글 단어는 양쪽이 모두 이 길이 이상인 자리에서 띄운 형태도 등록
+                        # ("본인확인" → "본인 확인", "수사관"·"경찰청"은 나누지 않음)
+MAX_VARIANT_GAPS = 3    # 띄어쓰기가 이보다 많은 키워드는 모두 띄운 형태와 모두 붙인 형태만 등록
+
+
+class _CharTable(dict):
+    """str.translate용 글자 표: 글자·숫자·발화 경계는 그대로, 결합 문자는 삭제, 나머지는 공백
+
+    처음 보는 글자만 계산해 저장합니다 (발화에 나오는 글자 종류는 한정적이므로 금방 수렴).
+    """
+
+    def __missing__(self, code: int) -> str:
+        ch = chr(code)
+        if ch.isalnum() or ch == TURN_SEPARATOR:
+            mapped = ch
+        elif unicodedata.category(ch).startswith("M"):
+            mapped = ""
+        else:
+            mapped = " "
+        self[code] = mapped
+        return mapped
+
+
+_CHAR_TABLE = _CharTable()
+# offset_map용 글자별 정규화 결과 캐시
+_CHAR_MAP = {}
+
+
+def normalize_text(text: str) -> str:
+    """매칭용 정규화 텍스트"""
+    if not unicodedata.is_normalized("NFKC", text):
+        text = unicodedata.normalize("NFKC", text)
+    text = text.casefold()
+    # 대부분의 발화: 문자열 단위 C 함수만으로 처리
+    for ch in _COMMON_PUNCTUATION:
+        if ch in text:
+            # "다. 네" → "다 네": 문장부호 뒤 공백과 합쳐 두 칸이 되지 않게
+            text = text.replace(ch + " ", " ").replace(ch, " ")
+    if not text.replace(" ", "").isalnum():
+        text = text.translate(_CHAR_TABLE)
+    if "  " in text:
+        text = " ".join(text.split())
+    elif text[:1] == " " or text[-1:] == " ":
+        text = text.strip(" ")
+    return text
+
+
+def keyword_variants(keyword: str) -> list:
+    """정규화한 키워드가 정규화 발화에 나타날 수 있는 형태들
+
+    - 띄어쓰기가 있는 자리는 띄운 형태와 붙인 형태 모두 ("체포 영장" → "체포 영장", "체포영장")
+    - 붙여 쓴 한글 단어는 양쪽이 모두 MIN_SPLIT_LENGTH 글자 이상인 자리에서 띄운 형태도
+      ("본인확인" → "본인확인", "본인 확인"). 한 글자 접미사("수사관"의 "관", "경찰청"의 "청")는
+      앞 단어와 띄어 쓰면 다른 말이므로 나누지 않습니다.
+    - 짧은 영문·숫자 단어는 한 글자씩 띄어 읽은 형태도 ("otp" → "otp", "o t p")
+    그 밖의 자리에서는 띄어쓰기를 허용하지 않습니다.
+    """
+    words = keyword.split(" ")
+    forms = [_word_forms(word) for word in words]
+    gaps = len(words) - 1
+    if gaps <= MAX_VARIANT_GAPS:
+        joins = list(itertools.product((" ", ""), repeat=gaps))
+    else:
+        joins = [(" ",) * gaps, ("",) * gaps]
+    variants = []
+    for spelled in itertools.product(*forms):
+        for join in joins:
+            variants.append(spelled[0] + "".join(sep + word for sep, word in zip(join, spelled[1:])))
+    return list(dict.fromkeys(variants))
+
+
+def _word_forms(word: str) -> list:
+    """키워드 단어 하나의 형태들 (keyword_variants 참고)"""
+    if 1 < len(word) <= MAX_SPELLED_LENGTH and word.isascii():
+        return [word, " ".join(word)]
+    if all("\uac00" <= ch <= "\ud7a3" for ch in word):
+        return _splits(word)
+    return [word]
+
+
+def _splits(word: str) -> list:
+    """word와, word를 MIN_SPLIT_LENGTH 글자 이상씩 나눠 띄운 형태들"""
+    forms = [word]
+    for i in range(MIN_SPLIT_LENGTH, len(word) - MIN_SPLIT_LENGTH + 1):
+        forms += [word[:i] + " " + rest for rest in _splits(word[i:])]
+    return forms
+
+
+def _normalize_char(ch: str) -> str:
+    """NFKC를 마친 글자 하나의 정규화 결과 (normalize_text와 같은 표 사용)"""
+    mapped = _CHAR_MAP.get(ch)
+    if mapped is None:
+        mapped = _CHAR_MAP[ch] = ch.casefold().translate(_CHAR_TABLE)
+    return mapped
+
+
+def _joins_previous(ch: str) -> bool:
+    """앞 글자와 NFKC로 합쳐질 수 있는 글자 (결합 문자, 한글 중성·종성 자모)"""
+    first = unicodedata.normalize("NFKD", ch)[:1]
+    return bool(first) and (unicodedata.combining(first) or "\u1160" <= first <= "\u11ff")
+
+
+def _clusters(text: str):
+    """(시작 위치, 글자 묶음): 앞 글자와 합쳐질 수 있는 글자는 같은 묶음으로"""
+    start = 0
+    for i in range(1, len(text)):
+        if not _joins_previous(text[i]):
+            yield start, text[start:i]
+            start = i
+    if text:
+        yield start, text[start:]
+
+
+def offset_map(text: str) -> list:
+    """normalize_text(text)의 i번째 글자가 나온 원문 글자 위치의 목록
+
+    NFKC는 글자 묶음(기본 글자 + 결합 문자, 초성 + 중성 + 종성 자모) 단위로 적용해
+    문자열 전체 정규화와 같은 결과를 만들고, 묶음에서 나온 글자는 묶음의 시작 위치로 되돌립니다.
+    """
+    offsets = []
+    gap = None      # 아직 내보내지 않은 공백의 원문 위치 (연속 공백은 한 칸, 앞뒤 공백은 버림)
+    for start, cluster in _clusters(text):
+        for ch in unicodedata.normalize("NFKC", cluster):
+            for mapped in _normalize_char(ch):
+                if mapped == " ":
+                    if offsets and gap is None:
+                        gap = start
+                    continue
+                if gap is not None:
+                    offsets.append(gap)
+                    gap = None
+                offsets.append(start)
+    return offsets
@@ -0,0 +1,462 @@
+"""
+CallShield 패턴 팩
+- 피싱 패턴·공식 절차 테이블을 버전이 붙은 외부 JSON 파일에서 로드
+- 키워드 매칭기와 정수 ID 테이블을 한 번 컴파일해 바이너리 캐시(marshal)로 저장하고,
+  이후에는 캐시에서 수 ms 안에 로드
+- 키워드는 정규화(normalize.py)한 형태와 그 띄어쓰기 변형으로 컴파일하고 발화도 정규화해
+  매칭하므로 띄어쓰기·문장부호·대소문자·전각 변형을 별도 키워드 없이 잡아냄
+  (발화의 단어 사이 공백은 남기므로 키워드가 단어 경계를 넘어 잡히지는 않음)
+- PatternSet은 읽기 전용이며, 세션은 생성 시점의 PatternSet을 끝까지 사용하므로
+  실행 중 새 버전으로 교체해도 진행 중인 세션은 일관된 버전을 유지
+- PatternOverlay는 기본 세트의 매칭기를 공유하면서 테넌트별 추가 키워드·가중치·
+  꺼진 카테고리만 얹음 (테넌트마다 테이블·매칭기를 복제하지 않음)
+
+팩 파일 형식 (JSON):
+    {"version": "2025-02-10", "phishing_patterns": {...}, "official_procedures": {...},
+     "procedure_translations": {"en": {"<절차 키>": "...", ...}}}
+    (각 테이블의 구조는 detector.py의 PHISHING_PATTERNS·OFFICIAL_PROCEDURES와 같음)
+    절차 문장은 기관 간 중복을 합쳐 문장마다 내용 기반의 고정 키(procedure_key)를 가지며,
+    procedure_translations(선택)는 이 키로 언어별 문장을 지정합니다. 없으면 원문을 씁니다.
+
+사용법:
+    python patterns.py export builtin.json     # 내장 테이블을 팩 파일로 내보내기
+    python patterns.py compile pack.json       # 캐시 미리 생성 (배포 시)
+    python patterns.py procedures pack.json    # 절차 키 → 문장 목록 (번역 템플릿, JSON)
+"""
+import hashlib
+import json
+import marshal
+import os
+import sys
+from functools import lru_cache
+
+from fuzzy import DEFAULT_BUDGET, FuzzyMatcher
+from matcher import KeywordMatcher
+from normalize import keyword_variants, normalize_text, offset_map
+
+KEYWORD = 0    # 피싱 패턴 키워드
+PROCEDURE = 1  # 공식 절차 기관 키워드
+
+# 발화 매칭 결과 캐시: 사기 조직은 대본을 읽으므로 같은 문장이 여러 통화에 반복해서 들어옴
+# (프로세스 전체에서 공유하는 LRU, 크기는 환경 변수 CALLSHIELD_MATCH_CACHE로 조정, 0이면 끔)
+MATCH_CACHE_SIZE = int(os.environ.get("CALLSHIELD_MATCH_CACHE", "8192"))
+MAX_CACHED_LENGTH = 200  # 이보다 긴 발화는 반복될 가능성이 낮아 캐시하지 않음
+
+CACHE_SUFFIX = ".cspc"
+_CACHE_MAGIC = b"CSPATTERN6"  # 캐시 파일: 매직 + 팩 내용 SHA-256(hex 64바이트) + marshal 본문
+
+
+def procedure_key(text: str) -> str:
+    """절차 문장의 고정 키 (팩 버전·테이블 순서와 무관하게 같은 문장이면 같은 키)"""
+    return "P" + hashlib.sha1(text.encode("utf-8")).hexdigest()[:10]
+
+
+class PatternSet:
+    """컴파일된 패턴 테이블
+
+    키워드·카테고리·절차 문장을 테이블 순서대로 정수 ID로 등록하고, 키워드와 기관 키워드를
+    하나의 매칭기(matcher.KeywordMatcher)로 컴파일합니다. 세션은 이 ID만 보관합니다.
+    매칭기에는 정규화한 키워드의 변형들이 같은 ID로 들어가며, 발화도 같은 방식으로 정규화해 매칭합니다.
+    """
+
+    _FIELDS = (
+        "version", "phishing_patterns", "official_procedures",
+        "categories", "category_weights", "keyword_table", "keyword_category",
+        "procedure_orgs", "procedure_texts", "org_procedures",
+        "procedure_keys", "procedure_translations",
+    )
+
+    def __init__(self, version: str, phishing_patterns: dict, official_procedures: dict,
+                 procedure_translations: dict | None = None):
+        self.version = version
+        self.phishing_patterns = phishing_patterns
+        self.official_procedures = official_procedures
+        # 전역 정수 ID 테이블 (테이블 순서를 그대로 유지하므로 번호 순서 = 감지 결과 정렬 기준)
+        self.categories = list(phishing_patterns.keys())
+        self.category_weights = [phishing_patterns[c]["weight"] for c in self.categories]
+        self.keyword_table = [
+            (category, keyword)
+            for category, pattern_info in phishing_patterns.items()
+            for keyword in pattern_info["keywords"]
+        ]
+        category_ids = {category: cid for cid, category in enumerate(self.categories)}
+        self.keyword_category = [category_ids[category] for category, _ in self.keyword_table]
+        self.procedure_orgs = list(official_procedures.keys())
+        # 절차 문장은 기관 간 중복을 합쳐 한 번씩만 등록
+        self.procedure_texts = list(dict.fromkeys(
+            proc for procedures in official_procedures.values() for proc in procedures
+        ))
+        procedure_ids = {proc: pid for pid, proc in enumerate(self.procedure_texts)}
+        self.org_procedures = [
+            tuple(procedure_ids[proc] for proc in official_procedures[org])
+            for org in self.procedure_orgs
+        ]
+        # 언어별 문장은 고정 키로 보관하고 표시할 때만 찾음
+        self.procedure_keys = [procedure_key(proc) for proc in self.procedure_texts]
+        self.procedure_translations = procedure_translations or {}
+        self._index_procedures()
+        self.matcher = KeywordMatcher(
+            [(variant, (KEYWORD, idx))
+             for idx, (_, keyword) in enumerate(self.keyword_table)
+             for variant in keyword_variants(normalize_text(keyword))]
+            + [(variant, (PROCEDURE, idx))
+               for idx, org in enumerate(self.procedure_orgs)
+               for variant in keyword_variants(normalize_text(org))]
+        )
+        self._fuzzy = None
+
+    def _index_procedures(self):
+        # 기관별 절차 ID 집합 (비트셋): 발화마다 정수 연산만으로 새 절차 여부 판정
+        self.org_procedure_masks = [
+            sum(1 << pid for pid in set(pids)) for pids in self.org_procedures
+        ]
+
+    def procedure_text(self, pid: int, locale: str | None = None) -> str:
+        """절차 문장 (locale 번역이 없으면 원문)"""
+        if locale:
+            translated = self.procedure_translations.get(locale, {}).get(self.procedure_keys[pid])
+            if translated:
+                return translated
+        return self.procedure_texts[pid]
+
+    def scan(self, text: str, offsets: bool = False) -> list:
+        """text를 정규화해 매칭하고 [(시작 위치, 값), ...]를 시작 위치 순으로 반환
+
+        시작 위치는 정규화 텍스트 기준이며, offsets=True면 원문 기준으로 바꿔 반환합니다.
+        """
+        hits = self.scan_normalized(normalize_text(text))
+        if hits and offsets:
+            table = offset_map(text)
+            hits = [(table[start], value) for start, value in hits]
+        return hits
+
+    def scan_normalized(self, text: str) -> list:
+        """이미 정규화한 텍스트의 매칭 [(시작 위치, 값), ...] (여러 발화를 이어 붙여 한 번에 훑을 때)"""
+        return [(start, value) for start, _, value in self.matcher.scan(text)]
+
+    @property
+    def fuzzy(self) -> FuzzyMatcher:
+        """근사 매칭용 발음 키 매칭기 (처음 쓸 때 컴파일하며 캐시 파일에는 저장하지 않음)"""
+        if self._fuzzy is None:
+            self._fuzzy = FuzzyMatcher(
+                (variant, idx)
+                for idx, (_, keyword) in enumerate(self.keyword_table)
+                for variant in keyword_variants(normalize_text(keyword))
+            )
+        return self._fuzzy
+
+    def fuzzy_match(self, message: str, skip_ids: int = 0, budget: int = DEFAULT_BUDGET) -> list:
+        """음성 인식 오류로 비슷한 음절이 된 키워드: [(키워드 ID, 신뢰도 %), ...] (fuzzy.py 참고)"""
+        return self.fuzzy.search(normalize_text(message), skip_ids, budget)
+
+    def match(self, message: str) -> tuple[tuple, tuple]:
+        """한 번의 탐색으로 (키워드 ID들, 기관 ID들)을 테이블 순서로 반환
+
+        결과는 발화 텍스트에만 의존하므로 짧은 발화는 프로세스 공용 캐시에서 가져옵니다.
+        """
+        if len(message) <= MAX_CACHED_LENGTH:
+            return _cached_match(self, message)
+        return self._match(message)
+
+    def _match(self, message: str) -> tuple[tuple, tuple]:
+        keyword_ids, org_ids = self.split_values(self.matcher.values(normalize_text(message)))
+        return tuple(keyword_ids), tuple(org_ids)
+
+    @staticmethod
+    def split_hits(hits: list) -> tuple[list, list]:
+        """매칭 결과를 (키워드 ID들, 기관 ID들)로 나눠 테이블 순서로 정렬"""
+        return PatternSet.split_values({value for _, value in hits})
+
+    @staticmethod
+    def split_values(values) -> tuple[list, list]:
+        """매칭된 값 (종류, ID)들을 (키워드 ID들, 기관 ID들)로 나눠 테이블 순서로 정렬"""
+        keyword_ids = []
+        org_ids = []
+        for kind, idx in values:
+            (keyword_ids if kind == KEYWORD else org_ids).append(idx)
+        keyword_ids.sort()
+        org_ids.sort()
+        return keyword_ids, org_ids
+
+    def scan_message(self, message: str) -> dict:
+        """문장 내 모든 매칭을 위치와 함께 반환 (텍스트 순서)
+
+        - keywords: [(카테고리, 키워드, 시작 위치), ...]
+        - procedure_orgs: [(기관 키워드, 시작 위치), ...]
+        위치는 원문 기준입니다.
+        """
+        hits = self.scan(message, offsets=True)
+        keywords = []
+        procedure_orgs = []
+        for offset, (kind, idx) in sorted(hits, key=lambda hit: hit[0]):
+            if kind == KEYWORD:
+                category, keyword = self.keyword_table[idx]
+                keywords.append((category, keyword, offset))
+            else:
+                procedure_orgs.append((self.procedure_orgs[idx], offset))
+        return {"keywords": keywords, "procedure_orgs": procedure_orgs}
+
+    def to_state(self) -> tuple:
+        return tuple(getattr(self, name) for name in self._FIELDS) + (self.matcher.to_state(),)
+
+    @classmethod
+    def from_state(cls, state: tuple) -> "PatternSet":
+        """to_state() 결과에서 다시 컴파일 없이 복원"""
+        pattern_set = cls.__new__(cls)
+        for name, value in zip(cls._FIELDS, state):
+            setattr(pattern_set, name, value)
+        pattern_set.matcher = KeywordMatcher.from_state(state[-1])
+        pattern_set._fuzzy = None
+        pattern_set._index_procedures()
+        return pattern_set
+
+
+class PatternOverlay(PatternSet):
+    """기본 패턴 세트 위에 테넌트(제휴 통신사·은행)별 설정을 얹은 패턴 세트
+
+    기본 세트의 매칭기·테이블을 그대로 공유하고 테넌트마다 다음만 따로 보관합니다.
+    - keywords: 추가 키워드 {카테고리: [키워드, ...]} → 추가분만 작은 매칭기로 컴파일,
+      키워드 ID는 기본 세트 키워드 다음 번호부터 부여
+    - weights: 카테고리 가중치 변경 {카테고리: 가중치}
+    - disabled: 끄는 카테고리 이름들 (매칭 결과에서 제외, 카테고리 ID는 그대로 유지)
+    기본 세트의 매칭 결과(공용 매칭 캐시 포함)에 마스크를 적용하고 추가분 결과를 이어 붙이므로,
+    테넌트를 추가해도 다른 세션의 매칭 경로는 바뀌지 않습니다.
+    """
+
+    def __init__(self, base: PatternSet, tenant: str, keywords: dict | None = None,
+                 weights: dict | None = None, disabled=()):
+        keywords = keywords or {}
+        weights = weights or {}
+        for category in (*keywords, *weights, *disabled):
+            if category not in base.phishing_patterns:
+                raise ValueError(f"테넌트 '{tenant}': 알 수 없는 카테고리 '{category}'")
+        for category, weight in weights.items():
+            if not isinstance(weight, int):
+                raise ValueError(f"테넌트 '{tenant}': 카테고리 '{category}'의 weight는 정수여야 합니다")
+        for category, extra in keywords.items():
+            if not all(isinstance(k, str) and k for k in extra):
+                raise ValueError(f"테넌트 '{tenant}': 카테고리 '{category}'의 키워드는 빈 문자열이 아닌 문자열이어야 합니다")
+
+        self.base = base
+        self.tenant = tenant
+        self.version = f"{base.version}+{tenant}"
+        # 기본 세트와 같은 테이블은 참조만 공유
+        for name in ("categories", "procedure_orgs", "procedure_texts", "org_procedures",
+                     "procedure_keys", "procedure_translations", "org_procedure_masks", "matcher"):
+            setattr(self, name, getattr(base, name))
+        category_ids = {category: cid for cid, category in enumerate(base.categories)}
+        self.category_weights = [
+            weights.get(category, weight) for category, weight in zip(base.categories, base.category_weights)
+        ]
+
+        # 추가 키워드 (기본 세트의 같은 카테고리에 이미 있는 키워드는 건너뜀)
+        extra_patterns = {}
+        for category, extra in keywords.items():
+            existing = set(base.phishing_patterns[category]["keywords"])
+            extra = [k for k in dict.fromkeys(extra) if k not in existing]
+            if extra:
+                extra_patterns[category] = dict(base.phishing_patterns[category], keywords=extra)
+        self._extra = PatternSet(self.version, extra_patterns, {}) if extra_patterns else None
+        self.keyword_table = base.keyword_table + (self._extra.keyword_table if self._extra else [])
+        self.keyword_category = [category_ids[category] for category, _ in self.keyword_table]
+        self._extra_offset = len(base.keyword_table)
+
+        self.phishing_patterns = {
+            category: info if category not in weights and category not in extra_patterns else dict(
+                info,
+                weight=weights.get(category, info["weight"]),
+                keywords=info["keywords"] + extra_patterns.get(category, {}).get("keywords", []),
+            )
+            for category, info in base.phishing_patterns.items()
+        }
+        self.official_procedures = base.official_procedures
+        # 꺼진 카테고리의 기본 세트 키워드 ID (추가 키워드는 꺼진 카테고리에 둘 수 없음)
+        disabled_ids = {category_ids[category] for category in disabled}
+        if disabled_ids & {category_ids[category] for category in extra_patterns}:
+            raise ValueError(f"테넌트 '{tenant}': 꺼진 카테고리에는 키워드를 추가할 수 없습니다")
+        self._disabled = frozenset(
+            idx for idx, cid in enumerate(base.keyword_category) if cid in disabled_ids
+        )
+        self._fuzzy = None
+
+    def scan(self, text: str, offsets: bool = False) -> list:
+        """PatternSet.scan과 같음 (추가 키워드 매칭은 기본 세트 매칭 뒤에 이어 붙임)"""
+        hits = self.base.scan(text, offsets)
+        if self._disabled:
+            hits = [hit for hit in hits if hit[1][0] != KEYWORD or hit[1][1] not in self._disabled]
+        if self._extra is not None:
+            offset = self._extra_offset
+            hits += [(start, (KEYWORD, offset + idx)) for start, (_, idx) in self._extra.scan(text, offsets)]
+        return hits
+
+    def scan_normalized(self, text: str) -> list:
+        hits = self.base.scan_normalized(text)
+        if self._disabled:
+            hits = [hit for hit in hits if hit[1][0] != KEYWORD or hit[1][1] not in self._disabled]
+        if self._extra is not None:
+            offset = self._extra_offset
+            hits += [(start, (KEYWORD, offset + idx)) for start, (_, idx) in self._extra.scan_normalized(text)]
+        return hits
+
+    def match(self, message: str) -> tuple[tuple, tuple]:
+        keyword_ids, org_ids = self.base.match(message)
+        if self._disabled:
+            keyword_ids = tuple(idx for idx in keyword_ids if idx not in self._disabled)
+        if self._extra is not None:
+            extra_ids, _ = self._extra.match(message)
+            if extra_ids:
+                offset = self._extra_offset
+                keyword_ids += tuple(offset + idx for idx in extra_ids)
+        return keyword_ids, org_ids
+
+    def fuzzy_match(self, message: str, skip_ids: int = 0, budget: int = DEFAULT_BUDGET) -> list:
+        hits = [
+            hit for hit in self.base.fuzzy_match(message, skip_ids, budget)
+            if hit[0] not in self._disabled
+        ]
+        if self._extra is not None:
+            offset = self._extra_offset
+            hits += [
+                (offset + idx, confidence)
+                for idx, confidence in self._extra.fuzzy_match(message, skip_ids >> offset, budget)
+            ]
+        return hits
+
+    def to_state(self) -> tuple:
+        raise TypeError("PatternOverlay는 캐시 파일로 저장하지 않습니다 (기본 세트만 저장)")
+
+
+# ============================================================
+# 발화 매칭 캐시
+# ============================================================
+# 키는 (패턴 세트, 발화): 패턴 세트는 읽기 전용이고 동일성으로 구분되므로
+# 팩을 교체하면 새 세트의 결과는 자연히 따로 쌓이고 이전 세트의 항목은 LRU로 밀려남
+_cached_match = lru_cache(maxsize=MATCH_CACHE_SIZE)(PatternSet._match)
+
+
+def configure_match_cache(maxsize: int):
+    """매칭 캐시 크기 변경 (기존 항목과 통계는 비워짐, 0이면 캐시 사용 안 함)"""
+    global _cached_match
+    _cached_match = lru_cache(maxsize=maxsize)(PatternSet._match)
+
+
+def clear_match_cache():
+    _cached_match.cache_clear()
+
+
+def match_cache_info() -> dict:
+    """매칭 캐시 통계: 적중·미스 횟수, 적중률, 현재·최대 항목 수"""
+    info = _cached_match.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0,
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+    }
+
+
+# ============================================================
+# 팩 파일 로드·검증·캐시
+# ============================================================
+def validate(data: dict):
+    """팩 내용 검증 (문제가 있으면 ValueError)"""
+    if not isinstance(data, dict) or not isinstance(data.get("version"), str):
+        raise ValueError("패턴 팩에는 문자열 version이 필요합니다")
+    phishing_patterns = data.get("phishing_patterns")
+    if not isinstance(phishing_patterns, dict) or not phishing_patterns:
+        raise ValueError("phishing_patterns가 비어 있거나 딕셔너리가 아닙니다")
+    for category, info in phishing_patterns.items():
+        for field in ("keywords", "weight", "label", "description"):
+            if field not in info:
+                raise ValueError(f"카테고리 '{category}'에 {field}가 없습니다")
+        if not all(isinstance(k, str) and k for k in info["keywords"]):
+            raise ValueError(f"카테고리 '{category}'의 키워드는 빈 문자열이 아닌 문자열이어야 합니다")
+        if not isinstance(info["weight"], int):
+            raise ValueError(f"카테고리 '{category}'의 weight는 정수여야 합니다")
+    official_procedures = data.get("official_procedures", {})
+    if not isinstance(official_procedures, dict) or not all(
+        isinstance(v, list) for v in official_procedures.values()
+    ):
+        raise ValueError("official_procedures는 {기관: [절차 문장, ...]} 형식이어야 합니다")
+    translations = data.get("procedure_translations", {})
+    if not isinstance(translations, dict) or not all(
+        isinstance(table, dict) and all(isinstance(v, str) for v in table.values())
+        for table in translations.values()
+    ):
+        raise ValueError("procedure_translations는 {언어: {절차 키: 문장, ...}} 형식이어야 합니다")
+
+
+def load_pack(path: str, cache_dir: str | None = None) -> PatternSet:
+    """팩 파일을 로드 (내용 해시가 같은 캐시가 있으면 컴파일 없이 캐시에서 복원)
+
+    캐시는 cache_dir(기본: 팩 파일과 같은 폴더)에 "<팩 파일명>.cspc"로 저장합니다.
+    캐시를 쓸 수 없는 환경이면 캐시 없이 컴파일만 합니다.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    cache_path = os.path.join(
+        cache_dir or os.path.dirname(os.path.abspath(path)),
+        os.path.basename(path) + CACHE_SUFFIX,
+    )
+
+    header = _CACHE_MAGIC + digest.encode("ascii")
+    try:
+        with open(cache_path, "rb") as f:
+            if f.read(len(header)) == header:
+                # 파일 객체에서 직접 marshal.load하면 훨씬 느리므로 한 번에 읽어서 복원
+                return PatternSet.from_state(marshal.loads(f.read()))
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    data = json.loads(raw)
+    validate(data)
+    pattern_set = PatternSet(
+        data["version"], data["phishing_patterns"], data.get("official_procedures", {}),
+        data.get("procedure_translations"),
+    )
+    try:
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(marshal.dumps(pattern_set.to_state()))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return pattern_set
+
+
+def export_pack(path: str, version: str, phishing_patterns: dict, official_procedures: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": version,
+            "phishing_patterns": phishing_patterns,
+            "official_procedures": official_procedures,
+        }, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) == 2 and argv[0] == "export":
+        from detector import OFFICIAL_PROCEDURES, PHISHING_PATTERNS
+        export_pack(argv[1], "builtin", PHISHING_PATTERNS, OFFICIAL_PROCEDURES)
+        print(f"내장 패턴 내보내기: {argv[1]}")
+    elif len(argv) == 2 and argv[0] == "compile":
+        pattern_set = load_pack(argv[1])
+        print(f"패턴 팩 {pattern_set.version}: 키워드 {len(pattern_set.keyword_table)}개, "
+              f"기관 {len(pattern_set.procedure_orgs)}개 컴파일 완료")
+    elif len(argv) == 2 and argv[0] == "procedures":
+        pattern_set = load_pack(argv[1])
+        json.dump(dict(zip(pattern_set.procedure_keys, pattern_set.procedure_texts)),
+                  sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print(__doc__.strip().split("사용법:")[1])
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+CallShield 전화번호 정규화
+- 표기가 다른 같은 번호("02-1234-5678", "0212345678", "+82-2-1234-5678")를 하나의 정규형으로
+- 번호 대역 표기("070-1234-XXXX")를 (접두 번호, 와일드카드 자릿수)로 해석
+- 정규형 번호를 정렬 가능한 정수 키로 변환 (인덱스 조회용)
+"""
+import unicodedata
+
+_SEPARATORS = set(" -.()/")
+_WILDCARDS = set("Xx*?")
+MAX_DIGITS = 18
+
+
+def _digits(text: str) -> str:
+    return "".join(ch for ch in text if "0" <= ch <= "9")
+
+
+def normalize_number(raw: str) -> str | None:
+    """번호를 정규형으로 변환 (해석할 수 없으면 None)
+
+    - 국내 번호: 숫자만 남긴 국내 표기 ("+82-2-1234-5678" → "0212345678")
+    - 해외 번호: "+국가번호..." ("+1-202-555-0100" → "+12025550100")
+    """
+    text = unicodedata.normalize("NFKC", raw).strip()
+    digits = _digits(text)
+    if text.startswith("+"):
+        national = digits[2:] if digits.startswith("82") else None
+    elif digits.startswith("0082"):
+        national = digits[4:]
+    else:
+        national = digits
+        digits = ""
+
+    if national is not None:
+        # +82 뒤의 지역번호 앞 0은 생략되므로 국내 표기로 되돌림 ("+82-(0)2-..."도 허용)
+        # 단, 대표번호(15xx·16xx·18xx-xxxx)는 원래 0으로 시작하지 않음
+        if digits:
+            national = national.lstrip("0")
+            if national and not (len(national) == 8 and national[0] == "1"):
+                national = "0" + national
+        if not national or len(national) > MAX_DIGITS:
+            return None
+        return national
+    if not digits or len(digits) > MAX_DIGITS:
+        return None
+    return "+" + digits
+
+
+def parse_block(pattern: str) -> tuple[str, int] | None:
+    """대역 표기를 (정규형 접두 번호, 와일드카드 자릿수)로 해석 (대역이 아니면 None)
+
+    "070-1234-XXXX" → ("0701234", 4). 와일드카드는 끝자리에만 올 수 있습니다.
+    """
+    text = "".join(
+        ch for ch in unicodedata.normalize("NFKC", pattern).strip() if ch not in _SEPARATORS
+    )
+    head = text.rstrip("".join(_WILDCARDS))
+    width = len(text) - len(head)
+    if width == 0 or any(ch in _WILDCARDS for ch in head):
+        return None
+    prefix = normalize_number(head)
+    if prefix is None or len(_digits(prefix)) + width > MAX_DIGITS:
+        return None
+    return prefix, width
+
+
+def number_key(number: str) -> int:
+    """정규형 번호를 정수 키로 변환
+
+    선행 자리(국내 1, 해외 2)를 붙여 앞자리 0을 보존하고, 자릿수가 같은 번호끼리는
+    숫자 순서대로 정렬되도록 합니다.
+    """
+    if number.startswith("+"):
+        return int("2" + number[1:])
+    return int("1" + number)
+
+
+def key_to_number(key: int) -> str:
+    """number_key의 역변환"""
+    text = str(key)
+    return ("+" if text[0] == "2" else "") + text[1:]
+
+
+def block_range(prefix: str, width: int) -> tuple[int, int]:
+    """대역의 (시작 키, 끝 키) — 같은 자릿수의 번호만 포함"""
+    return number_key(prefix + "0" * width), number_key(prefix + "9" * width)
+
+
+def block_label(start: int, end: int) -> str:
+    """구간 키를 다시 "0701234XXXX" 형태의 대역 표기로"""
+    first, last = key_to_number(start), key_to_number(end)
+    common = 0
+    while common < len(first) and first[common] == last[common]:
+        common += 1
+    return first[:common] + "X" * (len(first) - common)
@@ -0,0 +1,160 @@
+"""
+CallShield 저장된 통화의 턴별 위험도 궤적 계산 (분석·가중치 튜닝용)
+- 통화 녹취를 턴 × 키워드 매칭 행렬로 변환한 뒤, 누적 감지 상태와 턴별 위험도를
+  NumPy 배열 연산으로 모든 턴에 대해 한 번에 계산
+- 매칭도 발화마다 하지 않고 모든 발화를 이어 붙여 매칭기로 한 번에 훑음
+- 결과는 analyze_message를 턴마다 재생했을 때의 risk_score·위험 등급과 정확히 같음
+  (CallShieldDetector._recalculate_risk·_get_risk_level과 같은 규칙, 정확 매칭 기준)
+- 여러 통화를 이어 붙인 행렬도 통화 경계에서 누적 상태를 초기화하며 한 번에 처리
+
+사용법:
+    python replay.py calls.jsonl -o trajectories.jsonl
+    (입력 형식은 batch.py와 같음: {"call_id": ..., "utterances": [...]})
+"""
+import argparse
+import json
+import sys
+from itertools import islice
+
+import numpy as np
+
+from detector import active_patterns
+from normalize import TURN_SEPARATOR, normalize_text
+from patterns import KEYWORD, PatternSet
+
+LEVELS = ("safe", "caution", "high", "critical")
+_LEVEL_THRESHOLDS = np.array([20, 50, 80])  # _get_risk_level의 등급 경계 (이상이면 다음 등급)
+
+
+def hit_matrix(utterances, patterns: PatternSet | None = None) -> np.ndarray:
+    """발화 목록을 (턴 수, 키워드 수) bool 매칭 행렬로
+
+    정규화한 발화를 TURN_SEPARATOR(normalize.py)로 이어 붙여 매칭기로 한 번만 훑고, 매칭 시작 위치로
+    턴을 찾아 행렬에 채웁니다 (발화마다 매칭기를 부르는 파이썬 호출 비용이 턴 수에 비례하지 않음).
+    """
+    ps = patterns or active_patterns()
+    hits = np.zeros((len(utterances), len(ps.keyword_table)), dtype=bool)
+    if not utterances:
+        return hits
+    texts = [normalize_text(message) for message in utterances]
+    keyword_hits = [(start, idx) for start, (kind, idx) in ps.scan_normalized(TURN_SEPARATOR.join(texts))
+                    if kind == KEYWORD]
+    if keyword_hits:
+        starts, keyword_ids = np.array(keyword_hits, dtype=np.int64).T
+        # 턴 i는 [ends[i-1], ends[i]) 구간 (구분자 포함)
+        ends = np.cumsum([len(text) + len(TURN_SEPARATOR) for text in texts])
+        hits[np.searchsorted(ends, starts, side="right"), keyword_ids] = True
+    return hits
+
+
+def risk_trajectory(hits: np.ndarray, patterns: PatternSet | None = None,
+                    lengths=None) -> np.ndarray:
+    """턴별 위험도 (0~100, int)
+
+    hits: hit_matrix() 결과. 여러 통화를 이어 붙였다면 lengths에 통화별 턴 수를 넘기세요.
+    """
+    ps = patterns or active_patterns()
+    if hits.shape[0] == 0:
+        return np.zeros(0, dtype=np.int32)
+    # 누적 감지 상태: 통화 시작 이후 한 번이라도 매칭된 키워드
+    seen = np.cumsum(hits, axis=0, dtype=np.int32)
+    if lengths is not None and len(lengths) > 1:
+        # 통화별로 직전 통화까지의 누적값을 빼서 통화 경계에서 초기화
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        offsets = np.where((starts > 0)[:, None], seen[starts - 1], 0)
+        seen -= np.repeat(offsets, lengths, axis=0)
+    seen = seen > 0
+
+    # 카테고리별 감지 키워드 수 (턴 × 카테고리, 값이 작아 float32 행렬곱으로도 정확)
+    membership = np.zeros((hits.shape[1], len(ps.categories)), dtype=np.float32)
+    membership[np.arange(hits.shape[1]), ps.keyword_category] = 1
+    counts = (seen.astype(np.float32) @ membership).astype(np.int32)
+
+    detected = counts > 0
+    weights = np.array(ps.category_weights, dtype=np.int32)
+    # 첫 키워드는 기본 가중치, 추가 키워드마다 5점씩 (3개까지)
+    category_scores = np.where(detected, weights + np.minimum(counts - 1, 3) * 5, 0)
+    scores = category_scores.sum(axis=1)
+    # 복합 패턴 보너스
+    num_categories = detected.sum(axis=1)
+    scores += np.where(num_categories >= 3, 15, np.where(num_categories >= 2, 10, 0))
+    return np.minimum(scores, 100)
+
+
+def risk_levels(scores: np.ndarray) -> np.ndarray:
+    """위험도 → 등급 번호 (LEVELS의 인덱스: 0 safe, 1 caution, 2 high, 3 critical)"""
+    return np.searchsorted(_LEVEL_THRESHOLDS, scores, side="right")
+
+
+def replay(utterances, patterns: PatternSet | None = None) -> dict:
+    """통화 하나의 턴별 위험도·등급"""
+    scores = risk_trajectory(hit_matrix(utterances, patterns), patterns)
+    return {
+        "risk_scores": scores.tolist(),
+        "risk_levels": [LEVELS[code] for code in risk_levels(scores)],
+    }
+
+
+def replay_calls(calls, patterns: PatternSet | None = None):
+    """(call_id, 발화 목록)들을 하나의 행렬로 묶어 계산하고 통화별 결과를 생성"""
+    calls = list(calls)
+    lengths = [len(utterances) for _, utterances in calls]
+    utterances = [message for _, messages in calls for message in messages]
+    scores = risk_trajectory(hit_matrix(utterances, patterns), patterns, lengths)
+    levels = risk_levels(scores)
+    start = 0
+    for (call_id, _), length in zip(calls, lengths):
+        end = start + length
+        yield {
+            "call_id": call_id,
+            "risk_scores": scores[start:end].tolist(),
+            "risk_levels": [LEVELS[code] for code in levels[start:end]],
+        }
+        start = end
+
+
+def _parse_call(line: str) -> tuple:
+    """입력 한 줄 → (call_id, 발화 목록)"""
+    call = json.loads(line)
+    utterances = call["utterances"]
+    if not isinstance(utterances, list) or not all(isinstance(message, str) for message in utterances):
+        raise TypeError("utterances는 문자열 목록이어야 합니다")
+    return call["call_id"], utterances
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CallShield 턴별 위험도 궤적 계산")
+    parser.add_argument("input", help="입력 JSONL 경로 ('-'이면 표준 입력)")
+    parser.add_argument("-o", "--output", default="-", help="출력 JSONL 경로 (기본: 표준 출력)")
+    parser.add_argument("--block-size", type=int, default=10000, help="한 번에 행렬로 묶는 통화 수")
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        numbered = ((line_no, line) for line_no, line in enumerate(src, 1) if line.strip())
+        while True:
+            block = list(islice(numbered, args.block_size))
+            if not block:
+                break
+            # 잘못된 줄은 batch.py처럼 오류 레코드로 남기고 나머지 통화는 그대로 계산
+            calls = {}
+            errors = {}
+            for line_no, line in block:
+                try:
+                    calls[line_no] = _parse_call(line)
+                except (ValueError, KeyError, TypeError) as e:
+                    errors[line_no] = {"type": "error", "line": line_no, "error": f"{type(e).__name__}: {e}"}
+            records = dict(zip(calls, replay_calls(calls.values())))
+            for line_no, _ in block:
+                record = errors[line_no] if line_no in errors else records[line_no]
+                dst.write(json.dumps(record, ensure_ascii=False) + "\n")
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+
+
+if __name__ == "__main__":
+    main()
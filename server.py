@@ -0,0 +1,671 @@
+"""
+CallShield 분석 서버 (asyncio, 표준 라이브러리만 사용)
+- 통화 ID별 CallShieldDetector 세션 수천 개를 스레드 없이 한 프로세스에서 호스팅
+- 세션별 크기 제한 입력 큐, 유휴 세션 자동 정리
+- 세션의 현재 위험 등급 순으로 처리하는 스케줄러 (오래 기다린 발화는 에이징으로 먼저),
+  과부하 시 safe 세션부터 합치기·거절
+- HTTP(JSON)로 발화 입력·요약 조회, WebSocket으로 발화 입력·경보 푸시
+- (--campaigns) 통화를 피싱 대본 캠페인으로 묶고, 피싱 캠페인에 배정된 통화의 위험도를 가산
+
+엔드포인트:
+    POST   /calls/{call_id}/messages   {"text": "...", "tenant": "...", "caller": "..."} → 분석 결과
+                                       (세션 큐가 가득 차면 429, 과부하로 거절하면 503)
+                                       (tenant·caller는 선택, 세션을 만드는 첫 발화에서만 적용,
+                                        caller는 발신 번호로 번호 평판을 위험도 시작값에 반영)
+    GET    /calls/{call_id}?locale=en  현재까지의 요약 (locale: 공식 절차 문장 언어, 선택)
+    DELETE /calls/{call_id}            세션 종료
+    GET    /health                     세션 수 등 서버 상태
+    GET    /metrics                    Prometheus 텍스트 형식 지표 (--metrics로 계측 활성화)
+    GET    /ws/{call_id}?tenant=...&caller=...  WebSocket: 텍스트 프레임으로 발화 전송, 결과·경보 수신
+
+사용법:
+    python server.py --port 8765 --idle-timeout 300 --queue-size 64 --metrics
+    python server.py --patterns pack.json     # SIGHUP을 받으면 같은 경로의 패턴 팩을 다시 로드
+    python server.py --tenants tenants.json   # 테넌트별 추가 키워드·가중치·꺼진 카테고리
+    python server.py --caller-cache 65536 --caller-ttl 300  # 발신 번호 평판 캐시 크기·유효 시간(초)
+    python server.py --campaigns --campaign-threshold 0.4   # 캠페인 군집화 (campaigns.py)
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import signal
+import struct
+import sys
+import time
+from collections import deque
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import detector
+import metrics
+import patterns
+from campaigns import CampaignIndex
+from detector import CallShieldDetector
+from normalize import TURN_SEPARATOR
+
+MAX_BODY = 64 * 1024            # 요청 본문·WebSocket 메시지 최대 크기
+MAX_SUBSCRIBER_BUFFER = 1 << 20  # 이보다 밀린 WebSocket 구독자는 끊음
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_STATUS_TEXT = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 429: "Too Many Requests", 503: "Service Unavailable",
+}
+
+
+class SessionLimitError(Exception):
+    """동시 세션 수 상한 초과"""
+
+
+class SessionClosedError(Exception):
+    """처리 대기 중 세션이 종료됨"""
+
+
+class LoadShedError(Exception):
+    """과부하로 safe 등급 세션의 발화를 거절함"""
+
+
+class UnknownTenantError(Exception):
+    """등록되지 않은 테넌트"""
+
+
+class _BadRequest(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ============================================================
+# 1. 세션 관리
+# ============================================================
+# 위험 등급별 처리 우선순위 (작을수록 먼저): _get_risk_level과 같은 경계
+PRIORITY_LEVELS = ("critical", "high", "caution", "safe")
+_SAFE = 3
+_COALESCE_FROM = 2  # 이 우선순위 이상(caution·safe) 세션은 과부하 시 대기 발화를 합쳐서 분석
+
+
+def _priority(risk_score: int) -> int:
+    if risk_score >= 80:
+        return 0
+    if risk_score >= 50:
+        return 1
+    return 2 if risk_score >= 20 else 3
+
+
+class _Session:
+    def __init__(self, call_id: str, queue_size: int, fuzzy: bool = False,
+                 tenant: str | None = None, caller: str | None = None):
+        self.call_id = call_id
+        self.detector = CallShieldDetector(keep_conversation=False, fuzzy=fuzzy, tenant=tenant,
+                                           caller=caller)
+        self.queue_size = queue_size
+        self.pending = deque()        # [발화, 결과 future 목록, 도착 시각] 대기열
+        self.scheduled = False        # 스케줄러 대기열에 올라가 있는지
+        self.closed = False
+        self.subscribers = set()      # 경보를 받을 WebSocket writer
+        self.last_active = time.monotonic()
+
+    @property
+    def priority(self) -> int:
+        return _priority(self.detector.risk_score)
+
+
+class SessionManager:
+    """통화 ID별 탐지 세션 모음
+
+    모든 세션의 발화를 스케줄러 하나가 세션의 현재 위험 등급 순(critical → safe)으로 처리하며,
+    같은 등급 안에서는 세션을 돌아가며 한 발화씩 처리합니다.
+    - 낮은 등급이 굶지 않도록, 맨 앞 발화가 max_wait(초) 이상 기다린 등급이 있으면
+      그중 가장 오래 기다린 세션을 등급과 관계없이 먼저 처리 (에이징)
+    - 세션 큐가 가득 차면 submit()이 asyncio.QueueFull을 던짐 (호출자가 되돌려 보냄)
+    - 전체 대기 발화가 max_pending × coalesce_at 이상이면 caution·safe 세션의 새 발화는
+      아직 처리되지 않은 직전 발화에 이어 붙여 한 번에 분석 (결과에 coalesced 표시)
+    - 전체 대기 발화가 max_pending 이상이면 safe 세션의 새 발화는 LoadShedError로 거절
+      (high·critical 세션은 세션 큐 한도까지 계속 받음)
+    """
+
+    def __init__(self, idle_timeout: float = 300.0, queue_size: int = 64,
+                 max_sessions: int = 10000, fuzzy: bool = False,
+                 max_pending: int = 10000, coalesce_at: float = 0.5, max_wait: float = 0.5,
+                 campaigns: CampaignIndex | None = None):
+        self.idle_timeout = idle_timeout
+        self.queue_size = queue_size
+        self.max_sessions = max_sessions
+        self.fuzzy = fuzzy  # 새 세션의 근사 매칭 사용 여부
+        self.max_pending = max_pending
+        self.coalesce_at = coalesce_at
+        self.max_wait = max_wait
+        self.campaigns = campaigns  # 캠페인 군집화 색인 (없으면 사용 안 함)
+        self.sessions = {}
+        self.evicted = 0
+        self.pending = 0    # 전체 대기 발화 수
+        self.shed = 0       # 과부하로 거절한 발화 수
+        self.coalesced = 0  # 과부하로 합쳐서 분석한 발화 수
+        self._ready = [deque() for _ in PRIORITY_LEVELS]  # 우선순위별 처리 대기 세션
+        self._wakeup = None
+        self._scheduler = None
+
+    def get(self, call_id: str, create: bool = True, tenant: str | None = None,
+            caller: str | None = None) -> _Session | None:
+        """세션 조회 (없으면 생성, tenant·caller는 새로 만들 때만 적용)"""
+        session = self.sessions.get(call_id)
+        if session is None and create:
+            if len(self.sessions) >= self.max_sessions:
+                raise SessionLimitError(call_id)
+            try:
+                session = _Session(call_id, self.queue_size, self.fuzzy, tenant, caller)
+            except KeyError:
+                raise UnknownTenantError(tenant) from None
+            if self._scheduler is None:
+                self._wakeup = asyncio.Event()
+                self._scheduler = asyncio.create_task(self._run())
+            self.sessions[call_id] = session
+            metrics.ACTIVE_SESSIONS.set(len(self.sessions))
+        return session
+
+    async def submit(self, call_id: str, text: str, tenant: str | None = None,
+                     caller: str | None = None) -> dict:
+        """발화를 세션 큐에 넣고 분석 결과를 기다림"""
+        session = self.get(call_id, tenant=tenant, caller=caller)
+        future = asyncio.get_running_loop().create_future()
+        session.last_active = time.monotonic()
+        priority = session.priority
+        if (priority >= _COALESCE_FROM and session.pending
+                and self.pending >= self.max_pending * self.coalesce_at
+                and len(session.pending[-1][0]) + len(text) < MAX_BODY):
+            # 과부하: 아직 처리되지 않은 직전 발화에 이어 붙임 (대기 발화 수는 늘지 않음)
+            # 발화 경계 문자로 이어 붙여 키워드가 두 발화에 걸쳐 잡히지 않게 함
+            entry = session.pending[-1]
+            entry[0] += TURN_SEPARATOR + text
+            entry[1].append(future)
+            self.coalesced += 1
+            metrics.COALESCED_TURNS.inc(PRIORITY_LEVELS[priority])
+            return await future
+        if priority == _SAFE and self.pending >= self.max_pending:
+            self.shed += 1
+            metrics.SHED_TURNS.inc(PRIORITY_LEVELS[priority])
+            raise LoadShedError(call_id)
+        if len(session.pending) >= session.queue_size:
+            raise asyncio.QueueFull
+        session.pending.append([text, [future], time.monotonic()])
+        self.pending += 1
+        if not session.scheduled:
+            session.scheduled = True
+            self._ready[priority].append(session)
+            self._wakeup.set()
+        return await future
+
+    def _next_session(self) -> _Session | None:
+        # 종료된 세션은 꺼낼 때 버림
+        for ready in self._ready:
+            while ready and ready[0].closed:
+                ready.popleft()
+        # 에이징: 맨 앞 발화가 max_wait 이상 기다린 등급 중 가장 오래 기다린 쪽
+        deadline = time.monotonic() - self.max_wait
+        aged = [ready for ready in self._ready if ready and ready[0].pending[0][2] < deadline]
+        if aged:
+            return min(aged, key=lambda ready: ready[0].pending[0][2]).popleft()
+        for ready in self._ready:
+            if ready:
+                return ready.popleft()
+        return None
+
+    async def _run(self):
+        """스케줄러: 가장 높은 등급의 세션부터 한 발화씩 처리 (오래 기다린 발화는 에이징으로 먼저)"""
+        while True:
+            session = self._next_session()
+            if session is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            text, futures, queued_at = session.pending.popleft()
+            self.pending -= 1
+            if metrics.ENABLED:
+                metrics.QUEUE_WAIT_SECONDS.observe(
+                    time.monotonic() - queued_at, PRIORITY_LEVELS[session.priority],
+                )
+            self._process(session, text, futures)
+            # 처리 후 바뀐 위험 등급으로 다시 줄을 섬
+            if session.pending:
+                self._ready[session.priority].append(session)
+            else:
+                session.scheduled = False
+            # 새로 들어온 발화(특히 high·critical 세션)가 끼어들 수 있도록 한 발화마다 양보
+            await asyncio.sleep(0)
+
+    def _process(self, session: _Session, text: str, futures: list):
+        campaign = None
+        try:
+            if self.campaigns is not None:
+                # 분석 전에 캠페인 배정을 갱신해 이번 결과부터 가산점이 반영되게 함
+                campaign = self.campaigns.observe(session.call_id, text)
+                if campaign is not None and campaign["boost"]:
+                    session.detector.set_campaign(campaign["campaign"], campaign["boost"])
+            result = session.detector.analyze_message(text, delta_only=True)
+            if self.campaigns is not None:
+                self.campaigns.report(session.call_id, session.detector.content_score)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        result["call_id"] = session.call_id
+        if campaign is not None:
+            result["campaign"] = campaign
+        if len(futures) > 1:
+            result["coalesced"] = len(futures)
+            result["message"] = text.replace(TURN_SEPARATOR, "\n")
+        session.last_active = time.monotonic()
+        if result["new_detections"] or result["new_procedures"]:
+            self.publish(session, dict(result, type="alert"))
+        for future in futures:
+            if not future.done():
+                future.set_result(result)
+
+    def publish(self, session: _Session, event: dict):
+        """세션 구독자 전체에 이벤트 푸시 (너무 밀린 구독자는 끊음)"""
+        if not session.subscribers:
+            return
+        frame = _ws_frame(0x1, json.dumps(event, ensure_ascii=False).encode("utf-8"))
+        for writer in list(session.subscribers):
+            if writer.transport.get_write_buffer_size() > MAX_SUBSCRIBER_BUFFER:
+                session.subscribers.discard(writer)
+                writer.close()
+                continue
+            writer.write(frame)
+
+    def close(self, call_id: str) -> dict | None:
+        """세션 종료: 마지막 요약을 구독자에게 알리고 반환"""
+        session = self.sessions.pop(call_id, None)
+        if session is None:
+            return None
+        metrics.ACTIVE_SESSIONS.set(len(self.sessions))
+        if self.campaigns is not None:
+            self.campaigns.end(call_id)
+        session.closed = True  # 스케줄러 대기열에서는 꺼낼 때 건너뜀
+        self.pending -= len(session.pending)
+        for _, futures, _ in session.pending:
+            for future in futures:
+                # 기다리던 요청이 먼저 취소됐을 수 있음 (클라이언트 연결 끊김 등)
+                if not future.done():
+                    future.set_exception(SessionClosedError(call_id))
+        session.pending.clear()
+        summary = dict(session.detector.get_summary(), call_id=call_id)
+        self.publish(session, dict(summary, type="ended"))
+        for writer in session.subscribers:
+            writer.write(_ws_frame(0x8, struct.pack("!H", 1000)))
+            writer.close()
+        session.subscribers.clear()
+        return summary
+
+    def evict_idle(self) -> int:
+        """idle_timeout 동안 입력도 구독자도 없는 세션 정리"""
+        deadline = time.monotonic() - self.idle_timeout
+        idle = [
+            call_id for call_id, session in self.sessions.items()
+            if session.last_active < deadline and not session.pending and not session.subscribers
+        ]
+        for call_id in idle:
+            self.close(call_id)
+        self.evicted += len(idle)
+        return len(idle)
+
+    async def evict_forever(self, interval: float = 5.0):
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+    def queue_depths(self) -> dict:
+        """위험 등급별 대기 발화 수 (현재 등급 기준)"""
+        depths = dict.fromkeys(PRIORITY_LEVELS, 0)
+        for session in self.sessions.values():
+            if session.pending:
+                depths[PRIORITY_LEVELS[session.priority]] += len(session.pending)
+        return depths
+
+    def update_metrics(self):
+        """대기열 게이지 갱신 (지표 조회 시 호출)"""
+        for level, depth in self.queue_depths().items():
+            metrics.QUEUE_DEPTH.set(depth, level)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self.sessions),
+            "queued": self.pending,
+            "queued_by_level": self.queue_depths(),
+            "shed": self.shed,
+            "coalesced": self.coalesced,
+            "subscribers": sum(len(s.subscribers) for s in self.sessions.values()),
+            "evicted": self.evicted,
+            "match_cache": patterns.match_cache_info(),
+            "caller_cache": detector.caller_cache_info(),
+            **({"campaigns": self.campaigns.stats()} if self.campaigns is not None else {}),
+        }
+
+
+# ============================================================
+# 2. HTTP / WebSocket 프로토콜
+# ============================================================
+async def _read_request(reader: asyncio.StreamReader):
+    """HTTP 요청 하나 읽기 → (메서드, 경로, 헤더, 본문) 또는 연결 종료 시 None"""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise _BadRequest(400, "잘못된 요청 줄입니다") from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise _BadRequest(400, "Content-Length가 잘못되었습니다") from None
+    if length > MAX_BODY:
+        raise _BadRequest(413, "요청이 너무 큽니다")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+def _write_response(writer, status: int, payload, keep_alive: bool):
+    """JSON 응답 (payload가 문자열이면 text/plain으로 그대로 전송)"""
+    if isinstance(payload, str):
+        body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+    else:
+        body, content_type = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json"
+    writer.write(
+        f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, '')}\r\n"
+        f"Content-Type: {content_type}; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+        + body
+    )
+
+
+def _ws_frame(opcode: int, payload: bytes) -> bytes:
+    """서버 → 클라이언트 WebSocket 프레임 (마스킹 없음, 단일 프레임)"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def _ws_read(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    """클라이언트 WebSocket 메시지 하나 읽기 (조각난 프레임은 이어 붙임)"""
+    message_opcode, chunks, total = None, [], 0
+    while True:
+        first, second = await reader.readexactly(2)
+        opcode, length = first & 0x0F, second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", await reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", await reader.readexactly(8))
+        total += length
+        if total > MAX_BODY:
+            raise ValueError("message too large")
+        mask = await reader.readexactly(4) if second & 0x80 else None
+        data = await reader.readexactly(length)
+        if mask:
+            repeated = (mask * (length // 4 + 1))[:length]
+            data = (int.from_bytes(data, "big") ^ int.from_bytes(repeated, "big")).to_bytes(length, "big")
+        if opcode >= 0x8:
+            # 제어 프레임은 조각 사이에 끼어들 수 있으므로 바로 반환
+            return opcode, data
+        if message_opcode is None:
+            message_opcode = opcode
+        chunks.append(data)
+        if first & 0x80:
+            return message_opcode, b"".join(chunks)
+
+
+# ============================================================
+# 3. 서버
+# ============================================================
+class AnalysisServer:
+    def __init__(self, manager: SessionManager):
+        self.manager = manager
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except _BadRequest as e:
+                    _write_response(writer, e.status, {"error": str(e)}, False)
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                url = urlsplit(target)
+                path = url.path
+                if headers.get("upgrade", "").lower() == "websocket" and path.startswith("/ws/"):
+                    query = parse_qs(url.query)
+                    await self._websocket(unquote(path[len("/ws/"):]), headers, reader, writer,
+                                          query.get("tenant", [None])[0], query.get("caller", [None])[0])
+                    break
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, payload = await self._route(method, path, body, url.query)
+                _write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes,
+                     query: str = "") -> tuple[int, dict | str]:
+        parts = [unquote(p) for p in path.strip("/").split("/")]
+        if parts == ["health"]:
+            return 200, self.manager.stats()
+        if parts == ["metrics"]:
+            self.manager.update_metrics()
+            return 200, metrics.render()
+        if len(parts) < 2 or parts[0] != "calls" or not parts[1]:
+            return 404, {"error": "알 수 없는 경로입니다"}
+        call_id = parts[1]
+
+        if len(parts) == 3 and parts[2] == "messages":
+            if method != "POST":
+                return 405, {"error": "POST만 지원합니다"}
+            try:
+                request = json.loads(body)
+                text = request["text"]
+                if not isinstance(text, str):
+                    raise TypeError(text)
+                tenant = request.get("tenant")
+                if tenant is not None and not isinstance(tenant, str):
+                    raise TypeError(tenant)
+                caller = request.get("caller")
+                if caller is not None and not isinstance(caller, str):
+                    raise TypeError(caller)
+            except (ValueError, KeyError, TypeError, AttributeError):
+                return 400, {"error": '본문은 {"text": "..."} 형식이어야 합니다'}
+            try:
+                return 200, await self.manager.submit(call_id, text, tenant, caller)
+            except UnknownTenantError:
+                return 400, {"error": f"등록되지 않은 테넌트입니다: {tenant}"}
+            except asyncio.QueueFull:
+                return 429, {"error": "세션 입력 큐가 가득 찼습니다"}
+            except LoadShedError:
+                return 503, {"error": "서버 과부하로 발화를 처리하지 못했습니다", "shed": True}
+            except SessionLimitError:
+                return 503, {"error": "동시 세션 수 상한에 도달했습니다"}
+            except SessionClosedError:
+                return 404, {"error": "세션이 종료되었습니다"}
+
+        if len(parts) == 2:
+            if method == "GET":
+                session = self.manager.get(call_id, create=False)
+                if session is None:
+                    return 404, {"error": "세션이 없습니다"}
+                summary = dict(session.detector.get_summary(), call_id=call_id)
+                locale = parse_qs(query).get("locale", [None])[0]
+                if locale:
+                    summary["official_procedures"] = session.detector.localized_procedures(locale)
+                return 200, summary
+            if method == "DELETE":
+                summary = self.manager.close(call_id)
+                return (200, summary) if summary is not None else (404, {"error": "세션이 없습니다"})
+            return 405, {"error": "GET·DELETE만 지원합니다"}
+        return 404, {"error": "알 수 없는 경로입니다"}
+
+    async def _websocket(self, call_id: str, headers: dict, reader, writer,
+                         tenant: str | None = None, caller: str | None = None):
+        key = headers.get("sec-websocket-key", "")
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+        try:
+            session = self.manager.get(call_id, tenant=tenant, caller=caller)
+        except SessionLimitError:
+            _write_response(writer, 503, {"error": "동시 세션 수 상한에 도달했습니다"}, False)
+            return
+        except UnknownTenantError:
+            _write_response(writer, 400, {"error": f"등록되지 않은 테넌트입니다: {tenant}"}, False)
+            return
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode("latin-1")
+        )
+        session.subscribers.add(writer)
+        try:
+            while True:
+                opcode, data = await _ws_read(reader)
+                if opcode == 0x8:
+                    writer.write(_ws_frame(0x8, data[:2]))
+                    break
+                if opcode == 0x9:
+                    writer.write(_ws_frame(0xA, data))
+                    continue
+                if opcode != 0x1:
+                    continue
+                try:
+                    text = data.decode("utf-8")
+                except UnicodeDecodeError:
+                    # UTF-8이 아닌 텍스트 프레임: 1007 (invalid frame payload data)
+                    writer.write(_ws_frame(0x8, struct.pack("!H", 1007)))
+                    break
+                close_code = None
+                try:
+                    # 세션이 그사이 종료됐으면 같은 tenant·caller로 다시 만듦
+                    result = await self.manager.submit(call_id, text, tenant, caller)
+                    event = dict(result, type="result")
+                except asyncio.QueueFull:
+                    event = {"type": "error", "error": "세션 입력 큐가 가득 찼습니다"}
+                except LoadShedError:
+                    event = {"type": "error", "error": "서버 과부하로 발화를 처리하지 못했습니다", "shed": True}
+                except SessionLimitError:
+                    event = {"type": "error", "error": "동시 세션 수 상한에 도달했습니다"}
+                    close_code = 1013  # try again later
+                except UnknownTenantError:
+                    event = {"type": "error", "error": f"등록되지 않은 테넌트입니다: {tenant}"}
+                    close_code = 1008  # policy violation
+                except SessionClosedError:
+                    break
+                writer.write(_ws_frame(0x1, json.dumps(event, ensure_ascii=False).encode("utf-8")))
+                if close_code is not None:
+                    writer.write(_ws_frame(0x8, struct.pack("!H", close_code)))
+                    break
+                await writer.drain()
+        except ValueError:
+            # _ws_read: MAX_BODY를 넘는 메시지
+            writer.write(_ws_frame(0x8, struct.pack("!H", 1009)))
+        finally:
+            session.subscribers.discard(writer)
+
+
+def _reload_patterns(path: str):
+    """패턴 팩 교체: 새 세션부터 적용되고 진행 중인 세션은 기존 버전을 유지"""
+    try:
+        pattern_set = detector.load_pattern_pack(path)
+    except (OSError, ValueError) as e:
+        print(f"패턴 팩 로드 실패 ({path}): {e}", file=sys.stderr)
+        return
+    print(f"패턴 팩 적용: {pattern_set.version}")
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8765, patterns_path: str | None = None,
+                **manager_options):
+    manager = SessionManager(**manager_options)
+    server = AnalysisServer(manager)
+    if patterns_path:
+        _reload_patterns(patterns_path)
+        if hasattr(signal, "SIGHUP"):
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGHUP, _reload_patterns, patterns_path,
+            )
+    evictor = asyncio.create_task(manager.evict_forever())
+    async with await asyncio.start_server(server.handle, host, port) as srv:
+        print(f"CallShield 분석 서버: http://{host}:{port}")
+        try:
+            await srv.serve_forever()
+        finally:
+            evictor.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CallShield 실시간 분석 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--idle-timeout", type=float, default=300.0, help="유휴 세션 정리 기준(초)")
+    parser.add_argument("--queue-size", type=int, default=64, help="세션별 입력 큐 크기")
+    parser.add_argument("--max-pending", type=int, default=10000,
+                        help="전체 대기 발화 상한 (넘으면 safe 세션 발화 거절)")
+    parser.add_argument("--coalesce-at", type=float, default=0.5,
+                        help="대기 발화가 상한의 이 비율 이상이면 caution·safe 세션 발화를 합쳐서 분석")
+    parser.add_argument("--max-wait", type=float, default=0.5,
+                        help="이 시간(초) 이상 기다린 발화는 위험 등급과 관계없이 먼저 처리")
+    parser.add_argument("--max-sessions", type=int, default=10000, help="동시 세션 수 상한")
+    parser.add_argument("--metrics", action="store_true", help="엔진 계측 활성화 (GET /metrics)")
+    parser.add_argument("--patterns", default=None, help="패턴 팩 JSON 경로 (SIGHUP 시 다시 로드)")
+    parser.add_argument("--fuzzy", action="store_true", help="음성 인식 오류 근사 매칭 사용")
+    parser.add_argument("--tenants", default=None, help="테넌트 설정 JSON 경로")
+    parser.add_argument("--match-cache", type=int, default=patterns.MATCH_CACHE_SIZE,
+                        help="세션 공용 발화 매칭 캐시 항목 수 (0이면 사용 안 함)")
+    parser.add_argument("--caller-cache", type=int, default=None,
+                        help="발신 번호 평판 캐시 항목 수 (0이면 사용 안 함)")
+    parser.add_argument("--caller-ttl", type=float, default=None, help="발신 번호 평판 캐시 유효 시간(초)")
+    parser.add_argument("--campaigns", action="store_true", help="피싱 대본 캠페인 군집화 사용")
+    parser.add_argument("--campaign-threshold", type=float, default=0.4,
+                        help="같은 캠페인으로 볼 최소 추정 유사도")
+    args = parser.parse_args(argv)
+    if args.metrics:
+        metrics.enable()
+    if args.match_cache != patterns.MATCH_CACHE_SIZE:
+        patterns.configure_match_cache(args.match_cache)
+    if args.caller_cache is not None or args.caller_ttl is not None:
+        cache = detector.caller_cache_info()
+        detector.configure_caller_cache(
+            cache["maxsize"] if args.caller_cache is None else args.caller_cache,
+            cache["ttl"] if args.caller_ttl is None else args.caller_ttl,
+        )
+    if args.tenants:
+        detector.load_tenants(args.tenants)
+    try:
+        asyncio.run(serve(
+            args.host, args.port, args.patterns,
+            idle_timeout=args.idle_timeout,
+            queue_size=args.queue_size,
+            max_pending=args.max_pending,
+            coalesce_at=args.coalesce_at,
+            max_wait=args.max_wait,
+            max_sessions=args.max_sessions,
+            fuzzy=args.fuzzy,
+            campaigns=CampaignIndex(args.campaign_threshold) if args.campaigns else None,
+        ))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
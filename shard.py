@@ -0,0 +1,315 @@
+"""
+CallShield 샤드 배포 모드 (한 서버에서 여러 코어 사용)
+- 워커 프로세스 N개가 각자 내부 포트에서 분석 서버(server.py)를 실행
+- 프런트 라우터가 통화 ID의 CRC32로 워커를 골라 요청을 그대로 전달하므로
+  한 통화의 세션은 항상 같은 워커에 있음 (WebSocket은 업그레이드 후 양방향 중계)
+- 라우터는 상태가 없으므로 여러 프로세스가 SO_REUSEPORT로 같은 포트를 나눠 받을 수 있음
+- 스팸 번호 인덱스(크기가 번호 수에 비례)는 모든 워커가 같은 파일을 읽기 전용 mmap으로
+  열어 페이지 캐시를 공유하므로 워커를 늘려도 메모리가 늘지 않음
+- 패턴 팩은 시작할 때 한 번만 컴파일해 캐시 파일(marshal)로 저장하고 워커는 컴파일 없이
+  캐시에서 복원함. 복원한 매칭 표·정규식은 파이썬 객체라 프로세스 간에 붙여 쓸 수 없으므로
+  워커마다 한 벌씩 가짐 (내장 패턴 기준 약 0.5MB, 복원 약 20ms)
+
+라우터 엔드포인트:
+    /calls/{call_id}..., /ws/{call_id}   통화 ID의 워커로 전달
+    GET /health                          워커별 상태와 합계
+    /shards/{n}/...                      n번 워커로 그대로 전달 (예: /shards/0/metrics)
+
+사용법:
+    python shard.py --port 8765 --workers 4 --routers 2 --spam-index spam.idx --patterns pack.json
+    (그 밖의 옵션은 워커의 server.py로 그대로 전달, 예: --fuzzy --tenants tenants.json)
+    SIGHUP을 받으면 패턴 팩을 한 번 다시 컴파일한 뒤 모든 워커에 다시 로드를 알림
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+import zlib
+from urllib.parse import unquote, urlsplit
+
+from server import MAX_BODY, _BadRequest, _read_request, _write_response
+
+
+def shard_for(call_id: str, shards: int) -> int:
+    """통화 ID → 워커 번호 (프로세스·재시작과 무관하게 항상 같은 값)"""
+    return zlib.crc32(call_id.encode("utf-8")) % shards
+
+
+# ============================================================
+# 1. 라우터
+# ============================================================
+class ShardRouter:
+    """요청을 통화 ID의 워커로 전달하는 프런트 (워커별 keep-alive 연결을 재사용)"""
+
+    def __init__(self, backends: list[tuple[str, int]]):
+        self.backends = backends
+        self._idle = [[] for _ in backends]  # 워커별 유휴 연결 (reader, writer)
+
+    def route(self, path: str) -> tuple[int | None, str]:
+        """경로 → (워커 번호, 워커에 보낼 경로). 전달 대상이 아니면 워커 번호는 None"""
+        parts = path.strip("/").split("/")
+        if len(parts) >= 2 and parts[0] in ("calls", "ws") and parts[1]:
+            return shard_for(unquote(parts[1]), len(self.backends)), path
+        if len(parts) >= 2 and parts[0] == "shards" and parts[1].isdigit():
+            index = int(parts[1])
+            if index < len(self.backends):
+                return index, "/" + "/".join(parts[2:])
+        return None, path
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except _BadRequest as e:
+                    _write_response(writer, e.status, {"error": str(e)}, False)
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                url = urlsplit(target)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                if url.path.strip("/") == "health":
+                    _write_response(writer, 200, await self.health(), keep_alive)
+                else:
+                    index, path = self.route(url.path)
+                    if index is None:
+                        _write_response(writer, 404, {"error": "알 수 없는 경로입니다"}, keep_alive)
+                    else:
+                        target = path + ("?" + url.query if url.query else "")
+                        raw = _encode_request(method, target, headers, body)
+                        if headers.get("upgrade", "").lower() == "websocket":
+                            await self._tunnel(index, raw, reader, writer)
+                            break
+                        try:
+                            writer.write(await self.forward(index, raw))
+                        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                            _write_response(writer, 503, {"error": "워커에 연결할 수 없습니다"}, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def forward(self, index: int, raw: bytes) -> bytes:
+        """요청 하나를 워커에 보내고 응답 전체(바이트)를 반환
+
+        재사용한 유휴 연결이 그사이 끊겼을 수 있으므로 그 경우에만 다른 연결로 다시 시도합니다.
+        """
+        idle = self._idle[index]
+        while True:
+            reused = bool(idle)
+            if reused:
+                reader, writer = idle.pop()
+            else:
+                reader, writer = await asyncio.open_connection(*self.backends[index])
+            try:
+                writer.write(raw)
+                response, keep_alive = await _read_response(reader)
+            except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                writer.close()
+                if not reused:
+                    raise
+                continue
+            if keep_alive:
+                idle.append((reader, writer))
+            else:
+                writer.close()
+            return response
+
+    async def _tunnel(self, index: int, raw: bytes, reader, writer):
+        """WebSocket: 업그레이드 요청을 워커에 보내고 이후 바이트를 양방향으로 중계"""
+        try:
+            backend_reader, backend_writer = await asyncio.open_connection(*self.backends[index])
+        except OSError:
+            _write_response(writer, 503, {"error": "워커에 연결할 수 없습니다"}, False)
+            return
+        backend_writer.write(raw)
+        pipes = [
+            asyncio.create_task(_pipe(reader, backend_writer)),
+            asyncio.create_task(_pipe(backend_reader, writer)),
+        ]
+        try:
+            await asyncio.wait(pipes, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pipes:
+                task.cancel()
+            backend_writer.close()
+
+    async def health(self) -> dict:
+        """워커별 /health와 숫자 항목 합계"""
+        raw = _encode_request("GET", "/health", {}, b"")
+        shards = []
+        for index in range(len(self.backends)):
+            try:
+                response = await self.forward(index, raw)
+                shards.append(json.loads(response.partition(b"\r\n\r\n")[2]))
+            except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                shards.append({"error": "응답 없음"})
+        totals = {}
+        for stats in shards:
+            for key, value in stats.items():
+                if isinstance(value, (int, float)):
+                    totals[key] = totals.get(key, 0) + value
+        return dict(totals, workers=len(self.backends), shards=shards)
+
+
+def _encode_request(method: str, target: str, headers: dict, body: bytes) -> bytes:
+    lines = [f"{method} {target} HTTP/1.1"]
+    lines += [f"{name}: {value}" for name, value in headers.items() if name != "content-length"]
+    lines.append(f"content-length: {len(body)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def _read_response(reader: asyncio.StreamReader) -> tuple[bytes, bool]:
+    """워커 응답 하나 읽기 → (응답 바이트 전체, 연결 재사용 가능 여부)"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    keep_alive = True
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"connection":
+            keep_alive = value.strip().lower() != b"close"
+    if length > 4 * MAX_BODY + (1 << 20):
+        raise ValueError("response too large")
+    return head + await reader.readexactly(length), keep_alive
+
+
+async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_router(host: str, port: int, backends: list[tuple[str, int]], reuse_port: bool = False):
+    router = ShardRouter(backends)
+    options = {"reuse_port": True} if reuse_port else {}
+    async with await asyncio.start_server(router.handle, host, port, **options) as srv:
+        print(f"CallShield 샤드 라우터 (pid {os.getpid()}): http://{host}:{port} → 워커 {len(backends)}개")
+        await srv.serve_forever()
+
+
+# ============================================================
+# 2. 프로세스 관리
+# ============================================================
+def _run_worker(port: int, server_argv: list[str]):
+    import server
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # 종료는 상위 프로세스가 SIGTERM으로 알림
+    server.main(["--host", "127.0.0.1", "--port", str(port)] + server_argv)
+
+
+def _run_router(host: str, port: int, backends: list[tuple[str, int]], reuse_port: bool):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        asyncio.run(serve_router(host, port, backends, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+def _wait_ready(backends: list[tuple[str, int]], timeout: float = 30.0):
+    """워커가 모두 접속을 받을 때까지 대기"""
+    deadline = time.monotonic() + timeout
+    for backend in backends:
+        while True:
+            try:
+                socket.create_connection(backend, timeout=1.0).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"워커 {backend[0]}:{backend[1]}가 시작되지 않았습니다") from None
+                time.sleep(0.05)
+
+
+def _compile_patterns(path: str) -> bool:
+    """패턴 팩 캐시를 한 번 만들어 둠 (워커는 컴파일 없이 캐시에서 자기 사본을 복원)"""
+    from patterns import load_pack
+    try:
+        pattern_set = load_pack(path)
+    except (OSError, ValueError) as e:
+        print(f"패턴 팩 로드 실패 ({path}): {e}", file=sys.stderr)
+        return False
+    print(f"패턴 팩 컴파일: {pattern_set.version}")
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="CallShield 샤드 배포 (그 밖의 옵션은 워커의 server.py로 전달)",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="분석 워커 프로세스 수")
+    parser.add_argument("--routers", type=int, default=1, help="라우터 프로세스 수 (SO_REUSEPORT)")
+    parser.add_argument("--worker-port", type=int, default=None,
+                        help="워커 내부 포트 시작 번호 (기본: --port + 1부터)")
+    parser.add_argument("--spam-index", default=None, help="스팸 번호 인덱스 파일 (워커가 mmap으로 공유)")
+    parser.add_argument("--patterns", default=None, help="패턴 팩 JSON 경로 (SIGHUP 시 다시 로드)")
+    args, server_argv = parser.parse_known_args(argv)
+
+    if args.spam_index:
+        os.environ["CALLSHIELD_SPAM_INDEX"] = args.spam_index
+    if args.patterns:
+        if not _compile_patterns(args.patterns):
+            sys.exit(1)
+        server_argv += ["--patterns", args.patterns]
+
+    first_port = args.worker_port or args.port + 1
+    backends = [("127.0.0.1", first_port + i) for i in range(args.workers)]
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=_run_worker, args=(port, server_argv), daemon=True)
+        for _, port in backends
+    ]
+    for worker in workers:
+        worker.start()
+    routers = []
+    try:
+        _wait_ready(backends)
+        reuse_port = args.routers > 1
+        routers = [
+            context.Process(target=_run_router, args=(args.host, args.port, backends, reuse_port), daemon=True)
+            for _ in range(args.routers - 1)
+        ]
+        for router in routers:
+            router.start()
+
+        def reload_patterns():
+            if _compile_patterns(args.patterns):
+                for worker in workers:
+                    os.kill(worker.pid, signal.SIGHUP)
+
+        async def run():
+            if args.patterns and hasattr(signal, "SIGHUP"):
+                asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload_patterns)
+            await serve_router(args.host, args.port, backends, reuse_port)
+
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in routers + workers:
+            process.terminate()
+        for process in routers + workers:
+            process.join(5)
+
+
+if __name__ == "__main__":
+    main()
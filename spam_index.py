@@ -0,0 +1,429 @@
+"""
+CallShield 스팸 번호 인덱스 (디스크 기반, mmap)
+- 번호 키로 정렬된 고정 길이 레코드 파일을 mmap으로 열어 이진 탐색
+- 여러 워커 프로세스가 같은 파일을 열면 페이지 캐시를 공유
+- CSV(number,category,reports,last_report)에서 외부 정렬로 일괄 생성
+- 번호는 저장·조회 모두 phone.normalize_number 정규형 기준
+- "070-1234-XXXX" 같은 번호 대역은 정렬된 구간 테이블로 함께 저장하여
+  한 번의 조회로 개별 번호와 대역 평판을 함께 반환
+- 인덱스는 읽기 전용이며, 새 신고는 spam_reports.py가 기존 인덱스와 합쳐(merge_index)
+  새 파일로 만든 뒤 교체
+
+사용법:
+    python spam_index.py build numbers.csv spam.idx
+    python spam_index.py lookup spam.idx 02-1234-5678
+"""
+import csv
+import heapq
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from bisect import bisect_right
+
+from phone import block_label, block_range, normalize_number, number_key, parse_block
+
+MAGIC = b"CSSPAM02"
+# 헤더: 매직(8) + 번호 수(Q) + 대역 수(Q) + 대역 테이블 오프셋(Q) + 카테고리 테이블 오프셋(Q)
+_HEADER = struct.Struct("<8sQQQQ")
+# 번호 레코드: 번호 키(Q) + 신고 건수(I) + 최근 신고일 yyyymmdd(I) + 카테고리 번호(H)
+_RECORD = struct.Struct("<QIIH")
+# 대역 레코드: 시작 키(Q) + 끝 키(Q) + 신고 건수(I) + 최근 신고일(I) + 카테고리 번호(H)
+_BLOCK = struct.Struct("<QQIIH")
+_CATEGORY_LEN = struct.Struct("<H")
+_COUNT = struct.Struct("<I")
+
+
+def lookup_key(phone_number: str) -> int | None:
+    """조회용 정수 키 (정규화할 수 없는 번호는 None)"""
+    number = normalize_number(phone_number)
+    return number_key(number) if number is not None else None
+
+
+def _date_to_int(value: str) -> int:
+    return int(value.replace("-", "")) if value else 0
+
+
+def _int_to_date(value: int) -> str | None:
+    if not value:
+        return None
+    text = str(value)
+    return f"{text[:4]}-{text[4:6]}-{text[6:8]}"
+
+
+def _merge_reports(current: tuple, reports: int, last_report: int, category_id: int) -> tuple:
+    """같은 번호(대역)의 신고 합치기: 건수는 합산, 최근 신고일·카테고리는 최신 기준"""
+    newer = last_report >= current[-2]
+    return current[:-3] + (
+        current[-3] + reports,
+        max(current[-2], last_report),
+        category_id if newer else current[-1],
+    )
+
+
+class _BlockTable:
+    """번호 대역 구간 테이블
+
+    시작 키로 정렬하고 각 구간을 감싸는 가장 좁은 구간(부모)을 기록해 둡니다.
+    접두 번호로 만든 구간은 서로 겹치지 않거나 포함 관계이므로, 이진 탐색 한 번 후
+    부모를 따라 올라가면 번호를 포함하는 가장 좁은 대역을 찾습니다.
+    """
+
+    def __init__(self, blocks: list):
+        """blocks: (시작 키, 끝 키, 신고 건수, 최근 신고일, 카테고리 번호) 목록"""
+        blocks = sorted(blocks, key=lambda b: (b[0], -b[1]))
+        self.starts = [b[0] for b in blocks]
+        self.ends = [b[1] for b in blocks]
+        self.records = [b[2:] for b in blocks]
+        self.parents = []
+        stack = []
+        for start, end in zip(self.starts, self.ends):
+            while stack and self.ends[stack[-1]] < start:
+                stack.pop()
+            self.parents.append(stack[-1] if stack else -1)
+            stack.append(len(self.parents) - 1)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def find(self, key: int) -> int:
+        """key를 포함하는 가장 좁은 대역의 번호 (없으면 -1)"""
+        pos = bisect_right(self.starts, key) - 1
+        while pos >= 0 and self.ends[pos] < key:
+            pos = self.parents[pos]
+        return pos
+
+
+def format_records(exact: tuple | None, block: tuple | None) -> dict | None:
+    """find_records() 형태의 레코드를 lookup() 결과 딕셔너리로"""
+    if exact is not None:
+        exact = _info(*exact)
+    if block is not None:
+        span, record = block
+        block = _info(*record)
+        block["range"] = block_label(*span)
+    return _result(exact, block)
+
+
+def _info(reports: int, last_report: int, category: str) -> dict:
+    return {"category": category, "reports": reports, "last_report": _int_to_date(last_report)}
+
+
+def _result(exact: dict | None, block: dict | None) -> dict | None:
+    """개별 번호 우선, 대역 평판은 함께 첨부"""
+    if exact is not None:
+        exact["match"] = "exact"
+        if block is not None:
+            exact["block"] = block
+        return exact
+    if block is not None:
+        return dict(block, match="block")
+    return None
+
+
+# ============================================================
+# 조회
+# ============================================================
+class SpamIndex:
+    """읽기 전용 mmap 스팸 번호 인덱스"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, num_blocks, blocks_offset, categories_offset = \
+            _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"스팸 인덱스 파일이 아닙니다: {path}")
+
+        # 대역 테이블 (번호 수에 비해 작으므로 메모리에 적재)
+        self._blocks = _BlockTable([
+            _BLOCK.unpack_from(self._mm, blocks_offset + i * _BLOCK.size)
+            for i in range(num_blocks)
+        ])
+
+        # 카테고리 문자열 테이블 (작으므로 메모리에 적재)
+        (num_categories,) = _COUNT.unpack_from(self._mm, categories_offset)
+        pos = categories_offset + _COUNT.size
+        self._categories = []
+        for _ in range(num_categories):
+            (length,) = _CATEGORY_LEN.unpack_from(self._mm, pos)
+            pos += _CATEGORY_LEN.size
+            self._categories.append(self._mm[pos:pos + length].decode("utf-8"))
+            pos += length
+
+    def __len__(self):
+        return self._count
+
+    def _find(self, key: int) -> int:
+        """키의 레코드 번호 (없으면 -1)"""
+        mm, unpack, size, base = self._mm, _RECORD.unpack_from, _RECORD.size, _HEADER.size
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key = unpack(mm, base + mid * size)[0]
+            if mid_key < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and unpack(mm, base + lo * size)[0] == key:
+            return lo
+        return -1
+
+    def find_records(self, key: int) -> tuple:
+        """키의 (개별 번호 레코드, (대역 구간, 대역 레코드)) (없는 쪽은 None)
+
+        레코드는 (신고 건수, 최근 신고일 yyyymmdd 정수, 카테고리 문자열)입니다.
+        """
+        exact = block = None
+        pos = self._find(key)
+        if pos >= 0:
+            reports, last_report, category_id = _RECORD.unpack_from(
+                self._mm, _HEADER.size + pos * _RECORD.size
+            )[1:]
+            exact = (reports, last_report, self._categories[category_id])
+        pos = self._blocks.find(key)
+        if pos >= 0:
+            reports, last_report, category_id = self._blocks.records[pos]
+            block = (
+                (self._blocks.starts[pos], self._blocks.ends[pos]),
+                (reports, last_report, self._categories[category_id]),
+            )
+        return exact, block
+
+    def lookup(self, phone_number: str) -> dict | None:
+        """번호 조회 (SPAM_DB 항목과 같은 형태의 딕셔너리, 없으면 None)
+
+        match는 "exact"(개별 번호) 또는 "block"(번호 대역)이며, 개별 번호가 대역에도
+        속하면 대역 평판을 block 키로 함께 반환합니다.
+        """
+        key = lookup_key(phone_number)
+        if key is None:
+            return None
+        return format_records(*self.find_records(key))
+
+    def iter_records(self):
+        """전체 개별 번호 레코드를 키 순서로: (키, 신고 건수, 최근 신고일, 카테고리 문자열)"""
+        categories = self._categories
+        end = _HEADER.size + self._count * _RECORD.size
+        chunk = _RECORD.size * 4096
+        for offset in range(_HEADER.size, end, chunk):
+            for key, reports, last_report, category_id in _RECORD.iter_unpack(
+                self._mm[offset:min(offset + chunk, end)]
+            ):
+                yield key, reports, last_report, categories[category_id]
+
+    def iter_blocks(self):
+        """전체 대역 레코드: ((시작 키, 끝 키), (신고 건수, 최근 신고일, 카테고리 문자열))"""
+        categories = self._categories
+        for start, end, (reports, last_report, category_id) in zip(
+            self._blocks.starts, self._blocks.ends, self._blocks.records
+        ):
+            yield (start, end), (reports, last_report, categories[category_id])
+
+    def __contains__(self, phone_number: str) -> bool:
+        key = lookup_key(phone_number)
+        return key is not None and (self._find(key) >= 0 or self._blocks.find(key) >= 0)
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+class MemorySpamIndex:
+    """SPAM_DB처럼 작은 딕셔너리용 인메모리 인덱스 (SpamIndex와 같은 조회 규칙)"""
+
+    def __init__(self, entries: dict):
+        """entries: {번호 또는 대역 표기: {"category", "reports", "last_report"}}"""
+        self._exact = {}
+        blocks = []
+        self._block_info = []
+        for pattern, info in entries.items():
+            block = parse_block(pattern)
+            if block is not None:
+                blocks.append(block_range(*block) + (len(self._block_info),))
+                self._block_info.append(info)
+                continue
+            key = lookup_key(pattern)
+            if key is not None:
+                self._exact[key] = info
+        self._blocks = _BlockTable(blocks)
+
+    def __len__(self):
+        return len(self._exact)
+
+    def lookup(self, phone_number: str) -> dict | None:
+        """번호 조회 (SpamIndex.lookup과 같은 형태)"""
+        key = lookup_key(phone_number)
+        if key is None:
+            return None
+        exact = self._exact.get(key)
+        block = None
+        pos = self._blocks.find(key)
+        if pos >= 0:
+            block = dict(self._block_info[self._blocks.records[pos][0]])
+            block["range"] = block_label(self._blocks.starts[pos], self._blocks.ends[pos])
+        return _result(dict(exact) if exact is not None else None, block)
+
+    def __contains__(self, phone_number: str) -> bool:
+        return self.lookup(phone_number) is not None
+
+    def close(self):
+        pass
+
+
+# ============================================================
+# 생성
+# ============================================================
+def _read_csv(csv_path: str, categories: dict, blocks: dict):
+    """CSV 행을 (키, 신고 건수, 최근 신고일, 카테고리 번호) 튜플로 생성 (잘못된 번호는 건너뜀)
+
+    카테고리 번호는 CSV에 처음 나온 순서대로 categories에 등록됩니다.
+    대역 표기 행은 생성하지 않고 blocks({(시작 키, 끝 키): 레코드})에 합쳐 둡니다.
+    """
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            category = row.get("category") or ""
+            reports = int(row.get("reports") or 0)
+            last_report = _date_to_int(row.get("last_report") or "")
+            block = parse_block(row["number"])
+            if block is not None:
+                category_id = categories.setdefault(category, len(categories))
+                span = block_range(*block)
+                current = blocks.get(span)
+                blocks[span] = (
+                    (reports, last_report, category_id) if current is None
+                    else _merge_reports(current, reports, last_report, category_id)
+                )
+                continue
+            key = lookup_key(row["number"])
+            if key is None:
+                continue
+            yield (key, reports, last_report, categories.setdefault(category, len(categories)))
+
+
+def _write_run(records: list) -> str:
+    """레코드 묶음을 정렬해 임시 파일로 기록하고 경로를 반환"""
+    records.sort()
+    fd, path = tempfile.mkstemp(suffix=".run")
+    with os.fdopen(fd, "wb") as f:
+        for record in records:
+            f.write(_RECORD.pack(*record))
+    return path
+
+
+def _iter_run(path: str):
+    with open(path, "rb") as f:
+        while chunk := f.read(_RECORD.size * 4096):
+            yield from _RECORD.iter_unpack(chunk)
+
+
+def build_index(csv_path: str, out_path: str, run_size: int = 1_000_000) -> int:
+    """CSV에서 인덱스 파일 생성 (run_size 행씩 정렬 후 병합하므로 메모리 사용량이 일정)
+
+    같은 번호가 여러 번 나오면 신고 건수는 합산하고, 최근 신고일과 카테고리는
+    가장 최근 신고 기준으로 남깁니다. "070-1234-XXXX"처럼 끝자리가 X인 행은 번호 대역으로
+    저장합니다. 기록된 개별 번호 수를 반환합니다.
+    """
+    categories = {}
+    blocks = {}
+    runs = []
+    try:
+        batch = []
+        for record in _read_csv(csv_path, categories, blocks):
+            batch.append(record)
+            if len(batch) >= run_size:
+                runs.append(_write_run(batch))
+                batch = []
+        if batch:
+            runs.append(_write_run(batch))
+
+        return _write_index(out_path, heapq.merge(*(_iter_run(p) for p in runs)), blocks, categories)
+    finally:
+        for path in runs:
+            os.remove(path)
+
+
+def merge_index(base: SpamIndex | None, numbers: dict, blocks: dict, out_path: str) -> int:
+    """기존 인덱스에 새 신고를 합친 새 인덱스 파일 생성 (기존 파일은 그대로 둠)
+
+    numbers: {번호 키: (신고 건수, 최근 신고일 정수, 카테고리 문자열)}
+    blocks: {(시작 키, 끝 키): (신고 건수, 최근 신고일 정수, 카테고리 문자열)}
+    같은 번호·대역은 build_index와 같은 규칙으로 합칩니다. 기록된 개별 번호 수를 반환합니다.
+    """
+    categories = {}
+
+    def with_category_id(key, reports, last_report, category):
+        return (key, reports, last_report, categories.setdefault(category, len(categories)))
+
+    merged_blocks = {}
+    for span, record in list(base.iter_blocks() if base is not None else ()) + list(blocks.items()):
+        record = with_category_id(span, *record)[1:]
+        current = merged_blocks.get(span)
+        merged_blocks[span] = record if current is None else _merge_reports(current, *record)
+    records = heapq.merge(
+        (with_category_id(*record) for record in (base.iter_records() if base is not None else ())),
+        (with_category_id(key, *numbers[key]) for key in sorted(numbers)),
+        key=lambda record: record[0],  # 같은 번호는 기존 레코드 먼저 (새 신고가 나중에 합쳐짐)
+    )
+    return _write_index(out_path, records, merged_blocks, categories)
+
+
+def _write_index(out_path: str, records, blocks: dict, categories: dict) -> int:
+    """키 순서의 (키, 신고 건수, 최근 신고일, 카테고리 번호) 레코드로 인덱스 파일 기록
+
+    같은 키가 연속으로 나오면 합치며, 기록된 개별 번호 수를 반환합니다.
+    categories는 레코드를 모두 읽은 뒤에 기록하므로 레코드를 만들면서 채워도 됩니다.
+    """
+    count = 0
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(_HEADER.pack(MAGIC, 0, 0, 0, 0))
+        current = None
+        for key, reports, last_report, category_id in records:
+            if current is not None and current[0] == key:
+                current = _merge_reports(current, reports, last_report, category_id)
+                continue
+            if current is not None:
+                out.write(_RECORD.pack(*current))
+                count += 1
+            current = (key, reports, last_report, category_id)
+        if current is not None:
+            out.write(_RECORD.pack(*current))
+            count += 1
+
+        blocks_offset = out.tell()
+        for span in sorted(blocks):
+            out.write(_BLOCK.pack(*span, *blocks[span]))
+
+        categories_offset = out.tell()
+        out.write(_COUNT.pack(len(categories)))
+        for name in sorted(categories, key=categories.get):
+            encoded = name.encode("utf-8")
+            out.write(_CATEGORY_LEN.pack(len(encoded)))
+            out.write(encoded)
+        out.seek(0)
+        out.write(_HEADER.pack(MAGIC, count, len(blocks), blocks_offset, categories_offset))
+    # 완성된 파일로 교체 (열려 있는 기존 인덱스는 이전 파일을 계속 사용)
+    os.replace(tmp_path, out_path)
+    return count
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) == 3 and argv[0] == "build":
+        count = build_index(argv[1], argv[2])
+        print(f"{count}개 번호 기록: {argv[2]}")
+    elif len(argv) == 3 and argv[0] == "lookup":
+        index = SpamIndex(argv[1])
+        print(index.lookup(argv[2]))
+        index.close()
+    else:
+        print(__doc__.strip().split("사용법:")[1])
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
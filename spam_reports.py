@@ -0,0 +1,335 @@
+"""
+CallShield 스팸 신고 수집 (추가 전용 로그 + 메모리 변경분 + 백그라운드 병합)
+- 새 신고는 로그 파일 끝에 추가하고 메모리 변경분(delta)에 합침
+- 조회는 읽기 전용 기본 인덱스(spam_index.py, mmap) + 변경분으로 처리하며 잠금을 쓰지 않음
+- 병합(compaction): 변경분을 얼려 두고 기본 인덱스와 합친 새 인덱스 파일을 만든 뒤
+  참조 한 번 대입으로 교체 (병합 중에도 조회·수집은 계속됨)
+- 조회 결과에는 신고 건수와 최근 신고일로 계산한 시간 감쇠 평판 점수(reputation)를 붙임
+
+저장 폴더 구성 (세대 번호 g):
+    spam.<g>.idx      기본 인덱스 (g세대 이전 신고가 모두 반영됨)
+    reports.<g>.log   g세대 이후 신고 로그 (CSV: number,category,reports,last_report)
+    시작할 때는 가장 최근 세대의 인덱스를 열고 그 세대 이후의 로그만 다시 읽으므로,
+    병합 도중 중단되어도 신고가 빠지거나 두 번 반영되지 않습니다.
+
+사용법:
+    python spam_reports.py ingest data/ reports.csv     # 신고 추가 (CSV 형식은 build와 같음)
+    python spam_reports.py compact data/                # 변경분을 새 인덱스로 병합
+    python spam_reports.py lookup data/ 02-1234-5678
+"""
+import csv
+import io
+import math
+import os
+import re
+import sys
+import threading
+from datetime import date
+
+from phone import block_range, parse_block
+from spam_index import (
+    SpamIndex, _BlockTable, _date_to_int, _merge_reports, format_records, lookup_key, merge_index,
+)
+
+HALF_LIFE_DAYS = 30    # 평판 반감기: 마지막 신고 후 이 기간마다 신고 건수의 영향이 절반으로
+SATURATION = 20        # 감쇠 후 신고 건수가 이만큼이면 평판 63점, 세 배면 95점
+DEFAULT_COMPACT_THRESHOLD = 1_000_000  # 변경분이 이 정도 쌓이면 백그라운드 병합
+
+_INDEX_NAME = re.compile(r"spam\.(\d+)\.idx$")
+_LOG_NAME = re.compile(r"reports\.(\d+)\.log$")
+
+
+def reputation(reports: int, last_report: str | None, today: date | None = None) -> int:
+    """시간 감쇠 평판 점수 (0~100): 최근에 많이 신고된 번호일수록 높음
+
+    신고 건수를 마지막 신고일로부터 지난 기간만큼 반감기로 줄인 뒤 포화 곡선으로 변환합니다.
+    """
+    if not reports:
+        return 0
+    age = 0
+    if last_report:
+        age = max(((today or date.today()) - date.fromisoformat(last_report)).days, 0)
+    effective = reports * 0.5 ** (age / HALF_LIFE_DAYS)
+    return round(100 * (1 - math.exp(-effective / SATURATION)))
+
+
+def add_reputation(result: dict | None, today: date | None = None) -> dict | None:
+    """lookup() 결과(와 대역 평판)에 reputation 점수를 붙임"""
+    if result is not None:
+        result["reputation"] = reputation(result["reports"], result["last_report"], today)
+        if "block" in result:
+            block = result["block"]
+            block["reputation"] = reputation(block["reports"], block["last_report"], today)
+    return result
+
+
+class _Delta:
+    """메모리 변경분: 번호 키·대역 구간별 (신고 건수, 최근 신고일 정수, 카테고리)
+
+    쓰기는 수집 스레드 하나만 하고, 조회는 딕셔너리 조회만 하므로 잠금이 필요 없습니다.
+    """
+
+    def __init__(self):
+        self.numbers = {}
+        self.blocks = {}
+        self._blocks_version = 0   # 대역 신고가 들어올 때마다 증가
+        self._block_table = None   # (만든 시점의 버전, 대역 조회 테이블, 대역 사본)
+
+    def __len__(self):
+        return len(self.numbers) + len(self.blocks)
+
+    def add(self, number: str, category: str, reports: int, last_report: int) -> bool:
+        """신고 하나 반영 (해석할 수 없는 번호면 False)"""
+        record = (reports, last_report, category)
+        block = parse_block(number)
+        if block is not None:
+            span = block_range(*block)
+            current = self.blocks.get(span)
+            self.blocks[span] = record if current is None else _merge_reports(current, *record)
+            self._blocks_version += 1
+            return True
+        key = lookup_key(number)
+        if key is None:
+            return False
+        current = self.numbers.get(key)
+        self.numbers[key] = record if current is None else _merge_reports(current, *record)
+        return True
+
+    def update(self, other: "_Delta"):
+        """other의 신고를 이 변경분 뒤에 이어서 반영 (other가 더 나중의 신고)"""
+        for changes, merged in ((other.numbers, self.numbers), (other.blocks, self.blocks)):
+            for key, record in changes.items():
+                current = merged.get(key)
+                merged[key] = record if current is None else _merge_reports(current, *record)
+        if other.blocks:
+            self._blocks_version += 1
+
+    def find_block(self, key: int) -> tuple | None:
+        """key를 포함하는 가장 좁은 대역의 (구간, 레코드)"""
+        if not self.blocks:
+            return None
+        cached = self._block_table
+        if cached is None or cached[0] != self._blocks_version:
+            version = self._blocks_version
+            blocks = self.blocks.copy()
+            cached = self._block_table = (version, _BlockTable([span + (span,) for span in blocks]), blocks)
+        _, table, blocks = cached
+        pos = table.find(key)
+        if pos < 0:
+            return None
+        span = table.records[pos][0]
+        return span, blocks[span]
+
+
+def _merge_exact(current: tuple | None, record: tuple | None) -> tuple | None:
+    if record is None:
+        return current
+    return record if current is None else _merge_reports(current, *record)
+
+
+def _merge_block(current: tuple | None, found: tuple | None) -> tuple | None:
+    """더 좁은 대역을 남기고, 같은 대역이면 신고를 합침"""
+    if found is None:
+        return current
+    if current is None:
+        return found
+    (start, end), record = current
+    span, other = found
+    if span == (start, end):
+        return span, _merge_reports(record, *other)
+    return found if span[1] - span[0] < end - start else current
+
+
+class ReportStore:
+    """기본 인덱스 + 변경분으로 조회하고 신고를 로그에 추가하는 스팸 번호 저장소
+
+    SpamIndex와 같은 lookup()·__contains__·close()를 제공하므로 check_number의 조회 대상으로
+    그대로 쓸 수 있습니다. 수집(add_reports)과 병합(compact)은 각각 한 스레드에서만 호출하세요.
+    """
+
+    def __init__(self, directory: str, compact_threshold: int = DEFAULT_COMPACT_THRESHOLD):
+        self.directory = directory
+        self.compact_threshold = compact_threshold
+        os.makedirs(directory, exist_ok=True)
+        indexes = self._generations(_INDEX_NAME)
+        self.generation = max(indexes, default=0)
+        if not indexes:
+            merge_index(None, {}, {}, self._index_path(0))
+        base = SpamIndex(self._index_path(self.generation))
+        # 조회는 이 튜플 하나만 읽음: (기본 인덱스, 병합 중인 변경분, 현재 변경분)
+        self._view = (base, _Delta(), _Delta())
+        self._write_lock = threading.Lock()  # 수집과 병합 교체 사이의 순서만 보장 (조회는 잠그지 않음)
+        self._compacting = threading.Lock()
+        self._compactor = None
+        for generation in sorted(self._generations(_LOG_NAME)):
+            if generation >= self.generation:
+                self._replay(self._log_path(generation), self._view[2])
+        # 신고는 가장 최근 세대의 로그에 이어서 기록
+        self._log_generation = max(self._generations(_LOG_NAME) + [self.generation])
+        self._log = self._open_log(self._log_generation)
+        self._cleanup()
+
+    # -- 파일 --------------------------------------------------------------
+    def _index_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"spam.{generation}.idx")
+
+    def _log_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"reports.{generation}.log")
+
+    def _generations(self, pattern) -> list:
+        return [int(m.group(1)) for name in os.listdir(self.directory) if (m := pattern.match(name))]
+
+    def _open_log(self, generation: int):
+        return open(self._log_path(generation), "a", encoding="utf-8", newline="")
+
+    def _cleanup(self):
+        """현재 세대보다 오래된 인덱스·로그 삭제 (병합 도중 중단된 경우의 잔여 파일 포함)"""
+        for pattern, path in ((_INDEX_NAME, self._index_path), (_LOG_NAME, self._log_path)):
+            for generation in self._generations(pattern):
+                if generation < self.generation:
+                    os.remove(path(generation))
+
+    @staticmethod
+    def _replay(path: str, delta: _Delta):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if len(row) == 4:
+                    number, category, reports, last_report = row
+                    delta.add(number, category, int(reports or 0), _date_to_int(last_report))
+
+    # -- 조회 --------------------------------------------------------------
+    def find_records(self, key: int) -> tuple:
+        base, frozen, delta = self._view
+        exact, block = base.find_records(key)
+        for changes in (frozen, delta):
+            exact = _merge_exact(exact, changes.numbers.get(key))
+            block = _merge_block(block, changes.find_block(key))
+        return exact, block
+
+    def lookup(self, phone_number: str) -> dict | None:
+        """번호 조회 (SpamIndex.lookup과 같은 형태, 아직 병합되지 않은 신고 포함)"""
+        key = lookup_key(phone_number)
+        if key is None:
+            return None
+        return format_records(*self.find_records(key))
+
+    def __contains__(self, phone_number: str) -> bool:
+        return self.lookup(phone_number) is not None
+
+    def __len__(self):
+        base, frozen, delta = self._view
+        return len(base) + len(frozen) + len(delta)
+
+    @property
+    def pending(self) -> int:
+        """아직 병합되지 않은 번호·대역 수"""
+        _, frozen, delta = self._view
+        return len(frozen) + len(delta)
+
+    # -- 수집 --------------------------------------------------------------
+    def add_reports(self, rows) -> int:
+        """신고 (번호, 카테고리, 신고 건수, 최근 신고일 "YYYY-MM-DD") 목록 추가
+
+        로그에 기록한 뒤 변경분에 반영하며, 반영한 신고 수를 반환합니다 (잘못된 번호는 건너뜀).
+        변경분이 compact_threshold를 넘으면 백그라운드 병합을 시작합니다.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        added = 0
+        with self._write_lock:
+            delta = self._view[2]
+            for number, category, reports, last_report in rows:
+                if delta.add(number, category or "", int(reports), _date_to_int(last_report or "")):
+                    writer.writerow((number, category or "", int(reports), last_report or ""))
+                    added += 1
+            self._log.write(buffer.getvalue())
+            self._log.flush()
+        if len(delta) >= self.compact_threshold:
+            self.compact_in_background()
+        return added
+
+    def add_report(self, number: str, category: str, reports: int = 1,
+                   last_report: str | None = None) -> bool:
+        return self.add_reports([(number, category, reports, last_report or date.today().isoformat())]) == 1
+
+    # -- 병합 --------------------------------------------------------------
+    def compact(self) -> bool:
+        """변경분을 새 인덱스 세대로 병합 (이미 병합 중이면 False)"""
+        if not self._compacting.acquire(blocking=False):
+            return False
+        try:
+            with self._write_lock:
+                base, frozen, delta = self._view
+                if not delta:
+                    return True
+                # 현재 변경분을 얼리고 로그도 다음 세대 파일로 넘김
+                # (얼린 변경분 = 다음 세대 이전 로그 전체이므로 새 인덱스는 다음 세대 번호를 가짐)
+                next_generation = self._log_generation + 1
+                self._log.close()
+                self._log = self._open_log(next_generation)
+                self._log_generation = next_generation
+                self._view = (base, delta, _Delta())
+            try:
+                merge_index(base, delta.numbers, delta.blocks, self._index_path(next_generation))
+                new_base = SpamIndex(self._index_path(next_generation))
+            except BaseException:
+                # 얼린 변경분을 현재 변경분 앞에 되돌려 다음 병합에 함께 포함
+                # (그 로그는 다음 병합이 성공해 새 인덱스에 들어간 뒤에야 _cleanup으로 지워짐)
+                with self._write_lock:
+                    restored = _Delta()
+                    restored.update(delta)
+                    restored.update(self._view[2])
+                    self._view = (base, _Delta(), restored)
+                raise
+            with self._write_lock:
+                self._view = (new_base, _Delta(), self._view[2])
+                self.generation = next_generation
+            # 이전 인덱스는 진행 중인 조회가 끝나면 참조가 사라지며 닫힘 (명시적으로 닫지 않음)
+            self._cleanup()
+            return True
+        finally:
+            self._compacting.release()
+
+    def compact_in_background(self) -> bool:
+        """병합을 별도 스레드에서 시작 (이미 진행 중이면 False)"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return False
+        self._compactor = threading.Thread(target=self.compact, name="spam-compactor", daemon=True)
+        self._compactor.start()
+        return True
+
+    def close(self):
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._write_lock:
+            self._log.close()
+        self._view[0].close()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) == 3 and argv[0] == "ingest":
+        store = ReportStore(argv[1])
+        with open(argv[2], newline="", encoding="utf-8") as f:
+            rows = ((row["number"], row.get("category"), int(row.get("reports") or 1), row.get("last_report"))
+                    for row in csv.DictReader(f))
+            added = store.add_reports(rows)
+        store.close()
+        print(f"신고 {added}건 추가: {argv[1]}")
+    elif len(argv) == 2 and argv[0] == "compact":
+        store = ReportStore(argv[1])
+        pending = store.pending
+        store.compact()
+        print(f"변경분 {pending}건 병합: {store._index_path(store.generation)}")
+        store.close()
+    elif len(argv) == 3 and argv[0] == "lookup":
+        store = ReportStore(argv[1])
+        print(add_reputation(store.lookup(argv[2])))
+        store.close()
+    else:
+        print(__doc__.strip().split("사용법:")[1])
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
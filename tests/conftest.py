@@ -0,0 +1,31 @@
+import os
+import random
+import sys
+
+import pytest
+
+# 저장소 루트의 모듈(detector, patterns, ...)을 그대로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detector import DEMO_SCENARIOS, PHISHING_PATTERNS  # noqa: E402
+
+# 단어 경계·띄어쓰기 변형 회귀 사례를 섞은 일상 문장
+FILLERS = [
+    "네", "잠시만요", "그 수사 관련 기사 봤어?", "저는 경찰 청소년과입니다", "국세 청구서",
+    "택배 도착했습니다", "방법 원래 그래요", "O T P", "체포영장", "서울중앙지검",
+    "수사,관련 기사", "경찰,청소년과", "본인 확인",
+]
+
+
+@pytest.fixture(scope="session")
+def conversations() -> list:
+    """데모 시나리오 + 키워드·일상 문장을 섞은 무작위 대화 (고정 시드)"""
+    rng = random.Random(7)
+    words = [k for info in PHISHING_PATTERNS.values() for k in info["keywords"]] + FILLERS
+    result = list(DEMO_SCENARIOS.values())
+    for _ in range(40):
+        result.append([
+            " ".join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+            for _ in range(rng.randint(1, 8))
+        ])
+    return result
@@ -0,0 +1,53 @@
+"""배치 채점 (batch.py)"""
+import json
+
+import batch
+from detector import CallShieldDetector
+
+
+def _lines(conversations) -> list:
+    lines = [json.dumps({"call_id": i, "utterances": m}, ensure_ascii=False) + "\n"
+             for i, m in enumerate(conversations)]
+    # 잘못된 줄·빈 줄을 사이사이에 섞음
+    lines[3:3] = ["not json\n", "\n", '{"utterances": []}\n']
+    return lines
+
+
+def test_score_call_matches_detector(conversations):
+    for messages in conversations:
+        records = batch.score_call("c", messages, fuzzy=True)
+        d = CallShieldDetector(fuzzy=True)
+        results = [d.analyze_message(m) for m in messages]
+        assert [r["risk_score"] for r in records[:-1]] == [r["risk_score"] for r in results]
+        assert [r["turn"] for r in records[:-1]] == list(range(len(messages)))
+        call = records[-1]
+        assert call["type"] == "call" and call["turns"] == len(messages)
+        assert call["risk_score"] == d.risk_score
+        assert call["detected_keywords"] == d.detected_patterns
+        assert call["official_procedures"] == d.procedures
+
+
+def test_fuzzy_keywords_carry_confidence():
+    records = batch.score_call("c", ["안전게좌로 옮기세요"], fuzzy=True)
+    keywords = records[0]["new_keywords"]
+    assert keywords and all(len(k) == 3 and 0 < k[2] < 1 for k in keywords)
+
+
+def test_parallel_output_matches_serial_in_input_order(conversations):
+    lines = _lines(conversations)
+    serial = "".join(batch.score_lines(lines, workers=1, chunk_size=4))
+    parallel = "".join(batch.score_lines(lines, workers=2, chunk_size=4))
+    assert parallel == serial
+    records = [json.loads(line) for line in serial.splitlines()]
+    calls = [r["call_id"] for r in records if r["type"] == "call"]
+    assert calls == list(range(len(conversations)))
+    errors = [r for r in records if r["type"] == "error"]
+    assert [e["line"] for e in errors] == [4, 6]
+
+
+def test_no_turns_writes_only_call_summaries(tmp_path, conversations):
+    src, dst = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    src.write_text("".join(_lines(conversations[:5])), encoding="utf-8")
+    batch.main([str(src), "-o", str(dst), "--workers", "1", "--no-turns"])
+    records = [json.loads(line) for line in dst.read_text(encoding="utf-8").splitlines()]
+    assert [r["type"] for r in records] == ["call"] * 3 + ["error", "error"] + ["call"] * 2
@@ -0,0 +1,38 @@
+"""벤치마크 비교·합성 데이터 (bench.py)"""
+import json
+
+import bench
+
+
+def _report(**values) -> dict:
+    return {"results": {
+        name: {"value": value, "unit": "ns/op", "better": "higher" if name.endswith("rate") else "lower"}
+        for name, value in values.items()
+    }}
+
+
+def test_compare_flags_only_regressions_past_threshold():
+    baseline = _report(a=100, b=100, c=100, hit_rate=0.5)
+    current = _report(a=109, b=111, c=50, hit_rate=0.4)
+    assert bench.compare(baseline, current, 0.10) == ["b: +11.0%", "hit_rate: +20.0%"]
+    assert bench.compare(baseline, current, 0.25) == []
+
+
+def test_compare_skips_missing_and_zero_baselines():
+    baseline = _report(a=0, gone=100)
+    current = _report(a=1000, new=1)
+    assert bench.compare(baseline, current, 0.0) == []
+
+
+def test_compare_cli_exit_code(tmp_path):
+    base, cur = tmp_path / "base.json", tmp_path / "cur.json"
+    base.write_text(json.dumps(_report(a=100)), encoding="utf-8")
+    cur.write_text(json.dumps(_report(a=150)), encoding="utf-8")
+    assert bench.main(["compare", str(base), str(cur)]) == 1
+    assert bench.main(["compare", str(base), str(cur), "--threshold", "0.6"]) == 0
+
+
+def test_synthetic_data_is_seeded_per_item():
+    assert bench.make_messages("long", 5, bench._rng("x")) == bench.make_messages("long", 5, bench._rng("x"))
+    assert bench.make_messages("long", 5, bench._rng("x")) != bench.make_messages("long", 5, bench._rng("y"))
+    assert len(bench.make_call(25, bench._rng("call"))) == 25
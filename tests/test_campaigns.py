@@ -0,0 +1,120 @@
+"""피싱 대본 캠페인 군집화 (campaigns.py)"""
+import json
+import random
+from array import array
+
+import pytest
+
+import campaigns
+from campaigns import NUM_BINS, CampaignIndex, signature, similarity, sketch_text
+from detector import DEMO_SCENARIOS, CallShieldDetector
+from normalize import normalize_text
+
+PHISHING = ["검찰 사칭형", "금감원 사칭형", "경찰 사칭형"]
+
+
+def _sketch(text: str) -> array:
+    bins = array("Q", [campaigns._EMPTY]) * NUM_BINS
+    sketch_text(bins, normalize_text(text))
+    return signature(bins)
+
+
+def _variant(lines: list, rng: random.Random) -> list:
+    """대본 일부 단어를 이름·번호 등으로 바꾼 변형"""
+    result = []
+    for line in lines:
+        words = line.split()
+        if len(words) > 2 and rng.random() < 0.5:
+            words[rng.randrange(len(words))] = rng.choice(["김민수", "010-1234-5678", "오늘", "지금"])
+        result.append(" ".join(words))
+    return result
+
+
+def _play(index: CampaignIndex, call_id, utterances) -> tuple:
+    """분석 서버처럼 발화마다 observe → 분석 → report, 마지막 배정 정보와 위험도"""
+    d = CallShieldDetector(keep_conversation=False)
+    info = None
+    for message in utterances:
+        info = index.observe(call_id, message)
+        if info is not None and info["boost"]:
+            d.set_campaign(info["campaign"], info["boost"])
+        d.analyze_message(message, delta_only=True)
+        index.report(call_id, d.content_score)
+    index.end(call_id)
+    return info, d.risk_score
+
+
+def test_sketch_similarity():
+    text = " ".join(DEMO_SCENARIOS["검찰 사칭형"])
+    assert similarity(_sketch(text), _sketch(text)) == 1.0
+    assert similarity(_sketch(text), _sketch(" ".join(DEMO_SCENARIOS["정상 전화 (택배)"]))) < 0.2
+    bins = array("Q", [campaigns._EMPTY]) * NUM_BINS
+    assert sketch_text(bins, "ab") == 0 and signature(bins) is None
+    assert sketch_text(bins, "abcd") == 2 and signature(bins) is not None
+
+
+def test_script_variants_share_a_campaign():
+    rng = random.Random(1)
+    index = CampaignIndex()
+    assigned = {}
+    for name, lines in DEMO_SCENARIOS.items():
+        for k in range(3):
+            info, _ = _play(index, f"{name}-{k}", lines if k == 0 else _variant(lines, rng))
+            assigned.setdefault(name, set()).add(info["campaign"])
+    assert all(len(ids) == 1 for ids in assigned.values())
+    assert len(set.union(*assigned.values())) == len(DEMO_SCENARIOS)
+    assert index.stats()["assigned"] == 2 * len(DEMO_SCENARIOS) and index.stats()["calls"] == 0
+
+
+def test_phishing_campaign_boosts_later_calls():
+    index = CampaignIndex()
+    info, score = _play(index, "first", DEMO_SCENARIOS["검찰 사칭형"])
+    assert score == 100 and info["phishing"]
+    # 같은 대본의 다음 통화는 배정되는 턴부터 가산점
+    infos = [index.observe("second", message) for message in DEMO_SCENARIOS["검찰 사칭형"][:3]]
+    assert infos[-1]["boost"] == campaigns.CAMPAIGN_BOOST and infos[-1]["calls"] == 2
+    # 정상 통화 캠페인은 피싱으로 표시되지 않음
+    info, score = _play(index, "delivery", DEMO_SCENARIOS["정상 전화 (택배)"])
+    assert score == 0 and not info["phishing"] and info["boost"] == 0
+    assert index.stats()["phishing_campaigns"] == 1
+
+
+def test_short_calls_are_not_assigned():
+    index = CampaignIndex()
+    assert index.observe("c", "네") is None
+    assert index.stats() == {"calls": 1, "campaigns": 0, "phishing_campaigns": 0, "buckets": 0, "assigned": 0}
+
+
+def test_tables_are_bounded():
+    index = CampaignIndex(max_calls=2, max_campaigns=2, max_buckets=30)
+    for i, name in enumerate(DEMO_SCENARIOS):
+        index.observe(i, " ".join(DEMO_SCENARIOS[name]))
+    stats = index.stats()
+    assert stats["calls"] == 2 and stats["campaigns"] == 2 and stats["buckets"] <= 30
+
+
+@pytest.mark.parametrize("threshold, expected", [(0.4, 1), (1.01, 2)])
+def test_threshold(threshold, expected):
+    index = CampaignIndex(threshold=threshold)
+    lines = DEMO_SCENARIOS["금감원 사칭형"]
+    ids = {_play(index, call_id, lines)[0]["campaign"] for call_id in ("a", "b")}
+    assert len(ids) == expected
+
+
+def test_cli_writes_records(tmp_path):
+    src, dst = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    src.write_text("\n".join([
+        json.dumps({"call_id": "a", "utterances": DEMO_SCENARIOS["검찰 사칭형"]}),
+        "not json",
+        json.dumps({"call_id": "b", "utterances": "검찰"}),
+        json.dumps({"call_id": [1], "utterances": []}),
+        json.dumps({"call_id": 5, "utterances": DEMO_SCENARIOS["검찰 사칭형"][:3]}),
+        json.dumps({"call_id": "c", "utterances": []}),
+    ]) + "\n", encoding="utf-8")
+    campaigns.main([str(src), "-o", str(dst)])
+    records = [json.loads(line) for line in dst.read_text(encoding="utf-8").splitlines()]
+    assert [r.get("call_id") for r in records] == ["a", None, None, None, 5, "c"]
+    assert [r["line"] for r in records[1:4]] == [2, 3, 4]
+    assert all(r["type"] == "error" for r in records[1:4])
+    assert records[0]["campaign"] == records[4]["campaign"] == 1 and records[4]["phishing"]
+    assert records[5] == {"call_id": "c", "campaign": None, "risk_score": 0}
@@ -0,0 +1,178 @@
+"""탐지 세션 (detector.py)"""
+from datetime import date
+
+import pytest
+
+import detector
+from detector import CallShieldDetector, StreamingSession
+from spam_index import MemorySpamIndex
+
+
+@pytest.fixture
+def spam_db(monkeypatch):
+    """발신 번호 평판이 붙도록 오늘 날짜 신고가 있는 작은 번호 DB로 교체"""
+    today = date.today().isoformat()
+    monkeypatch.setattr(detector, "_spam_index", MemorySpamIndex({
+        "010-9876-5432": {"category": "피싱 신고", "reports": 89, "last_report": today},
+        "070-4567-XXXX": {"category": "불법 대출 대역", "reports": 10, "last_report": today},
+    }))
+    monkeypatch.setattr(detector, "_caller_cache", detector.CallerCache())
+
+
+# ============================================================
+# 증분 위험도 == 재계산
+# ============================================================
+@pytest.mark.parametrize("caller", [None, "010-9876-5432", "070-4567-1234"])
+@pytest.mark.parametrize("fuzzy", [False, True])
+def test_incremental_risk_matches_recalculation(spam_db, conversations, caller, fuzzy):
+    for messages in conversations:
+        d = CallShieldDetector(caller=caller, fuzzy=fuzzy)
+        for turn, message in enumerate(messages):
+            if turn == 1:
+                d.set_campaign(7, 15)
+            d.analyze_message(message)
+            incremental = (d._raw_score, d.risk_score)
+            d._recalculate_risk()
+            assert (d._raw_score, d.risk_score) == incremental, (messages, turn)
+
+
+def test_content_score_excludes_prior_and_boost(spam_db, conversations):
+    for messages in conversations:
+        plain = CallShieldDetector()
+        d = CallShieldDetector(caller="010-9876-5432")
+        assert d._caller_prior > 0
+        d.set_campaign(7, 15)
+        for message in messages:
+            plain.analyze_message(message)
+            d.analyze_message(message)
+            assert d.content_score == plain.risk_score
+
+
+def test_repeated_keywords_are_counted_once():
+    d = CallShieldDetector()
+    first = d.analyze_message("검찰 검찰입니다")
+    again = d.analyze_message("검찰이라니까요")
+    assert [item["keyword"] for item in first["new_detections"]] == ["검찰"]
+    assert again["new_detections"] == [] and again["new_procedures"] == []
+    assert d.risk_score == first["risk_score"] == 25
+    assert d.detected_patterns == {"기관사칭": ["검찰"]}
+
+
+def test_delta_only_results_and_memoized_summary(conversations):
+    for messages in conversations:
+        full, delta = CallShieldDetector(), CallShieldDetector(keep_conversation=False)
+        for message in messages:
+            expected = full.analyze_message(message)
+            result = delta.analyze_message(message, delta_only=True)
+            assert "total_detected_patterns" not in result
+            assert result == {k: v for k, v in expected.items() if not k.startswith("total_")}
+        summary = delta.get_summary()
+        assert delta.get_summary() is summary
+        assert summary["detected_keywords"] == expected["total_detected_patterns"]
+        assert summary["official_procedures"] == expected["total_procedures"]
+        assert summary["conversation_length"] == len(messages) and delta.conversation is None
+        delta.analyze_message("검찰입니다")
+        assert delta.get_summary() is not summary
+
+
+# ============================================================
+# 스트리밍 세션
+# ============================================================
+def test_streaming_matches_across_chunk_boundaries():
+    session = StreamingSession(separator="")
+    assert session.push_final("금감")["new_detections"] == []
+    assert [d["keyword"] for d in session.push_final("원 직원입니다")["new_detections"]] == ["금감원"]
+    result = session.end_utterance()
+    assert result["message"] == "금감원 직원입니다"
+    assert session.detector.conversation == ["금감원 직원입니다"]
+    assert session.end_utterance() is None
+
+
+def test_streaming_matches_whole_utterance(conversations):
+    for messages in conversations:
+        session = StreamingSession()
+        batch = CallShieldDetector()
+        for message in messages:
+            for word in message.split(" "):
+                session.push_partial(word[:1])
+                session.push_final(word)
+            session.end_utterance()
+            batch.analyze_message(message)
+            assert session.detector.risk_score == batch.risk_score
+            # 감지 순서는 조각 확정 순서를 따르므로 집합으로 비교
+            assert ({c: set(k) for c, k in session.detector.detected_patterns.items()}
+                    == {c: set(k) for c, k in batch.detected_patterns.items()})
+
+
+def test_partial_result_is_not_committed():
+    session = StreamingSession()
+    preview = session.push_partial("검찰")
+    assert preview["final"] is False and preview["new_detections"]
+    assert session.detector.risk_score == 0
+    final = session.push_final("검사")
+    assert final["final"] is True and final["new_detections"] == []
+    session.end_utterance()
+    assert session.detector.risk_score == 0 and session.detector.detected_patterns == {}
+
+
+# ============================================================
+# 발신 번호 평판 캐시
+# ============================================================
+class _Loads:
+    """value를 돌려주는 조회 함수를 만들고 실제로 조회한 횟수를 셈"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, value="result"):
+        def load():
+            self.calls += 1
+            return value
+        return load
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(detector, "monotonic", lambda: now[0])
+    return now
+
+
+def test_caller_cache_evicts_least_recently_used(clock):
+    cache, loads = detector.CallerCache(maxsize=2, ttl=60), _Loads()
+    cache.get(1, loads())
+    cache.get(2, loads())
+    cache.get(1, loads())       # 1을 최근으로
+    cache.get(3, loads())       # 가장 오래 안 쓴 2를 밀어냄
+    assert loads.calls == 3
+    cache.get(1, loads())
+    cache.get(2, loads())
+    assert loads.calls == 4
+    assert cache.info() == {"hits": 2, "misses": 4, "hit_rate": 0.3333, "size": 2, "maxsize": 2, "ttl": 60}
+
+
+def test_caller_cache_expires_entries(clock):
+    cache, loads = detector.CallerCache(maxsize=8, ttl=60), _Loads()
+    assert cache.get(1, loads(None)) is None   # 조회 결과가 없는 번호도 캐시
+    clock[0] += 59
+    assert cache.get(1, loads("new")) is None and loads.calls == 1
+    clock[0] += 1
+    assert cache.get(1, loads("new")) == "new" and loads.calls == 2
+    cache.clear()
+    assert cache.get(1, loads("newer")) == "newer" and loads.calls == 3
+
+
+def test_caller_cache_disabled():
+    cache, loads = detector.CallerCache(maxsize=0), _Loads()
+    cache.get(1, loads())
+    cache.get(1, loads())
+    assert loads.calls == 2 and cache.info()["size"] == 0
+
+
+def test_lookup_caller_uses_cache(spam_db):
+    first = detector.lookup_caller("010-9876-5432")
+    assert first["reports"] == 89 and first["reputation"] > 0
+    assert detector.lookup_caller("01098765432") is first
+    assert detector.lookup_caller("010-0000-0000") is None
+    assert detector.lookup_caller("번호 아님") is None
+    assert detector.caller_cache_info()["hits"] == 1 and detector.caller_cache_info()["misses"] == 2
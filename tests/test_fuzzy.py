@@ -0,0 +1,76 @@
+"""근사 키워드 매칭 (fuzzy.py)"""
+import random
+
+import pytest
+
+from detector import PHISHING_PATTERNS
+from fuzzy import MIN_LENGTH, FuzzyMatcher, max_edits, sound_key
+from normalize import normalize_text
+
+KEYWORDS = sorted({
+    normalize_text(k) for info in PHISHING_PATTERNS.values() for k in info["keywords"]
+    if len(normalize_text(k)) >= MIN_LENGTH
+})
+
+
+def _misheard(rng, keyword: str):
+    """한 음절을 발음 키가 같은 다른 음절(받침·비슷한 모음 차이)로 바꾼 키워드 (없으면 None)"""
+    positions = [i for i, ch in enumerate(keyword) if "가" <= ch <= "힣"]
+    if not positions:
+        return None
+    i = rng.choice(positions)
+    first = (ord(keyword[i]) - 0xAC00) // 588 * 588 + 0xAC00
+    similar = [chr(code) for code in range(first, first + 588)
+               if chr(code) != keyword[i] and sound_key(chr(code)) == sound_key(keyword[i])]
+    return keyword[:i] + rng.choice(similar) + keyword[i + 1:]
+
+
+def test_sound_key_keeps_length():
+    for keyword in KEYWORDS:
+        assert len(sound_key(keyword)) == len(keyword)
+    assert sound_key("금감원") == sound_key("금간원")
+    assert sound_key("계좌") == sound_key("개좌")
+    assert sound_key("수사관") != sound_key("수사국")
+
+
+def test_max_edits():
+    assert [max_edits(n) for n in range(1, 10)] == [0, 0, 1, 1, 1, 1, 2, 2, 2]
+
+
+def test_finds_misheard_keywords():
+    matcher = FuzzyMatcher((k, i) for i, k in enumerate(KEYWORDS))
+    rng = random.Random(5)
+    checked = 0
+    for keyword_id, keyword in enumerate(KEYWORDS):
+        misheard = _misheard(rng, keyword)
+        if misheard is None or misheard in KEYWORDS:
+            continue
+        checked += 1
+        hits = dict(matcher.search("네 " + misheard + " 맞습니다"))
+        expected = 100 * (len(keyword) - 1) // len(keyword)
+        assert hits.get(keyword_id) == expected, (keyword, misheard, hits)
+    assert checked > len(KEYWORDS) // 2
+
+
+@pytest.mark.parametrize("text", ["수사국에서 왔습니다", "금감원", "안전하게 보관하세요", "", "abc"])
+def test_rejects_different_sounds_and_exact_matches(text):
+    matcher = FuzzyMatcher([("수사관", 0), ("금감원", 1), ("안전계좌", 2)])
+    assert matcher.search(text) == []
+
+
+def test_skip_ids_and_budget():
+    matcher = FuzzyMatcher([("금감원", 0), ("안전계좌", 1)])
+    text = "금간원 안전개좌"
+    assert matcher.search(text) == [(0, 66), (1, 75)]
+    assert matcher.search(text, skip_ids=0b01) == [(1, 75)]
+    assert matcher.search(text, budget=1) == [(0, 66)]
+    assert matcher.search(text, budget=0) == []
+    # 같은 키워드는 한 번만
+    assert matcher.search("금간원 금간원") == [(0, 66)]
+
+
+def test_budget_bounds_candidates():
+    matcher = FuzzyMatcher([("금감원", 0)])
+    # 발음 키는 같지만 두 음절 이상 다른 후보만 반복되면 예산 안에서 멈춤
+    assert matcher.search("근갈웜 " * 100 + "금간원") == []
+    assert matcher.search("근갈웜 " * 100 + "금간원", budget=200) == [(0, 66)]
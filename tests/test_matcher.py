@@ -0,0 +1,53 @@
+"""키워드 매칭기 (matcher.py)"""
+import marshal
+import random
+
+from matcher import MERGE_BUDGET, KeywordMatcher
+
+
+def _brute_force(patterns: list, text: str) -> list:
+    return sorted(
+        (start, start + len(p), i) for i, p in enumerate(patterns)
+        for start in range(len(text)) if text.startswith(p, start)
+    )
+
+
+def test_matches_brute_force():
+    rng = random.Random(3)
+    for _ in range(300):
+        patterns = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 5))) for _ in range(rng.randint(1, 12))]
+        matcher = KeywordMatcher((p, i) for i, p in enumerate(patterns))
+        restored = KeywordMatcher.from_state(marshal.loads(marshal.dumps(matcher.to_state())))
+        for _ in range(10):
+            text = "".join(rng.choice("abc ") for _ in range(rng.randint(0, 30)))
+            expected = _brute_force(patterns, text)
+            for m in (matcher, restored):
+                assert sorted(m.scan(text)) == expected
+                assert m.values(text) == {i for _, _, i in expected}
+
+
+def test_overlaps_past_merge_budget():
+    # 모든 2글자 조합: 합친 문자열이 상한을 넘어 실행 중 겹침 확인 경로도 타는 경우
+    alphabet = "가나다라마바사아"
+    patterns = [a + b for a in alphabet for b in alphabet]
+    assert len(alphabet) > MERGE_BUDGET
+    matcher = KeywordMatcher((p, i) for i, p in enumerate(patterns))
+    assert matcher._overlaps
+    rng = random.Random(5)
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet + " ") for _ in range(rng.randint(0, 20)))
+        expected = _brute_force(patterns, text)
+        assert sorted(matcher.scan(text)) == expected
+        assert matcher.values(text) == {i for _, _, i in expected}
+
+
+def test_overlapping_korean_keywords():
+    matcher = KeywordMatcher([("송금", "a"), ("금감원", "b"), ("금감", "c")])
+    assert matcher.scan("지금 송금감원으로") == [(3, 5, "a"), (4, 6, "c"), (4, 7, "b")]
+    assert matcher.values("송금감원") == {"a", "b", "c"}
+
+
+def test_empty_matcher():
+    matcher = KeywordMatcher([("", 1)])
+    assert len(matcher) == 0
+    assert matcher.scan("abc") == [] and matcher.values("abc") == set()
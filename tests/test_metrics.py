@@ -0,0 +1,79 @@
+"""계측·Prometheus 텍스트 형식 (metrics.py)"""
+import pytest
+
+import metrics
+from detector import CallShieldDetector
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """테스트 안에서 만든 지표만 담는 빈 레지스트리"""
+    monkeypatch.setattr(metrics, "_REGISTRY", [])
+    return metrics._REGISTRY
+
+
+@pytest.fixture
+def enabled():
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.enable(False)
+    metrics.reset()
+
+
+def test_counter_and_gauge_rendering(registry):
+    counter = metrics.Counter("t_total", "테스트", ("name",))
+    counter.inc('a"b\\c\nd')
+    counter.inc("x", amount=2)
+    counter.inc("x")
+    gauge = metrics.Gauge("t_gauge", "게이지")
+    gauge.set(7)
+    gauge.set(3)
+    assert metrics.render() == (
+        "# HELP t_total 테스트\n"
+        "# TYPE t_total counter\n"
+        't_total{name="a\\"b\\\\c\\nd"} 1\n'
+        't_total{name="x"} 3\n'
+        "# HELP t_gauge 게이지\n"
+        "# TYPE t_gauge gauge\n"
+        "t_gauge 3\n"
+    )
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = metrics.Histogram("t_seconds", "히스토그램", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, "match")
+    lines = metrics.render().splitlines()[2:]
+    assert lines == [
+        't_seconds_bucket{stage="match",le="0.1"} 2',
+        't_seconds_bucket{stage="match",le="1.0"} 3',
+        't_seconds_bucket{stage="match",le="+Inf"} 4',
+        't_seconds_sum{stage="match"} 2.65',
+        't_seconds_count{stage="match"} 4',
+    ]
+
+
+def test_engine_counts_messages_and_keywords(enabled):
+    d = CallShieldDetector()
+    d.analyze_message("검찰입니다")
+    d.analyze_message("안녕하세요")
+    assert metrics.MESSAGES.values == {(): 2}
+    assert metrics.KEYWORD_HITS.values == {("기관사칭", "검찰"): 1}
+    assert metrics.CATEGORY_HITS.values == {("기관사칭",): 1}
+    assert metrics.SESSIONS_CREATED.values == {(): 1}
+    stages = {labels[0] for labels in metrics.STAGE_SECONDS.values}
+    assert {"match", "result"} <= stages
+    assert "callshield_messages_total 2" in metrics.render()
+
+
+def test_disabled_engine_records_nothing():
+    metrics.reset()
+    CallShieldDetector().analyze_message("검찰입니다")
+    assert all(not metric.values for metric in metrics._REGISTRY)
+
+
+def test_dump_writes_render(registry, tmp_path):
+    metrics.Counter("t_total", "테스트").inc()
+    metrics.dump(str(tmp_path / "m.prom"))
+    assert (tmp_path / "m.prom").read_text(encoding="utf-8") == metrics.render()
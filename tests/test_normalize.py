@@ -0,0 +1,91 @@
+"""발화 정규화·키워드 변형 (normalize.py)"""
+import random
+import unicodedata
+
+import pytest
+
+import detector
+from detector import CallShieldDetector
+from normalize import TURN_SEPARATOR, keyword_variants, normalize_text, offset_map
+
+NFD_MESSAGE = unicodedata.normalize("NFD", "서울중앙지검 검찰입니다")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("OTP!", "otp"),
+    ("ｏｔｐ", "otp"),
+    ("  안녕\t하세요\n", "안녕 하세요"),
+    ("수사,관련", "수사 관련"),
+    ("끝났습니다. 네", "끝났습니다 네"),
+    ("a_b·c…d", "a b c d"),
+    ("café", "café"),
+    (NFD_MESSAGE, "서울중앙지검 검찰입니다"),
+    ("?!", ""),
+    ("체포" + TURN_SEPARATOR + "영장", "체포" + TURN_SEPARATOR + "영장"),
+    ("체포. " + TURN_SEPARATOR + " 영장", "체포 " + TURN_SEPARATOR + " 영장"),
+])
+def test_normalize_text(text, expected):
+    assert normalize_text(text) == expected
+
+
+def test_keyword_variants():
+    assert keyword_variants("체포 영장") == ["체포 영장", "체포영장"]
+    assert keyword_variants("본인확인") == ["본인확인", "본인 확인"]
+    assert keyword_variants("수사관") == ["수사관"]
+    assert keyword_variants("otp") == ["otp", "o t p"]
+    assert keyword_variants("url 접속") == ["url 접속", "url접속", "u r l 접속", "u r l접속"]
+
+
+@pytest.mark.parametrize("message", [
+    "그 수사 관련 기사 봤어?", "저는 경찰 청소년과입니다", "국세 청구서", "방법 원래 그래요",
+    "수사,관련 기사", "경찰,청소년과", "국세.청구서", "수사. 관련", "방법-원래",
+    "체포" + TURN_SEPARATOR + "영장", "o" + TURN_SEPARATOR + "t p", "본인 " + TURN_SEPARATOR + "확인",
+])
+def test_keywords_do_not_cross_word_gaps(message):
+    # "경찰" 자체는 기관명이라 절차 안내는 나올 수 있지만 "경찰청" 같은 키워드는 잡히면 안 됨
+    assert CallShieldDetector().analyze_message(message)["new_detections"] == []
+
+
+@pytest.mark.parametrize("message, keyword", [
+    ("체포영장이 나왔습니다", "체포 영장"),
+    ("체포 영장이 나왔습니다", "체포 영장"),
+    ("본인 확인 부탁드립니다", "본인확인"),
+    ("본인확인 부탁드립니다", "본인확인"),
+    ("주민 등록 번호 불러 주세요", "주민등록번호"),
+    ("O T P 번호 불러 주세요", "OTP"),
+    ("O.T.P 번호", "OTP"),
+    ("ｏｔｐ!", "OTP"),
+    (NFD_MESSAGE, "검찰"),
+    (NFD_MESSAGE, "지검"),
+])
+def test_keyword_variants_match(message, keyword):
+    detections = CallShieldDetector().analyze_message(message)["new_detections"]
+    assert keyword in [item["keyword"] for item in detections]
+
+
+@pytest.mark.parametrize("text", [
+    "", "  ", "OTP!", " 안녕  하세요 ", "ｏｔｐ", "ﬁle", "①번", "áb", "é́", "수사, 관련.",
+    NFD_MESSAGE, "각 ᄀ", "ᅡᄀ", "_-_", "a‍b", "a " + TURN_SEPARATOR + " b",
+])
+def test_offset_map_follows_normalize_text(text):
+    offsets = offset_map(text)
+    assert len(offsets) == len(normalize_text(text))
+    assert offsets == sorted(offsets) and all(0 <= i < len(text) for i in offsets)
+
+
+def test_offset_map_random():
+    rng = random.Random(3)
+    alphabet = list("가나 서울검찰ab OTPｏｔｐ.,!?-_%·…\t\n　ß́e‍ㄱㅏ각ᅡ") + ["ﬁ", "①", NFD_MESSAGE[:3], TURN_SEPARATOR]
+    for _ in range(5000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        normalized = normalize_text(text)
+        assert len(offset_map(text)) == len(normalized), text
+        assert normalized == normalized.strip() and "  " not in normalized
+
+
+def test_scan_message_offsets_point_into_original():
+    message = unicodedata.normalize("NFD", "네, 서울중앙지검 검찰입니다")
+    keywords = detector.scan_message(message)["keywords"]
+    assert [keyword for _, keyword, _ in keywords] == ["지검", "검찰"]
+    for _, keyword, start in keywords:
+        assert normalize_text(message[start:]).startswith(keyword)
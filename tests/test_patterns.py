@@ -0,0 +1,192 @@
+"""패턴 세트 (patterns.py)"""
+import os
+
+import pytest
+
+import detector
+from detector import OFFICIAL_PROCEDURES, PHISHING_PATTERNS, CallShieldDetector
+from patterns import (
+    CACHE_SUFFIX, MATCH_CACHE_SIZE, PatternOverlay, PatternSet, configure_match_cache, export_pack, load_pack,
+    match_cache_info, procedure_key, validate,
+)
+
+PATTERNS = {
+    "기관사칭": {"keywords": ["검찰", "금감원"], "weight": 25, "label": "기관 사칭", "description": ""},
+}
+PROCEDURES = {
+    "검찰": ["전화로 송금을 요구하지 않습니다", "검찰은 서면으로 통지합니다"],
+    "금감원": ["전화로 송금을 요구하지 않습니다"],
+}
+
+
+def test_shared_procedure_sentences_get_one_id():
+    ps = PatternSet("t", PATTERNS, PROCEDURES)
+    assert ps.procedure_texts == ["전화로 송금을 요구하지 않습니다", "검찰은 서면으로 통지합니다"]
+    assert ps.org_procedures == [(0, 1), (0,)]
+    assert ps.procedure_keys == [procedure_key(text) for text in ps.procedure_texts]
+
+
+def test_procedure_key_does_not_depend_on_pack_order():
+    reordered = dict(reversed(PROCEDURES.items()))
+    a = PatternSet("a", PATTERNS, PROCEDURES)
+    b = PatternSet("b", PATTERNS, reordered)
+    assert dict(zip(a.procedure_keys, a.procedure_texts)) == dict(zip(b.procedure_keys, b.procedure_texts))
+
+
+def test_localized_procedures_fall_back_to_original():
+    key = procedure_key("검찰은 서면으로 통지합니다")
+    ps = PatternSet("t", PATTERNS, PROCEDURES, {"en": {key: "Prosecutors notify in writing"}})
+    d = CallShieldDetector(patterns=ps)
+    d.analyze_message("검찰입니다")
+    assert d.localized_procedures("en") == ["전화로 송금을 요구하지 않습니다", "Prosecutors notify in writing"]
+    assert d.localized_procedures() == d.procedures
+    assert d.procedure_keys == ps.procedure_keys
+
+
+@pytest.mark.parametrize("message", ["금감원입니다", "검찰과 금감원입니다"])
+def test_procedures_are_shown_once(message):
+    d = CallShieldDetector(patterns=PatternSet("t", PATTERNS, PROCEDURES))
+    d.analyze_message(message)
+    d.analyze_message(message)
+    assert len(d.procedures) == len(set(d.procedures))
+
+
+def test_builtin_keys_are_unique():
+    ps = PatternSet("builtin", PHISHING_PATTERNS, OFFICIAL_PROCEDURES)
+    assert len(set(ps.procedure_keys)) == len(ps.procedure_texts)
+
+
+# ============================================================
+# 패턴 팩 로드·캐시·교체
+# ============================================================
+def _pack(tmp_path, keywords=("검찰", "금감원"), name="pack.json"):
+    path = tmp_path / name
+    export_pack(str(path), "v1", {"기관사칭": dict(PATTERNS["기관사칭"], keywords=list(keywords))}, PROCEDURES)
+    return str(path)
+
+
+def test_pack_cache_round_trip(tmp_path):
+    path = _pack(tmp_path)
+    compiled = load_pack(path)
+    assert os.path.exists(path + CACHE_SUFFIX)
+    cached = load_pack(path)
+    assert cached.to_state() == compiled.to_state()
+    assert cached.match("금감원 검찰입니다") == compiled.match("금감원 검찰입니다") == ((0, 1), (0, 1))
+
+
+def test_stale_or_corrupt_cache_is_rebuilt(tmp_path):
+    path = _pack(tmp_path)
+    load_pack(path)
+    with open(path + CACHE_SUFFIX, "r+b") as f:
+        f.truncate(f.seek(0, 2) // 2)
+    assert load_pack(path).match("금감원") == ((1,), (1,))
+    # 팩 내용이 바뀌면 해시가 달라 이전 캐시를 쓰지 않음
+    _pack(tmp_path, keywords=("검찰", "금감원", "수사관"))
+    assert load_pack(path).match("수사관") == ((2,), ())
+
+
+@pytest.mark.parametrize("data", [
+    {},
+    {"version": "v", "phishing_patterns": {}},
+    {"version": "v", "phishing_patterns": {"a": {"keywords": [""], "weight": 1, "label": "", "description": ""}}},
+    {"version": "v", "phishing_patterns": {"a": {"keywords": ["x"], "weight": "1", "label": "", "description": ""}}},
+    {"version": "v", "phishing_patterns": PATTERNS, "official_procedures": {"검찰": "문장"}},
+    {"version": "v", "phishing_patterns": PATTERNS, "procedure_translations": {"en": {"P1": 1}}},
+])
+def test_validate_rejects_bad_packs(data):
+    with pytest.raises(ValueError):
+        validate(data)
+
+
+def test_swap_keeps_running_sessions_on_their_version(tmp_path):
+    previous = detector.active_patterns()
+    running = CallShieldDetector()
+    detector.load_pattern_pack(_pack(tmp_path, keywords=("특별수사팀",)))
+    try:
+        fresh = CallShieldDetector()
+        assert fresh.patterns.version == "v1" and running.patterns is previous
+        assert fresh.analyze_message("특별수사팀입니다")["risk_score"] == 25
+        assert running.analyze_message("특별수사팀입니다")["risk_score"] == 0
+        fresh.reset()
+        running.reset()
+        assert fresh.patterns.version == "v1" and running.patterns is previous
+    finally:
+        detector.activate_patterns(previous)
+
+
+# ============================================================
+# 발화 매칭 캐시
+# ============================================================
+def _trajectory(make_detector, messages) -> list:
+    d = make_detector()
+    return [(d.analyze_message(m)["risk_score"], d.detected_patterns) for m in messages]
+
+
+@pytest.fixture
+def no_match_cache():
+    configure_match_cache(0)
+    yield
+    configure_match_cache(MATCH_CACHE_SIZE)
+
+
+def test_match_cache_is_transparent(no_match_cache, conversations):
+    uncached = [_trajectory(CallShieldDetector, messages) for messages in conversations]
+    configure_match_cache(MATCH_CACHE_SIZE)
+    patterns = detector.active_patterns()
+    for messages, expected in zip(conversations, uncached):
+        # 두 번째는 캐시 적중
+        assert _trajectory(CallShieldDetector, messages) == expected
+        assert _trajectory(CallShieldDetector, messages) == expected
+        for message in messages:
+            assert patterns.match(message) == patterns._match(message)
+    assert match_cache_info()["hits"] > 0
+
+
+def test_long_messages_are_not_cached(no_match_cache):
+    configure_match_cache(16)
+    patterns = detector.active_patterns()
+    message = "검찰입니다 " * 100
+    assert patterns.match(message) == patterns.match(message) == patterns._match(message)
+    assert match_cache_info()["size"] == 0
+
+
+# ============================================================
+# 테넌트 오버레이
+# ============================================================
+def test_empty_overlay_is_transparent(conversations):
+    base = detector.active_patterns()
+    overlay = PatternOverlay(base, "noop")
+    for messages in conversations:
+        for message in messages:
+            assert overlay.match(message) == base.match(message)
+            assert overlay.scan(message, offsets=True) == base.scan(message, offsets=True)
+            assert overlay.fuzzy_match(message) == base.fuzzy_match(message)
+        assert (_trajectory(lambda: CallShieldDetector(patterns=overlay), messages)
+                == _trajectory(CallShieldDetector, messages))
+
+
+def test_overlay_applies_tenant_settings():
+    overlay = PatternOverlay(detector.active_patterns(), "bank", keywords={"기관사칭": ["특별수사팀", "검찰"]},
+                             weights={"기관사칭": 40}, disabled=["앱설치유도"])
+    assert overlay.keyword_table[-1] == ("기관사칭", "특별수사팀")
+    d = CallShieldDetector(patterns=overlay)
+    result = d.analyze_message("특별수사팀입니다. 팀뷰어 설치하세요")
+    assert d.detected_patterns == {"기관사칭": ["특별수사팀"]} and result["risk_score"] == 40
+    d.reset()
+    assert d.patterns is overlay and d.risk_score == 0
+
+
+@pytest.mark.parametrize("settings", [
+    {"keywords": {"없는카테고리": ["x"]}},
+    {"weights": {"기관사칭": "10"}},
+    {"keywords": {"기관사칭": [""]}},
+    {"keywords": {"앱설치유도": ["원격앱"]}, "disabled": ["앱설치유도"]},
+])
+def test_overlay_rejects_bad_settings(settings):
+    with pytest.raises(ValueError):
+        PatternOverlay(detector.active_patterns(), "bad", **settings)
+
+
+def test_overlay_is_not_cached():
+    with pytest.raises(TypeError):
+        PatternOverlay(detector.active_patterns(), "noop").to_state()
@@ -0,0 +1,52 @@
+"""전화번호 정규화 (phone.py)"""
+import pytest
+
+from phone import block_label, block_range, key_to_number, normalize_number, number_key, parse_block
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("02-1234-5678", "0212345678"),
+    ("(02) 1234 5678", "0212345678"),
+    ("+82-2-1234-5678", "0212345678"),
+    ("+82 (0)2 1234 5678", "0212345678"),
+    ("0082-10-9876-5432", "01098765432"),
+    ("+82 1588-1234", "15881234"),          # 대표번호는 0을 붙이지 않음
+    ("１５８８－１２３４", "15881234"),        # 전각 숫자
+    ("+1-202-555-0100", "+12025550100"),
+    ("", None),
+    ("전화번호", None),
+    ("+82", None),
+    ("1" * 19, None),
+])
+def test_normalize_number(raw, expected):
+    assert normalize_number(raw) == expected
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("070-1234-XXXX", ("0701234", 4)),
+    ("070-1234-xx**", ("0701234", 4)),
+    ("+82-70-1234-??", ("0701234", 2)),
+    ("070-12X4-5678", None),
+    ("070-1234-5678", None),
+    ("XXXX", None),
+])
+def test_parse_block(pattern, expected):
+    assert parse_block(pattern) == expected
+
+
+@pytest.mark.parametrize("number", ["0212345678", "01098765432", "15881234", "+12025550100", "+0012"])
+def test_number_key_round_trip(number):
+    assert key_to_number(number_key(number)) == number
+
+
+def test_keys_keep_leading_zeros_and_order():
+    assert number_key("0212345678") != number_key("212345678")
+    numbers = ["0212345678", "0212345679", "0312345678"]
+    assert sorted(numbers, key=number_key) == numbers
+
+
+def test_block_range_covers_same_length_numbers():
+    start, end = block_range("0701234", 4)
+    assert start == number_key("07012340000") and end == number_key("07012349999")
+    assert not start <= number_key("0701234000") <= end
+    assert block_label(start, end) == "0701234XXXX"
@@ -0,0 +1,68 @@
+"""턴별 위험도 궤적 일괄 계산 (replay.py)"""
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import detector  # noqa: E402
+import replay  # noqa: E402
+from detector import CallShieldDetector  # noqa: E402
+from patterns import PatternOverlay  # noqa: E402
+
+
+def test_replay_matches_turn_by_turn(conversations):
+    calls = list(enumerate(conversations + [[], [""]]))
+    for (call_id, messages), record in zip(calls, replay.replay_calls(calls)):
+        d = CallShieldDetector()
+        results = [d.analyze_message(m) for m in messages]
+        assert record["call_id"] == call_id
+        assert record["risk_scores"] == [r["risk_score"] for r in results]
+        assert record["risk_levels"] == [r["risk_level"]["level"] for r in results]
+
+
+def test_replay_empty_block():
+    assert replay.replay([]) == {"risk_scores": [], "risk_levels": []}
+    assert [r["risk_scores"] for r in replay.replay_calls([(1, []), (2, [])])] == [[], []]
+
+
+def test_hit_matrix_matches_per_turn(conversations):
+    patterns = detector.active_patterns()
+    utterances = [message for messages in conversations for message in messages]
+    hits = replay.hit_matrix(utterances)
+    for turn, message in enumerate(utterances):
+        assert hits[turn].nonzero()[0].tolist() == list(patterns.match(message)[0])
+
+
+@pytest.mark.parametrize("utterances", [["금감", "원입니다"], ["송", "금해 주세요"], ["안전\n", "계좌"], ["", "검찰"]])
+def test_matches_do_not_cross_turns(utterances):
+    hits = replay.hit_matrix(utterances)
+    patterns = detector.active_patterns()
+    for turn, message in enumerate(utterances):
+        assert hits[turn].nonzero()[0].tolist() == list(patterns.match(message)[0])
+
+
+def test_hit_matrix_with_overlay():
+    overlay = PatternOverlay(detector.active_patterns(), "bank",
+                             keywords={"기관사칭": ["특별수사팀"]}, disabled=["앱설치유도"])
+    utterances = ["특별수사팀입니다", "팀뷰어 설치하세요", "검찰입니다"]
+    hits = replay.hit_matrix(utterances, overlay)
+    assert [row.nonzero()[0].tolist() for row in hits] == [list(overlay.match(m)[0]) for m in utterances]
+    assert hits.shape == (3, len(overlay.keyword_table)) and hits[0].any() and not hits[1].any()
+
+
+def test_cli_writes_error_records(tmp_path):
+    src, dst = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    src.write_text("\n".join([
+        json.dumps({"call_id": "a", "utterances": ["검찰입니다"]}),
+        "not json",
+        json.dumps({"call_id": "b", "utterances": "검찰"}),
+        json.dumps({"utterances": []}),
+        json.dumps({"call_id": "c", "utterances": []}),
+    ]) + "\n", encoding="utf-8")
+    replay.main([str(src), "-o", str(dst), "--block-size", "2"])
+    records = [json.loads(line) for line in dst.read_text(encoding="utf-8").splitlines()]
+    assert [r.get("call_id") for r in records] == ["a", None, None, None, "c"]
+    assert [r["line"] for r in records[1:4]] == [2, 3, 4]
+    assert all(r["type"] == "error" for r in records[1:4])
+    assert records[0]["risk_scores"] == [25]
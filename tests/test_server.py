@@ -0,0 +1,265 @@
+"""분석 서버 (server.py)"""
+import asyncio
+import json
+import os
+import struct
+
+import pytest
+
+import detector
+from detector import DEMO_SCENARIOS
+from server import AnalysisServer, LoadShedError, SessionClosedError, SessionManager
+
+
+class _Writer:
+    """_websocket·publish가 쓰는 만큼만 흉내 낸 StreamWriter"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.transport = self
+        self.closed = False
+
+    def write(self, data: bytes):
+        self.data += data
+
+    def get_write_buffer_size(self) -> int:
+        return 0
+
+    def close(self):
+        self.closed = True
+
+    async def drain(self):
+        pass
+
+    def frames(self) -> list:
+        """101 응답 뒤의 서버 프레임들 [(opcode, payload), ...]"""
+        data = bytes(self.data).split(b"\r\n\r\n", 1)[1]
+        frames = []
+        while data:
+            first, length = data[0], data[1] & 0x7F
+            pos = 2
+            if length == 126:
+                (length,) = struct.unpack("!H", data[2:4])
+                pos = 4
+            frames.append((first & 0x0F, data[pos:pos + length]))
+            data = data[pos + length:]
+        return frames
+
+
+def _client_frame(opcode: int, payload: bytes) -> bytes:
+    """클라이언트 → 서버 프레임 (마스킹, 126바이트 미만)"""
+    mask = os.urandom(4)
+    masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return struct.pack("!BB", 0x80 | opcode, 0x80 | len(payload)) + mask + masked
+
+
+async def _open_websocket(server, call_id, tenant=None):
+    reader, writer = asyncio.StreamReader(), _Writer()
+    task = asyncio.create_task(server._websocket(call_id, {}, reader, writer, tenant))
+    await asyncio.sleep(0)
+    return reader, writer, task
+
+
+def _close_code(payload: bytes) -> int:
+    return struct.unpack("!H", payload[:2])[0]
+
+
+# ============================================================
+# HTTP
+# ============================================================
+@pytest.mark.parametrize("body", [
+    b'{"text": 123}', b'{"txt": "hi"}', b'[]', b"{", b'{"text": "hi", "caller": 1}',
+    b'{"text": "hi", "tenant": ["x"]}', b'{"text": "hi", "tenant": "no-such-tenant"}',
+])
+def test_rejects_malformed_messages(body):
+    server = AnalysisServer(SessionManager())
+    status, _ = asyncio.run(server._route("POST", "/calls/c1/messages", body))
+    assert status == 400
+
+
+def test_message_summary_and_close():
+    async def scenario():
+        server = AnalysisServer(SessionManager())
+        body = json.dumps({"text": "서울중앙지검 검찰입니다"}).encode()
+        status, result = await server._route("POST", "/calls/c%201/messages", body)
+        assert status == 200 and result["call_id"] == "c 1" and result["risk_score"] == 30
+        status, summary = await server._route("GET", "/calls/c%201", b"")
+        assert status == 200 and summary["detected_keywords"] == {"기관사칭": ["검찰", "지검"]}
+        assert (await server._route("DELETE", "/calls/c%201", b""))[0] == 200
+        assert (await server._route("GET", "/calls/c%201", b""))[0] == 404
+        assert (await server._route("PUT", "/calls/c%201/messages", b""))[0] == 405
+        assert (await server._route("GET", "/nothing", b""))[0] == 404
+
+    asyncio.run(scenario())
+
+
+def test_tenant_applies_to_new_sessions(monkeypatch):
+    monkeypatch.setattr(detector, "_tenants", {})
+    monkeypatch.setattr(detector, "_tenant_overlays", {})
+    detector.register_tenant("bank", keywords={"기관사칭": ["특별수사팀"]})
+
+    async def scenario():
+        server = AnalysisServer(SessionManager())
+        body = json.dumps({"text": "특별수사팀입니다", "tenant": "bank"}).encode()
+        status, result = await server._route("POST", "/calls/t1/messages", body)
+        assert status == 200 and result["risk_score"] == 25
+        # 테넌트 없이 만든 세션에는 추가 키워드가 없음
+        body = json.dumps({"text": "특별수사팀입니다"}).encode()
+        status, result = await server._route("POST", "/calls/t2/messages", body)
+        assert status == 200 and result["risk_score"] == 0
+
+    asyncio.run(scenario())
+
+
+# ============================================================
+# WebSocket
+# ============================================================
+def test_websocket_result_and_alert():
+    async def scenario():
+        server = AnalysisServer(SessionManager())
+        reader, writer, task = await _open_websocket(server, "w")
+        reader.feed_data(_client_frame(0x1, "검찰입니다".encode()))
+        reader.feed_data(_client_frame(0x8, struct.pack("!H", 1000)))
+        await asyncio.wait_for(task, 1)
+        events = [json.loads(payload) for opcode, payload in writer.frames() if opcode == 0x1]
+        assert [e["type"] for e in events] == ["alert", "result"]
+        assert writer.frames()[-1][0] == 0x8
+
+    asyncio.run(scenario())
+
+
+def test_websocket_invalid_utf8_closes_with_1007():
+    async def scenario():
+        server = AnalysisServer(SessionManager())
+        reader, writer, task = await _open_websocket(server, "w")
+        reader.feed_data(_client_frame(0x1, b"\xff\xfe"))
+        await asyncio.wait_for(task, 1)
+        opcode, payload = writer.frames()[-1]
+        assert opcode == 0x8 and _close_code(payload) == 1007
+
+    asyncio.run(scenario())
+
+
+def test_websocket_too_large_closes_with_1009():
+    async def scenario():
+        server = AnalysisServer(SessionManager())
+        reader, writer, task = await _open_websocket(server, "w")
+        reader.feed_data(struct.pack("!BBQ", 0x81, 127, 1 << 20))
+        await asyncio.wait_for(task, 1)
+        opcode, payload = writer.frames()[-1]
+        assert opcode == 0x8 and _close_code(payload) == 1009
+
+    asyncio.run(scenario())
+
+
+def test_websocket_session_limit_after_close():
+    async def scenario():
+        manager = SessionManager(max_sessions=1)
+        server = AnalysisServer(manager)
+        reader, writer, task = await _open_websocket(server, "w")
+        # 세션이 종료되고 다른 통화가 자리를 차지한 뒤 도착한 발화
+        manager.close("w")
+        manager.get("other")
+        reader.feed_data(_client_frame(0x1, "검찰입니다".encode()))
+        await asyncio.wait_for(task, 1)
+        frames = writer.frames()
+        assert frames[-2][0] == 0x1 and json.loads(frames[-2][1])["type"] == "error"
+        assert frames[-1][0] == 0x8 and _close_code(frames[-1][1]) == 1013
+
+    asyncio.run(scenario())
+
+
+# ============================================================
+# 세션 관리·스케줄러
+# ============================================================
+def test_close_with_cancelled_waiter():
+    async def scenario():
+        manager = SessionManager()
+        manager.get("c1")
+        # 스케줄러가 돌기 전에 두 발화를 넣고 첫 요청은 취소
+        first = asyncio.create_task(manager.submit("c1", "검찰입니다"))
+        second = asyncio.create_task(manager.submit("c1", "금감원입니다"))
+        await asyncio.sleep(0)
+        assert manager.pending == 2
+        first.cancel()  # 기다리던 future가 바로 취소됨
+        assert manager.close("c1")["call_id"] == "c1"
+        assert manager.pending == 0
+        with pytest.raises(SessionClosedError):
+            await second
+
+    asyncio.run(scenario())
+
+
+async def _processing_order(manager, submissions) -> list:
+    """스케줄러가 돌기 전에 발화를 모두 넣고 처리된 (통화 ID, 발화) 순서를 반환"""
+    order = []
+    process = manager._process
+
+    def record(session, text, futures):
+        order.append((session.call_id, text))
+        process(session, text, futures)
+
+    manager._process = record
+    await asyncio.gather(*(manager.submit(call_id, text) for call_id, text in submissions))
+    return order
+
+
+def _critical_session(manager, call_id):
+    session = manager.get(call_id)
+    for message in DEMO_SCENARIOS["검찰 사칭형"]:
+        session.detector.analyze_message(message)
+    assert session.priority == 0
+
+
+@pytest.mark.parametrize("max_wait, expected", [
+    # 엄격한 우선순위: safe 세션은 critical 세션 발화가 모두 끝날 때까지 대기
+    (60.0, ["hot"] * 4 + ["cold"]),
+    # 에이징: 먼저 와서 오래 기다린 safe 세션 발화가 먼저
+    (0.0, ["cold"] + ["hot"] * 4),
+])
+def test_scheduler_priority_and_aging(max_wait, expected):
+    async def scenario():
+        manager = SessionManager(max_wait=max_wait)
+        _critical_session(manager, "hot")
+        manager.get("cold")
+        order = await _processing_order(
+            manager, [("cold", "네")] + [("hot", f"계좌번호 {i}") for i in range(4)],
+        )
+        assert [call_id for call_id, _ in order] == expected
+
+    asyncio.run(scenario())
+
+
+def test_coalesced_turns_do_not_match_across():
+    async def scenario():
+        manager = SessionManager(max_pending=4, coalesce_at=0.5)
+        # 스케줄러가 돌기 전에: a·b 발화로 대기 2개 → a의 다음 발화는 a의 대기 발화에 합쳐짐
+        results = await asyncio.gather(
+            manager.submit("a", "체포"), manager.submit("b", "네"), manager.submit("a", "영장이 나왔습니다"),
+        )
+        assert results[0] is results[2]
+        assert results[0]["coalesced"] == 2 and results[0]["message"] == "체포\n영장이 나왔습니다"
+        assert results[0]["new_detections"] == [] and manager.coalesced == 1
+        # 한 발화였다면 감지
+        assert (await manager.submit("c", "체포 영장이 나왔습니다"))["new_detections"]
+
+    asyncio.run(scenario())
+
+
+def test_overload_sheds_safe_sessions_only():
+    async def scenario():
+        manager = SessionManager(max_pending=3, coalesce_at=1.0)
+        _critical_session(manager, "hot")
+        waiting = [asyncio.ensure_future(manager.submit(f"c{i}", "네")) for i in range(3)]
+        await asyncio.sleep(0)
+        assert manager.pending == 3
+        with pytest.raises(LoadShedError):
+            await manager.submit("c9", "네")
+        assert manager.shed == 1
+        # critical 세션은 상한을 넘어도 받음
+        result = await manager.submit("hot", "계좌번호 불러 주세요")
+        assert result["call_id"] == "hot"
+        await asyncio.gather(*waiting)
+        assert manager.pending == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,128 @@
+"""샤드 라우터 (shard.py)"""
+import asyncio
+import json
+
+import pytest
+
+from server import _read_request, _write_response
+from shard import ShardRouter, shard_for
+
+
+def test_shard_for_is_stable():
+    # CRC32 기반이라 프로세스·재시작·PYTHONHASHSEED와 무관하게 항상 같은 값
+    assert [shard_for(call_id, 4) for call_id in ("c1", "c2", "통화-1", "")] == [1, 3, 2, 0]
+    assert shard_for("c1", 1) == 0
+
+
+def test_shard_for_spreads_calls():
+    counts = [0] * 4
+    for i in range(4000):
+        counts[shard_for(f"call-{i}", 4)] += 1
+    assert min(counts) > 800
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("/calls/c1/messages", (1, "/calls/c1/messages")),
+    ("/ws/c1", (1, "/ws/c1")),
+    ("/calls/%ED%86%B5%ED%99%94-1", (2, "/calls/%ED%86%B5%ED%99%94-1")),
+    ("/shards/2/metrics", (2, "/metrics")),
+    ("/shards/4/metrics", (None, "/shards/4/metrics")),
+    ("/calls/", (None, "/calls/")),
+    ("/other", (None, "/other")),
+])
+def test_route(path, expected):
+    router = ShardRouter([("127.0.0.1", 0)] * 4)
+    assert router.route(path) == expected
+
+
+async def _backend(index: int, log: list):
+    """요청받은 경로를 그대로 돌려주는 가짜 워커"""
+    async def handle(reader, writer):
+        while True:
+            request = await _read_request(reader)
+            if request is None:
+                break
+            method, target, headers, body = request
+            log.append((index, method, target, body))
+            if target == "/health":
+                _write_response(writer, 200, {"sessions": index + 1}, True)
+            else:
+                _write_response(writer, 200, {"worker": index, "path": target}, True)
+            await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+async def _request(port: int, method: str, target: str, body: bytes = b"") -> tuple[int, dict]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {target} HTTP/1.1\r\ncontent-length: {len(body)}\r\n"
+                 "connection: close\r\n\r\n".encode() + body)
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+def test_router_forwards_to_call_worker():
+    async def scenario():
+        log = []
+        backends = [await _backend(i, log) for i in range(4)]
+        router = ShardRouter([srv.sockets[0].getsockname()[:2] for srv in backends])
+        front = await asyncio.start_server(router.handle, "127.0.0.1", 0)
+        port = front.sockets[0].getsockname()[1]
+        try:
+            body = json.dumps({"text": "검찰입니다"}).encode()
+            for call_id in ("c1", "c2", "통화-1"):
+                status, result = await _request(port, "POST", f"/calls/{call_id}/messages", body)
+                assert status == 200 and result["worker"] == shard_for(call_id, 4)
+            # 같은 통화는 항상 같은 워커, 본문도 그대로 전달
+            await _request(port, "POST", "/calls/c1/messages", body)
+            assert [entry[0] for entry in log if entry[2] == "/calls/c1/messages"] == [1, 1]
+            assert all(entry[3] == body for entry in log)
+            # 유휴 연결 재사용
+            assert len(router._idle[1]) == 1
+
+            assert await _request(port, "GET", "/shards/2/metrics?x=1") == (200, {"worker": 2, "path": "/metrics?x=1"})
+            assert (await _request(port, "GET", "/nothing"))[0] == 404
+            status, health = await _request(port, "GET", "/health")
+            assert status == 200 and health["sessions"] == 10 and health["workers"] == 4
+
+            # 워커가 내려가면 503
+            backends[0].close()
+            await backends[0].wait_closed()
+            router._idle[0].clear()
+            assert (await _request(port, "GET", "/shards/0/health"))[0] == 503
+        finally:
+            front.close()
+            for srv in backends:
+                srv.close()
+
+    asyncio.run(scenario())
+
+
+def test_router_tunnels_websocket():
+    async def scenario():
+        async def echo(reader, writer):
+            request = await _read_request(reader)
+            writer.write(f"HTTP/1.1 101 Switching Protocols\r\nx-path: {request[1]}\r\n\r\n".encode())
+            while data := await reader.read(1024):
+                writer.write(data.upper())
+            writer.close()
+
+        backend = await asyncio.start_server(echo, "127.0.0.1", 0)
+        router = ShardRouter([backend.sockets[0].getsockname()[:2]])
+        front = await asyncio.start_server(router.handle, "127.0.0.1", 0)
+        try:
+            reader, writer = await asyncio.open_connection(*front.sockets[0].getsockname()[:2])
+            writer.write(b"GET /ws/c1 HTTP/1.1\r\nupgrade: websocket\r\nconnection: Upgrade\r\n\r\n")
+            head = await reader.readuntil(b"\r\n\r\n")
+            assert head.startswith(b"HTTP/1.1 101") and b"x-path: /ws/c1" in head
+            writer.write(b"frame")
+            assert await reader.readexactly(5) == b"FRAME"
+            writer.close()
+        finally:
+            front.close()
+            backend.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,109 @@
+"""스팸 번호 인덱스 (spam_index.py)"""
+import csv
+import random
+
+import pytest
+
+from spam_index import MemorySpamIndex, SpamIndex, build_index, lookup_key, merge_index
+
+ROWS = [
+    ("02-1234-5678", "보이스피싱", 5, "2025-01-10"),
+    ("0212345678", "대출 사기", 2, "2025-02-01"),   # 같은 번호의 다른 표기: 합산, 최신 카테고리
+    ("+82-10-9876-5432", "보이스피싱", 89, "2025-01-15"),
+    ("070-4567-XXXX", "불법 대출 대역", 10, "2025-01-20"),
+    ("070-4567-12XX", "텔레마케팅", 3, "2024-12-01"),  # 넓은 대역 안의 좁은 대역
+    ("+1-202-555-0100", "해외 스팸", 1, "2024-11-30"),
+    ("전화번호 아님", "스팸", 1, "2025-01-01"),
+]
+
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["number", "category", "reports", "last_report"])
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def index(tmp_path):
+    _write_csv(tmp_path / "numbers.csv", ROWS)
+    # 작은 run_size로 외부 정렬 병합 경로까지 사용
+    assert build_index(str(tmp_path / "numbers.csv"), str(tmp_path / "spam.idx"), run_size=2) == 3
+    index = SpamIndex(str(tmp_path / "spam.idx"))
+    yield index
+    index.close()
+
+
+def test_duplicate_rows_are_merged(index):
+    assert index.lookup("02)1234-5678") == {
+        "category": "대출 사기", "reports": 7, "last_report": "2025-02-01", "match": "exact",
+    }
+
+
+def test_narrowest_block_wins(index):
+    assert index.lookup("070-4567-1299")["category"] == "텔레마케팅"
+    assert index.lookup("070-4567-1300") == {
+        "category": "불법 대출 대역", "reports": 10, "last_report": "2025-01-20",
+        "range": "0704567XXXX", "match": "block",
+    }
+    assert index.lookup("070-4567-130") is None  # 자릿수가 다르면 대역에 속하지 않음
+
+
+def test_exact_number_inside_block(tmp_path):
+    _write_csv(tmp_path / "n.csv", [("070-4567-1234", "보이스피싱", 4, "2025-03-01"),
+                                    ("070-4567-XXXX", "불법 대출 대역", 10, "2025-01-20")])
+    build_index(str(tmp_path / "n.csv"), str(tmp_path / "n.idx"))
+    index = SpamIndex(str(tmp_path / "n.idx"))
+    result = index.lookup("07045671234")
+    assert result["match"] == "exact" and result["block"]["category"] == "불법 대출 대역"
+    index.close()
+
+
+def test_matches_memory_index(index):
+    memory = MemorySpamIndex({
+        number: {"category": category, "reports": reports, "last_report": last}
+        for number, category, reports, last in ROWS[2:6]
+    })
+    for number in ["+82 10 9876 5432", "01098765432", "070-4567-0000", "070-4567-1211",
+                   "+1 (202) 555-0100", "010-0000-0000", "abc"]:
+        assert index.lookup(number) == memory.lookup(number), number
+        assert (number in index) == (number in memory)
+
+
+def test_merge_index_adds_reports(index, tmp_path):
+    merged_path = str(tmp_path / "merged.idx")
+    numbers = {lookup_key("02-1234-5678"): (1, 20250301, "보이스피싱"),
+               lookup_key("010-1111-2222"): (2, 20250302, "스팸")}
+    blocks = {next(index.iter_blocks())[0]: (1, 20250303, "불법 대출 대역")}
+    assert merge_index(index, numbers, blocks, merged_path) == 4
+    merged = SpamIndex(merged_path)
+    assert merged.lookup("0212345678")["reports"] == 8
+    assert merged.lookup("0212345678")["category"] == "보이스피싱"
+    assert merged.lookup("010-1111-2222")["reports"] == 2
+    assert [key for key, *_ in merged.iter_records()] == sorted(key for key, *_ in merged.iter_records())
+    assert sum(record[0] for _, record in merged.iter_blocks()) == 14
+    merged.close()
+    # 기존 인덱스는 그대로
+    assert index.lookup("0212345678")["reports"] == 7
+
+
+def test_random_lookups_match_dict(tmp_path):
+    rng = random.Random(1)
+    numbers = {f"010-{rng.randrange(10000):04d}-{rng.randrange(10000):04d}": rng.randint(1, 9) for _ in range(500)}
+    _write_csv(tmp_path / "r.csv", [(n, "스팸", r, "2025-01-01") for n, r in numbers.items()])
+    build_index(str(tmp_path / "r.csv"), str(tmp_path / "r.idx"), run_size=64)
+    index = SpamIndex(str(tmp_path / "r.idx"))
+    assert len(index) == len(numbers)
+    for number, reports in numbers.items():
+        assert index.lookup(number.replace("-", ""))["reports"] == reports
+    for _ in range(200):
+        number = f"010-{rng.randrange(10000):04d}-{rng.randrange(10000):04d}"
+        assert (number in index) == (number in numbers)
+    index.close()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "bad.idx"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        SpamIndex(str(path))
@@ -0,0 +1,87 @@
+"""스팸 신고 수집·병합 (spam_reports.py)"""
+import os
+from datetime import date
+
+import pytest
+
+import spam_reports
+from spam_reports import HALF_LIFE_DAYS, ReportStore, reputation
+
+ROWS = [
+    ("010-1111-2222", "스팸", 3, "2026-01-01"),
+    ("010-1111-2222", "보이스피싱", 2, "2026-02-01"),
+    ("02-1234-????", "대출", 5, "2026-03-01"),
+    ("잘못된 번호", "스팸", 1, ""),
+]
+NUMBER = {"category": "보이스피싱", "reports": 5, "last_report": "2026-02-01", "match": "exact"}
+BLOCK = {"category": "대출", "reports": 5, "last_report": "2026-03-01", "range": "021234XXXX", "match": "block"}
+
+
+def test_reputation_decays_with_age():
+    today = date(2026, 3, 1)
+    assert reputation(0, "2026-03-01", today) == 0
+    fresh = reputation(20, "2026-03-01", today)
+    assert fresh == 63
+    assert reputation(20, "2026-01-30", today) == reputation(10, "2026-03-01", today)
+    assert reputation(20, "2026-04-01", today) == fresh  # 미래 날짜는 오늘로
+    assert reputation(60, None, today) == 95
+    assert HALF_LIFE_DAYS == 30
+
+
+def test_pending_reports_are_visible(tmp_path):
+    store = ReportStore(str(tmp_path))
+    assert store.add_reports(ROWS) == 3
+    assert store.lookup("010-1111-2222") == NUMBER
+    assert store.lookup("02-1234-5678") == BLOCK
+    assert store.lookup("010-9999-9999") is None and "잘못된 번호" not in store
+    assert len(store) == store.pending == 2
+    store.close()
+
+
+def test_compaction_and_restart(tmp_path):
+    store = ReportStore(str(tmp_path))
+    store.add_reports(ROWS[:3])
+    assert store.compact()
+    assert store.pending == 0 and store.generation == 1
+    assert sorted(os.listdir(tmp_path)) == ["reports.1.log", "spam.1.idx"]
+    assert store.lookup("01011112222") == NUMBER and store.lookup("02-1234-0000") == BLOCK
+    # 병합 뒤 신고는 새 세대 로그에만 있다가 다시 열 때 재생됨
+    store.add_report("010-1111-2222", "스팸", 1, "2026-04-01")
+    store.close()
+
+    reopened = ReportStore(str(tmp_path))
+    assert reopened.pending == 1
+    assert reopened.lookup("010-1111-2222") == dict(NUMBER, category="스팸", reports=6, last_report="2026-04-01")
+    reopened.close()
+
+
+def test_background_compaction_threshold(tmp_path):
+    store = ReportStore(str(tmp_path), compact_threshold=2)
+    store.add_reports(ROWS[:1])
+    assert store._compactor is None
+    store.add_reports(ROWS[2:3])
+    store._compactor.join()
+    assert store.pending == 0 and store.lookup("02-1234-5678") == BLOCK
+    store.close()
+
+
+def test_failed_compaction_keeps_reports(tmp_path, monkeypatch):
+    store = ReportStore(str(tmp_path))
+    store.add_report("010-1111-2222", "스팸", 3)
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as m:
+        m.setattr(spam_reports, "merge_index", fail)
+        with pytest.raises(OSError):
+            store.compact()
+    assert "010-1111-2222" in store
+    store.add_report("010-3333-4444", "스팸", 1)
+    assert store.compact()
+    assert "010-1111-2222" in store and "010-3333-4444" in store
+    store.close()
+
+    reopened = ReportStore(str(tmp_path))
+    assert "010-1111-2222" in reopened and "010-3333-4444" in reopened
+    reopened.close()